@@ -0,0 +1,125 @@
+"""Partial tile files merge benchmark: numpy engine (tasdmc.steps.tile_file) vs corsika2geant_parallel_merge.run
+
+Synthetic partial tile files are generated for a shower with masked near-axis region, then each engine merges
+them several times and the best time is reported along with the number of merged blocks per second:
+
+$ python benchmarks/partial_tile_merge.py --files 4 16 --cpp $TASDMC_BIN_DIR/corsika2geant_parallel_merge.run
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import numpy as np
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from tasdmc.steps.tile_file import (
+    NX,
+    NY,
+    DT,
+    NWORD,
+    TILE_SIDE,
+    DISTMAX,
+    MIN_ARRIVAL_TIME_DTYPE,
+    SENTINEL_TIME,
+    TILE_BLOCK_DTYPE,
+    merge_partial_tile_files,
+    _core_impact_time,
+)
+
+
+def make_partial_tile_files(directory: Path, n_files: int, radius: float, time_bins: int, seed: int = 0) -> int:
+    """Returns total number of blocks in generated files"""
+    rng = np.random.default_rng(seed)
+    header = rng.random(NWORD, dtype=np.float32)
+    header[6:11] = [25e5, 0.3, 0.2, 0.9, 0.5]  # first interaction height, momentum, zenith
+    tmin = _core_impact_time(header)
+
+    halfside = int(radius / TILE_SIDE) + 1
+    m, n = np.meshgrid(
+        np.arange(NX // 2 - halfside, NX // 2 + halfside), np.arange(NY // 2 - halfside, NY // 2 + halfside)
+    )
+    r = np.hypot((m + 0.5) * TILE_SIDE - DISTMAX, (n + 0.5) * TILE_SIDE - DISTMAX)
+    ring = (r > 40) & (r < radius)
+    m, n, r = m[ring], n[ring], r[ring]
+
+    n_blocks_total = 0
+    for i in range(n_files):
+        triplets = np.empty(m.size + 1, dtype=MIN_ARRIVAL_TIME_DTYPE)
+        triplets['m'][:-1] = m
+        triplets['n'][:-1] = n
+        time_bin_offsets = (r / 10).astype(int) + rng.integers(0, 4, size=m.size)
+        triplets['time'][:-1] = tmin + np.float32(DT) * time_bin_offsets.astype(np.float32)
+        triplets[-1] = (-1, -1, SENTINEL_TIME)
+
+        blocks = np.empty(m.size * time_bins, dtype=TILE_BLOCK_DTYPE)
+        blocks['m'] = np.repeat(m, time_bins)
+        blocks['n'] = np.repeat(n, time_bins)
+        blocks['k'] = np.tile(np.arange(time_bins), m.size)
+        blocks['vem_top'] = rng.integers(1, 100, size=blocks.size)
+        blocks['vem_bot'] = rng.integers(1, 100, size=blocks.size)
+        blocks['pz'] = rng.integers(0, 50, size=blocks.size)
+        n_blocks_total += blocks.size
+
+        with open(directory / f'DAT000001.p{i:02d}.dethinned.partial_tile', 'wb') as f:
+            f.write(header.tobytes())
+            f.write(triplets.tobytes())
+            f.write(blocks.tobytes())
+    return n_blocks_total
+
+
+def best_rate(run: Callable[[], None], n_blocks: int, repeat: int) -> Dict[str, float]:
+    best_time: Optional[float] = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        best_time = elapsed if best_time is None else min(best_time, elapsed)
+    return {"blocks": n_blocks, "seconds": best_time, "blocks_per_sec": n_blocks / best_time if best_time else 0.0}
+
+
+def run_suite(files: List[int], radius: float, time_bins: int, repeat: int, cpp: Optional[Path]):
+    results: Dict[str, Dict[str, float]] = {}
+    for n_files in files:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            n_blocks = make_partial_tile_files(tmpdir, n_files, radius, time_bins)
+            partial_tile_files = sorted(tmpdir.glob('*.partial_tile'))
+            results[f"numpy[{n_files} files]"] = best_rate(
+                lambda: merge_partial_tile_files(partial_tile_files, tmpdir / 'numpy.tile'), n_blocks, repeat
+            )
+            if cpp is not None:
+                listing = tmpdir / 'partial_tiles_list'
+                listing.write_text(''.join(f'{ptf}\n' for ptf in partial_tile_files))
+                results[f"cpp[{n_files} files]"] = best_rate(
+                    lambda: subprocess.run([cpp, listing, tmpdir / 'cpp.tile'], check=True, capture_output=True),
+                    n_blocks,
+                    repeat,
+                )
+    return results
+
+
+if __name__ == "__main__":
+    default_cpp = Path(os.environ.get('TASDMC_BIN_DIR', '.')) / 'corsika2geant_parallel_merge.run'
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", nargs="+", type=int, default=[4, 16], help="numbers of partial tile files merged")
+    parser.add_argument("--radius", type=float, default=1000.0, help="radius of the region with particles, m")
+    parser.add_argument("--time-bins", type=int, default=20, help="time bins per tile in each partial tile file")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--cpp", type=Path, default=default_cpp if default_cpp.exists() else None)
+    parser.add_argument("--output", type=Path, default=None, help="JSON file to write results to")
+    args = parser.parse_args()
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": run_suite(args.files, args.radius, args.time_bins, args.repeat, args.cpp),
+    }
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2))
+    print(json.dumps(report, indent=2))
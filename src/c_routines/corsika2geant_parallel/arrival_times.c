@@ -37,9 +37,23 @@ void saveArrivalTime(ParticleData *pd, EventHeaderData *ed)
     }
 };
 
+// same as saveArrivalTime, but also spooling particles passing the cuts into temp_later plain particle file,
+// so that the first VEM batch can be processed without the second pass over the particle file
+void saveArrivalTimeAndSpool(ParticleData *pd, EventHeaderData *ed)
+{
+    saveArrivalTime(pd, ed);
+    if (particlePhysicalCut(pd, emin) && particleGeometricalCut(pd))
+    {
+        fwrite(pd->partbuf, sizeof(float), NPART, temp_later);
+    }
+}
+
+// empty tiles keep SENTINEL_TIME: quantizing it in float32 may give a value slightly off it (e.g. 1000000064),
+// making empty tiles look like ones with particles in the dumped min arrival times
 void quantizeArrivalTimes(float t_start)
 {
     for (int i = 0; i < NX; i++)
         for (int j = 0; j < NY; j++)
-            min_arrival_times[i][j] = t_start + (float)DT * floorf((min_arrival_times[i][j] - t_start) / (float)DT);
+            if (min_arrival_times[i][j] != SENTINEL_TIME)
+                min_arrival_times[i][j] = t_start + (float)DT * floorf((min_arrival_times[i][j] - t_start) / (float)DT);
 }
@@ -5,4 +5,6 @@ void initArrivalTimes();
 
 void saveArrivalTime(ParticleData *pd, EventHeaderData *ed);
 
+void saveArrivalTimeAndSpool(ParticleData *pd, EventHeaderData *ed);
+
 void quantizeArrivalTimes(float t_start);
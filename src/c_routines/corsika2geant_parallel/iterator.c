@@ -20,10 +20,9 @@ bool iterateCorsikaParticleFile(
     initParticleFileStats(stats);
     ParticleData particle_data;
 
-    const off_t RB = sizeof(float);
     int blocklen;
     float buf[NWORD];
-    char block_name[5], block_name_buf[4];
+    char block_name[5];
 
     FILE *fparticle;
     if ((fparticle = fopen(particle_filename, "rb")) == NULL)
@@ -40,49 +39,45 @@ bool iterateCorsikaParticleFile(
         stats->n_blocks_total++;
         for (int iSubblock = 0; iSubblock < NSUBBLOCK; iSubblock++)
         {
-            fread(block_name_buf, sizeof(char), 4, fparticle);
-            fseeko(fparticle, -RB, SEEK_CUR);
-            strncpy(block_name, block_name_buf, 4);
+            // whole subblock is read at once instead of peeking at its name and seeking back,
+            // so that particle file can be a non-seekable stream (e.g. named pipe)
+            if (fread(buf, sizeof(float), NWORD, fparticle) != NWORD)
+            {
+                fprintf(stderr, "Can't read %d-th subblock of %d-th block from %s",
+                        iSubblock, stats->n_blocks_total, particle_filename);
+                return false;
+            }
+            strncpy(block_name, (char *)buf, 4);
             block_name[4] = '\0';
             if (!strcmp("RUNH", block_name))
             {
                 stats->nRUNH++;
-                fread(buf, sizeof(float), NWORD, fparticle);
             }
             else if (!strcmp("EVTH", block_name))
             {
                 stats->nEVTH++;
-                if (!readEventHeaderData(event_header_data, fparticle))
-                {
-                    fprintf(stderr, "Can't read header data block from %s", particle_filename);
-                    return false;
-                }
+                memcpy(event_header_data->eventbuf, buf, NWORD * sizeof(float));
+                fillEventHeaderData(event_header_data);
             }
             else if (!strcmp("LONG", block_name))
             {
                 stats->nLONG++;
-                fread(buf, sizeof(float), NWORD, fparticle);
             }
             else if (!strcmp("EVTE", block_name))
             {
                 stats->nEVTE++;
-                fread(buf, sizeof(float), NWORD, fparticle);
             }
             else if (!strcmp("RUNE", block_name))
             {
                 stats->nRUNE++;
-                fread(buf, sizeof(float), NWORD, fparticle);
             }
             else
             {
                 for (int i_part_subblock = 0; i_part_subblock < NSENTENCE; i_part_subblock++)
                 {
                     stats->nPARTSUB++;
-                    if (!readParticleData(&particle_data, fparticle))
-                    {
-                        fprintf(stderr, "Can't read %d-th particle subblock from %s", i_part_subblock, particle_filename);
-                        return false;
-                    }
+                    memcpy(particle_data.partbuf, buf + i_part_subblock * NPART, NPART * sizeof(float));
+                    fillParticleData(&particle_data);
                     processParticle(&particle_data, event_header_data);
                 }
             }
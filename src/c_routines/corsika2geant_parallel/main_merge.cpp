@@ -2,7 +2,10 @@
 #include <stdio.h>
 #include <string.h>
 #include <errno.h>
+#include <limits.h>
 #include <map>
+#include <vector>
+#include <array>
 #include <algorithm>
 #include <math.h>
 
@@ -32,6 +35,17 @@ Sparse3DMatrix pz;
 float reference_min_arrival_times[NX][NY];
 float global_min_arrival_times[NX][NY];
 float current_min_arrival_times[NX][NY];
+bool interpolated_tiles[NX][NY];
+
+// in merge tree mode partial tile files have quantized min arrival times (see main_partial.c), so time bin deltas
+// between them are rounded to compensate float errors; otherwise they are truncated as in the flat merge
+bool merge_tree = false;
+
+short timeBinsDelta(float from, float to)
+{
+    float delta = (to - from) / DT;
+    return merge_tree ? (short)roundf(delta) : (short)delta;
+}
 
 void initMinArrivalTimes(float arr[NX][NY])
 {
@@ -92,10 +106,8 @@ bool loadPartialTileFile(char *filename, EventHeaderData *event_data)
     {
         mnk[0] = (short)buf[0];
         mnk[1] = (short)buf[1];
-        // no actual rounding here because min arrival times are quantized in DT units on initial processing
-        short delta_k = (short)((current_min_arrival_times[mnk[0]][mnk[1]] -
-                                 reference_min_arrival_times[mnk[0]][mnk[1]]) /
-                                DT);
+        short delta_k = timeBinsDelta(reference_min_arrival_times[mnk[0]][mnk[1]],
+                                      current_min_arrival_times[mnk[0]][mnk[1]]);
         mnk[2] = ((short)buf[4]) + delta_k;
         unsigned short vem_top_ = buf[2];
         unsigned short vem_bot_ = buf[3];
@@ -140,7 +152,10 @@ bool dumpTileFile(char *filename, EventHeaderData *ed)
         if (buf[2] == 0 && buf[3] == 0)
             continue;
         // transforming # bins from min arrival time (in [0; TMAX]) to # bins from tmin
-        buf[4] = (unsigned short)((reference_min_arrival_times[mnk[0]][mnk[1]] + (float)(mnk[2]) * DT - ed->tmin) / DT);
+        if (!merge_tree || interpolated_tiles[mnk[0]][mnk[1]])
+            buf[4] = (unsigned short)((reference_min_arrival_times[mnk[0]][mnk[1]] + (float)(mnk[2]) * DT - ed->tmin) / DT);
+        else // non-interpolated min arrival times are quantized in DT units relative to tmin
+            buf[4] = (unsigned short)(roundf((reference_min_arrival_times[mnk[0]][mnk[1]] - ed->tmin) / DT) + mnk[2]);
         buf[5] = pz[mnk];
         if (fwrite(buf, sizeof(short), TILE_FILE_BLOCK_SIZE, fout) != TILE_FILE_BLOCK_SIZE)
         {
@@ -152,6 +167,86 @@ bool dumpTileFile(char *filename, EventHeaderData *ed)
     return true;
 }
 
+// dumping merged data in the partial tile file format, so that it can be merged again with other partial tiles;
+// min arrival times are global ones and time bin numbers are relative to them, so they are non-negative
+bool dumpPartialTileFile(char *filename, EventHeaderData *ed)
+{
+    FILE *fout = fopen(filename, "w");
+    fprintf(stdout, "Writing merged partial tile data to %s\n", filename);
+    if (fout == NULL)
+    {
+        fprintf(stderr, "Cannot open file %s: %s\n", filename, strerror(errno));
+        return false;
+    }
+
+    if (fwrite(ed->eventbuf, sizeof(float), NWORD, fout) != NWORD)
+    {
+        fprintf(stderr, "Error writing event header to file: %s\n", strerror(errno));
+        fclose(fout);
+        return false;
+    }
+
+    for (short m = 0; m < NX; m++)
+        for (short n = 0; n < NY; n++)
+            if (global_min_arrival_times[m][n] != SENTINEL_TIME)
+                if (!((fwrite(&m, sizeof(short), 1, fout) == 1) &&
+                      (fwrite(&n, sizeof(short), 1, fout) == 1) &&
+                      (fwrite(&global_min_arrival_times[m][n], sizeof(float), 1, fout) == 1)))
+                {
+                    fclose(fout);
+                    return false;
+                }
+    short dummy_idx = -1;
+    float dummy_time = SENTINEL_TIME;
+    if (!((fwrite(&dummy_idx, sizeof(short), 1, fout) == 1) &&
+          (fwrite(&dummy_idx, sizeof(short), 1, fout) == 1) &&
+          (fwrite(&dummy_time, sizeof(float), 1, fout) == 1)))
+    {
+        fclose(fout);
+        return false;
+    }
+
+    unsigned short buf[TILE_FILE_BLOCK_SIZE];
+    std::array<short, 3> mnk;
+    for (auto it = vem_top.begin(); it != vem_top.end(); ++it)
+    {
+        mnk = it->first;
+        buf[2] = it->second;
+        buf[3] = vem_bot[mnk];
+        buf[5] = pz[mnk];
+        if (buf[2] == 0 && buf[3] == 0 && buf[5] == 0)
+            continue;
+        buf[0] = mnk[0];
+        buf[1] = mnk[1];
+        // both min arrival times are quantized in DT units, rounding only compensates float errors
+        short ref2global_delta_k = (short)roundf((reference_min_arrival_times[mnk[0]][mnk[1]] -
+                                                  global_min_arrival_times[mnk[0]][mnk[1]]) /
+                                                 DT);
+        buf[4] = (unsigned short)(mnk[2] + ref2global_delta_k);
+        if (fwrite(buf, sizeof(short), TILE_FILE_BLOCK_SIZE, fout) != TILE_FILE_BLOCK_SIZE)
+        {
+            fclose(fout);
+            return false;
+        }
+    }
+    fclose(fout);
+    return true;
+}
+
+// shifting time bin numbers of all (m, n, *) entries, used when tile's reference min arrival time is changed
+void shiftTimeBins(Sparse3DMatrix &matrix, short m, short n, short delta_k)
+{
+    auto first = matrix.lower_bound({m, n, SHRT_MIN});
+    auto last = matrix.upper_bound({m, n, SHRT_MAX});
+    std::vector<std::pair<std::array<short, 3>, unsigned short>> shifted(first, last);
+    matrix.erase(first, last);
+    for (auto &entry : shifted)
+    {
+        entry.first[2] += delta_k;
+        matrix.insert(entry);
+    }
+}
+
 float interp_radius; // m
 int interp_halfside; // tiles from NX / 2
 
@@ -183,7 +278,18 @@ void inetrpolateMinArrivalTimes()
                 global_min_arrival_times[m][n] = 0.5 * (global_min_arrival_times[m_close][n_close] + global_min_arrival_times[m_far][n_far]) +
                                                  0.5 * (global_min_arrival_times[m_close][n_close] - global_min_arrival_times[m_far][n_far]) /
                                                      radius_ratio;
+                if (merge_tree && reference_min_arrival_times[m][n] != SENTINEL_TIME)
+                {
+                    // tile already has some data, its time bins are re-referenced to keep their arrival times
+                    short ref2interp_delta_k = (short)roundf((reference_min_arrival_times[m][n] -
+                                                              global_min_arrival_times[m][n]) /
+                                                             DT);
+                    shiftTimeBins(vem_top, m, n, ref2interp_delta_k);
+                    shiftTimeBins(vem_bot, m, n, ref2interp_delta_k);
+                    shiftTimeBins(pz, m, n, ref2interp_delta_k);
+                }
                 reference_min_arrival_times[m][n] = global_min_arrival_times[m][n];
+                interpolated_tiles[m][n] = true;
             }
         }
 }
@@ -209,9 +315,8 @@ void interpolateTile(EventHeaderData *ed)
                 mnk_sample[1] = coord2TileIndex(100 * y * r_ratio);
 
                 // e.g. if reference min arrival time happens to be 3*DT ahead of global min, this will be -3
-                short global2ref_delta_k = (short)((global_min_arrival_times[mnk_sample[0]][mnk_sample[1]] -
-                                                    reference_min_arrival_times[mnk_sample[0]][mnk_sample[1]]) /
-                                                   DT);
+                short global2ref_delta_k = timeBinsDelta(reference_min_arrival_times[mnk_sample[0]][mnk_sample[1]],
+                                                         global_min_arrival_times[mnk_sample[0]][mnk_sample[1]]);
 
                 // for interpolated tiles reference min arr. time = global min arr. time, so k starts from 0
                 for (mnk[2] = 0; mnk[2] < TMAX; mnk[2] += 1)
@@ -255,16 +360,22 @@ void interpolateTile(EventHeaderData *ed)
 
 int main(int argc, char *argv[])
 {
-    if (argc != 3)
+    bool partial_output = (argc == 4 && strcmp(argv[3], "--partial") == 0);
+    merge_tree = partial_output || (argc == 4 && strcmp(argv[3], "--merge-tree") == 0);
+    if (argc != 3 && !merge_tree)
     {
         fprintf(
             stderr,
             "corsika2geant_parallel_merge.run is a routine to merge a set of partial tile files (produced with "
             "corsika2geant_parallel_partial.run) into a single tile file\n"
             "also performs interpolation of the near-axis region, masked in CORSIKA/dethinning\n\n"
-            "accepts exactly 2 command line arguments:\n"
+            "accepts 2 command line arguments:\n"
             "\ttext file listing all partial files to be merged\n"
-            "\toutput tile file name\n");
+            "\toutput tile file name\n"
+            "optional third argument --partial makes the routine skip interpolation and write output in the partial "
+            "tile file format, for it to be merged with other partial tile files later; --merge-tree makes it merge "
+            "partial tile files produced for the merge tree (see corsika2geant_parallel_process.run) into the final "
+            "tile file\n");
         exit(EXIT_FAILURE);
     }
     const char *listing_file = argv[1];
@@ -291,10 +402,20 @@ int main(int argc, char *argv[])
         fprintf(stdout, "Sparse matrices load (1%% ~ 600Mb RAM): %f%%\n", 100 * sparse3DMatrixLoadFactor(vem_top));
     }
 
-    inetrpolateMinArrivalTimes();
-    interpolateTile(&event_data);
-
-    dumpTileFile(output_file, &event_data);
+    if (partial_output)
+    {
+        if (!dumpPartialTileFile(output_file, &event_data))
+        {
+            fprintf(stderr, "Error writing partial tile file %s\n", output_file);
+            exit(EXIT_FAILURE);
+        }
+    }
+    else
+    {
+        inetrpolateMinArrivalTimes();
+        interpolateTile(&event_data);
+        dumpTileFile(output_file, &event_data);
+    }
 
     fprintf(stdout, "OK\n");
     fclose(flist);
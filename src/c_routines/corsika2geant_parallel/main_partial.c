@@ -9,6 +9,8 @@ about energy deposit in a tile of virtual detectors .
 #include <math.h>
 #include <unistd.h>
 #include <sys/types.h>
+#include <sys/stat.h>
+#include <stdbool.h>
 #include <assert.h>
 #include <libgen.h>
 #include <errno.h>
@@ -18,6 +20,7 @@ about energy deposit in a tile of virtual detectors .
 #include "./structs.h"
 #include "./globals.h"
 #include "./utils.h"
+#include "./temp_files.h"
 
 #include "./arrival_times.h"
 #include "./vem.h"
@@ -35,27 +38,6 @@ int current_batch_idx;
 unsigned short vemcount[NX][NY][NT][2];
 unsigned short pz[NX][NY][NT];
 
-FILE *temp_now = NULL;
-FILE *temp_later = NULL;
-char temp_filename_1[4096];
-char temp_filename_2[4096];
-bool temp_files_swap = true;
-
-void prepareTempFilePointers()
-{
-    if (temp_now != NULL && temp_later != NULL)
-    {
-        fclose(temp_now);
-        fclose(temp_later);
-    }
-    // swapping two temp files between "now" and "later" roles on each function call
-    const char *now_filename = temp_files_swap ? temp_filename_1 : temp_filename_2;
-    const char *later_filename = temp_files_swap ? temp_filename_2 : temp_filename_1;
-    temp_now = fopen(now_filename, "r");
-    temp_later = fopen(later_filename, "w");
-    temp_files_swap = !temp_files_swap;
-}
-
 // dumping verbatim event header (primary particle info, shower geometry, etc) from CORSIKA particle output
 bool dumpEventHeader(FILE *fout, EventHeaderData *ed)
 {
@@ -116,17 +98,20 @@ bool dumpVemBatch(FILE *fout, int batch_idx, EventHeaderData *event_data)
 
 int main(int argc, char *argv[])
 {
-    if (argc < 4 || argc > 5)
+    bool merge_tree = (argc == 5 && strcmp(argv[4], "--merge-tree") == 0);
+    if (argc < 4 || argc > 5 || (argc == 5 && !merge_tree))
     {
         fprintf(
             stderr,
             "corsika2geant_parallel_process.run is a rewrite of corsika2geant.run that processes a "
             "single dethinned particle file and produces a partial tile file\n"
             "partial tile files should then be merged together by corsik2geant_parallel_merge.run\n\n"
-            "accepts exactly 3 command-line arguments:\n"
+            "accepts 3 command-line arguments:\n"
             "\tdethinned CORSIKA particle file path\n"
             "\tsdgeant.dst file path\n"
-            "\tpartial tile file path\n");
+            "\tpartial tile file path\n"
+            "optional fourth argument --merge-tree makes the routine dump quantized min arrival times, so that "
+            "partial tile files can be merged in a tree, see corsika2geant_parallel_merge.run\n");
         exit(EXIT_FAILURE);
     }
     const char *particle_file = argv[1];
@@ -154,20 +139,40 @@ int main(int argc, char *argv[])
     ParticleFileStats stats;
     EventHeaderData event_data;
 
+    // particle file that can't be read twice (e.g. named pipe from dethinning routine) is read once, with
+    // particles passing the cuts spooled into the first temp file to be processed as the first batch
+    struct stat particle_file_stat;
+    bool single_pass = stat(particle_file, &particle_file_stat) == 0 && S_ISFIFO(particle_file_stat.st_mode);
+
     fprintf(stdout, "Calculating minimum particle arrival time for each tile\n");
     initArrivalTimes();
     particle_count = 0;
     outlier_particle_count = 0;
-    if (!iterateCorsikaParticleFile(particle_file, &saveArrivalTime, &stats, &event_data, true))
+    if (single_pass)
+    {
+        fprintf(stdout, "Particle file is a named pipe, spooling particles into %s\n", temp_filename_1);
+        temp_later = fopen(temp_filename_1, "w");
+    }
+    if (!iterateCorsikaParticleFile(
+            particle_file, single_pass ? &saveArrivalTimeAndSpool : &saveArrivalTime, &stats, &event_data, true))
     {
         fprintf(stderr, "minimal arrival time calculation failed for %s", particle_file);
         exit(EXIT_FAILURE);
     }
+    if (single_pass)
+    {
+        fclose(temp_later);
+        temp_later = NULL;
+    }
     if (!dumpEventHeader(fout, &event_data))
     {
         fprintf(stderr, "error writing header to output file %s", tile_file);
         exit(EXIT_FAILURE);
     }
+    // time bins in partial tile file are counted from quantized min arrival times; for the merge tree they are
+    // dumped after quantization, so that merging partial tile files in any order or grouping gives the same result
+    if (merge_tree)
+        quantizeArrivalTimes(event_data.tmin);
     if (!dumpMinArrivalTimes(fout))
     {
         fprintf(stderr, "error writing min arrival times to file %s", tile_file);
@@ -176,7 +181,8 @@ int main(int argc, char *argv[])
     fprintf(stdout,
             "Particles read: %d\n... of them outliers: %d\nTime of Core Impact, ns: %g\n",
             particle_count, outlier_particle_count, event_data.tmin);
-    quantizeArrivalTimes(event_data.tmin);
+    if (!merge_tree)
+        quantizeArrivalTimes(event_data.tmin);
     int total_particle_count = particle_count;
 
     current_batch_idx = 0;
@@ -184,7 +190,9 @@ int main(int argc, char *argv[])
     prepareTempFilePointers();
     particle_count = 0;
     initVem();
-    if (!iterateCorsikaParticleFile(particle_file, &sumBatchElosses, &stats, &event_data, true))
+    if (single_pass)
+        iteratePlainParticleFile(temp_now, &sumBatchElosses, &event_data);
+    else if (!iterateCorsikaParticleFile(particle_file, &sumBatchElosses, &stats, &event_data, true))
     {
         fprintf(stderr, "first elosses summation from %s failed", particle_file);
         exit(EXIT_FAILURE);
@@ -22,12 +22,17 @@ bool readEventHeaderData(EventHeaderData *d, FILE *file)
     {
         return false;
     }
+    fillEventHeaderData(d);
+    return true;
+}
+
+void fillEventHeaderData(EventHeaderData *d)
+{
     d->origin[0] = -d->eventbuf[7] / d->eventbuf[9] * (d->eventbuf[6] - observationLevel);
     d->origin[1] = -d->eventbuf[8] / d->eventbuf[9] * (d->eventbuf[6] - observationLevel);
     d->origin[2] = d->eventbuf[6];
     d->tmin = hypotf(hypotf(d->origin[0], d->origin[1]), d->origin[2] - observationLevel) / CSPEED;
     d->zenith = d->eventbuf[10];
-    return true;
 }
 
 bool readParticleData(ParticleData *pd, FILE *file)
@@ -36,12 +41,17 @@ bool readParticleData(ParticleData *pd, FILE *file)
     {
         return false;
     }
+    fillParticleData(pd);
+    return true;
+}
+
+void fillParticleData(ParticleData *pd)
+{
     pd->id = (int)pd->partbuf[0] / 1000.0;
     float p = hypotf(pd->partbuf[3], hypotf(pd->partbuf[1], pd->partbuf[2]));
     float mass = pmass[pd->id];
     pd->energy = hypotf(mass, p) - mass;
     pd->sectheta = p / pd->partbuf[3];
-    return true;
 }
 
 void initParticleFileStats(ParticleFileStats *s)
@@ -59,6 +59,11 @@ bool readParticleData(ParticleData *pd, FILE *file);
 
 bool readEventHeaderData(EventHeaderData *d, FILE *file);
 
+// computing derived fields from verbatim particle record / event header already stored in the struct
+void fillParticleData(ParticleData *pd);
+
+void fillEventHeaderData(EventHeaderData *d);
+
 void initParticleFileStats(ParticleFileStats *s);
 
 
@@ -0,0 +1,29 @@
+#include <stdio.h>
+#include <stdbool.h>
+
+#include "./globals.h"
+#include "./temp_files.h"
+
+FILE *temp_now = NULL;
+FILE *temp_later = NULL;
+char temp_filename_1[4096];
+char temp_filename_2[4096];
+bool temp_files_swap = true;
+
+void prepareTempFilePointers()
+{
+    // closing separately: "now" file doesn't exist before the first batch, but "later" must be flushed anyway;
+    // previously both were closed only if both were open, so the second call read the "later" file without its
+    // buffered tail, and batches after the first one missed particles (i.e. partial tile files produced before
+    // this have lower VEM counts in these batches)
+    if (temp_now != NULL)
+        fclose(temp_now);
+    if (temp_later != NULL)
+        fclose(temp_later);
+    // swapping two temp files between "now" and "later" roles on each function call
+    const char *now_filename = temp_files_swap ? temp_filename_1 : temp_filename_2;
+    const char *later_filename = temp_files_swap ? temp_filename_2 : temp_filename_1;
+    temp_now = fopen(now_filename, "r");
+    temp_later = fopen(later_filename, "w");
+    temp_files_swap = !temp_files_swap;
+}
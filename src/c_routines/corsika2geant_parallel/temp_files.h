@@ -0,0 +1,9 @@
+#ifndef TEMP_FILES_H_
+#define TEMP_FILES_H_
+
+extern char temp_filename_1[4096];
+extern char temp_filename_2[4096];
+
+void prepareTempFilePointers();
+
+#endif
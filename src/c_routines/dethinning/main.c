@@ -67,7 +67,6 @@ int main(int argc, char *argv[])
 	float R1[3], energy, dist, R, pln1[3], pln2[3], blurscale;
 	float DISTMIN1, DISTMIN2, enlog, ptot, latdist, mo, toffset = 0;
 	float otmp[3], height_long = 1.e12, npart[9], x0, secnew, enew;
-	off_t RB = sizeof(float);
 
 	#ifdef INMEMORY_BUFFERING
 	char outputBuffer[OUTPUTBUFFER_SIZE];
@@ -151,8 +150,10 @@ int main(int argc, char *argv[])
 		nBlock++;
 		for (i = 0; i < NSUBBLOCK; i++)
 		{
-			fread(bufName, sizeof(char), 4, fin);
-			fseeko(fin, -RB, SEEK_CUR);
+			// whole subblock is read at once instead of peeking at its name and seeking back,
+			// so that input can be a non-seekable stream (e.g. named pipe)
+			fread(buf, sizeof(float), NWORD, fin);
+			memcpy(bufName, buf, 4);
 			strncpy(blockName, bufName, 4);
 			blockName[4] = '\0';
 
@@ -161,7 +162,6 @@ int main(int argc, char *argv[])
 			if (!strcmp("RUNH", blockName))
 			{
 				nRUNH++;
-				fread(buf, sizeof(float), NWORD, fin);
 				for (m = 0; m < NWORD2; m++)
 					buf2[m] = buf[m];
 				fwrite(buf2, sizeof(float), NWORD2, fout);
@@ -179,7 +179,6 @@ int main(int argc, char *argv[])
 			else if (!strcmp("EVTH", blockName))
 			{
 				nEVTH++;
-				fread(buf, sizeof(float), NWORD, fin);
 				for (m = 0; m < NWORD2; m++)
 					buf2[m] = buf[m];
 				coszenith = cosf(buf[10]); // TODO: pass this as a param where it is needed
@@ -264,7 +263,6 @@ int main(int argc, char *argv[])
 						fwrite(&blockLen2, sizeof(int), 1, fout);
 					}
 				}
-				fread(buf, sizeof(float), NWORD, fin);
 				for (m = 0; m < NWORD2; m++)
 					buf2[m] = buf[m];
 				fwrite(buf2, sizeof(float), NWORD2, fout);
@@ -297,7 +295,6 @@ int main(int argc, char *argv[])
 					}
 				}
 				nEVTE++;
-				fread(buf, sizeof(float), NWORD, fin);
 				for (m = 0; m < NWORD2; m++)
 					buf2[m] = buf[m];
 				fwrite(buf2, sizeof(float), NWORD2, fout);
@@ -330,7 +327,6 @@ int main(int argc, char *argv[])
 					}
 				}
 				nRUNE++;
-				fread(buf, sizeof(float), NWORD, fin);
 				for (m = 0; m < NWORD2; m++)
 					buf2[m] = buf[m];
 				fwrite(buf2, sizeof(float), NWORD2, fout);
@@ -362,7 +358,7 @@ int main(int argc, char *argv[])
 				for (j = 0; j < NSENTENCE; j++)
 				{
 					nPARTSUB++;
-					fread(buf3, sizeof(float), NPART, fin);
+					memcpy(buf3, buf + j * NPART, NPART * sizeof(float));
 					buf3[6] -= toffset;
 					for (m = 0; m < NPART2; m++)
 						buf4[m] = buf3[m];
@@ -1,9 +1,7 @@
 import sys
 import click
 
-from tasdmc import config, fileio, nodes, fork
-from tasdmc.system import processes
-from tasdmc.config.update import update_run_config
+from tasdmc import config, fileio
 from tasdmc.utils import user_confirmation_destructive
 
 from ..group import cli
@@ -35,6 +33,8 @@ def continue_run_cmd(rerun_step_on_input_hash_mismatch: bool, disable_input_hash
         click.echo("--rerun-step-on-input-hash-mismatch and --disable-input-hash-checks options can't be used together")
         sys.exit(1)
     if config.is_local_run():
+        from tasdmc.system import processes
+
         config.Ephemeral.rerun_step_on_input_hash_mismatch = rerun_step_on_input_hash_mismatch
         config.Ephemeral.disable_input_hash_checks = disable_input_hash_checks
         saved_main_pid = fileio.get_saved_main_pid()
@@ -44,6 +44,8 @@ def continue_run_cmd(rerun_step_on_input_hash_mismatch: bool, disable_input_hash
         fileio.prepare_run_dir(continuing=True)
         run_simulation_in_background()
     else:
+        from tasdmc import nodes
+
         nodes.check_all()
         nodes.continue_all(rerun_step_on_input_hash_mismatch, disable_input_hash_checks)
 
@@ -57,11 +59,15 @@ def continue_run_cmd(rerun_step_on_input_hash_mismatch: bool, disable_input_hash
 @error_catching
 def abort_run_cmd(confirm: bool, safe: bool):
     if config.is_distributed_run():
+        from tasdmc import nodes
+
         nodes.check_all()
     if not confirm:
         click.secho(f"You are about to kill run '{config.run_name()}'!")
     if confirm or user_confirmation_destructive(config.run_name()):
         if config.is_local_run():
+            from tasdmc.system import processes
+
             saved_main_pid = fileio.get_saved_main_pid()
             if saved_main_pid is not None:
                 processes.abort_run_processes(saved_main_pid, safe)
@@ -89,6 +95,8 @@ def abort_run_cmd(confirm: bool, safe: bool):
 @loading_run_by_name
 @error_catching
 def fork_cmd(fork_name: str, after: str):
+    from tasdmc import fork
+
     if config.is_distributed_run():
         click.echo("Forking is currently available only for local runs")
         return
@@ -107,6 +115,8 @@ def fork_cmd(fork_name: str, after: str):
 @error_catching
 def update_config_cmd(new_run_config_filename: str, new_nodes_config_filename: str, hard: bool, validate_only: bool):
     if config.is_local_run():
+        from tasdmc.config.update import update_run_config
+
         if new_run_config_filename is None:
             raise ValueError("-r (new run config) option must be specified")
         click.echo(f"Updating run config with values from {new_run_config_filename}")
@@ -117,6 +127,8 @@ def update_config_cmd(new_run_config_filename: str, new_nodes_config_filename: s
     else:
         if new_run_config_filename is None and new_nodes_config_filename is None:
             raise ValueError("At least one of -r (new run config) and -n (new nodes config) options must be specified")
+        from tasdmc import nodes
+
         nodes.check_all()
 
         if new_run_config_filename is not None:
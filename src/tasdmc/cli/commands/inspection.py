@@ -1,6 +1,6 @@
 import click
 
-from tasdmc import fileio, inspect, hard_cleanup, config
+from tasdmc import fileio, config
 
 from ..group import cli
 from ..utils import loading_run_by_name, error_catching
@@ -11,6 +11,8 @@ from ..utils import loading_run_by_name, error_catching
 @loading_run_by_name
 @error_catching
 def fix_failed_pipelines_cmd(hard: bool):
+    from tasdmc import inspect, hard_cleanup
+
     if config.is_distributed_run():
         click.echo("Not available for distributed run, please fix your nodes manually")
         return
@@ -31,6 +33,8 @@ def fix_failed_pipelines_cmd(hard: bool):
 @loading_run_by_name
 @error_catching
 def inspect_cmd(pagesize: int, verbose: bool, all: bool):
+    from tasdmc import inspect
+
     if config.is_distributed_run():
         click.echo("Not available for distributed run, please inspect your nodes manually")
         return
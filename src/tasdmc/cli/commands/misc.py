@@ -1,10 +1,7 @@
-from email.policy import default
 import click
 from pathlib import Path
-import gdown
-from gdown.cached_download import assert_md5sum
 
-from tasdmc import fileio, extract_calibration, config, nodes
+from tasdmc import fileio, config
 
 from tasdmc.utils import user_confirmation
 from tasdmc import __version__
@@ -19,6 +16,8 @@ from tasdmc.cli.utils import error_catching, loading_run_by_name
 @loading_run_by_name
 @error_catching
 def update_nodes():
+    from tasdmc import nodes
+
     if not config.is_distributed_run():
         click.echo("Command is only available for distributed runs")
     if not user_confirmation(
@@ -55,12 +54,17 @@ def update_nodes():
 )
 @error_catching
 def extract_calibration_cmd(raw_data_dir: str, parallel_threads: int):
+    from tasdmc import extract_calibration
+
     extract_calibration.extract_calibration(Path(raw_data_dir), parallel_threads)
 
 
 @cli.command("download-data-files", help="Download data files necessary for the simulation (total of ~350 Mb)")
 @error_catching
 def download_data_files_cmd():
+    import gdown
+    from gdown.cached_download import assert_md5sum
+
     for data_file, gdrive_id, expected_md5 in (
         (fileio.DataFiles.sdgeant, '1ZTSrrAg2T8bvIDhPuh2ruVShmubwvTWG', '0cebc42f86e227e2fb2397dd46d7d981'),
         (fileio.DataFiles.atmos, '1qZfUNXAyqVg5HwH9BYUGVQ-UDsTwl4FQ', '254c7999be0a48bd65e4bc8cbea4867f'),
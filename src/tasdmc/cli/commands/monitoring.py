@@ -1,9 +1,7 @@
 import click
 from time import sleep
 
-from tasdmc import config, fileio, nodes
-from tasdmc.system import processes
-from tasdmc.logs import display as display_logs
+from tasdmc import config, fileio
 
 from ..group import cli
 from ..utils import loading_run_by_name, error_catching
@@ -63,6 +61,8 @@ def info_cmd():
 @loading_run_by_name
 @error_catching
 def progress_cmd(follow: bool, dump_json: bool, per_node: bool, ansi_colors: bool):
+    from tasdmc.logs import display as display_logs
+
     full_color = not ansi_colors
     if config.is_local_run():
         if per_node:
@@ -83,6 +83,8 @@ def progress_cmd(follow: bool, dump_json: bool, per_node: bool, ansi_colors: boo
             click.echo("--follow option ignored for distributed run")
         if dump_json:
             click.echo("--dump-json option ignored for distributed run")
+        from tasdmc import nodes
+
         plps = nodes.collect_progress_data()
         if per_node:
             for plp in plps:
@@ -104,7 +106,11 @@ def progress_cmd(follow: bool, dump_json: bool, per_node: bool, ansi_colors: boo
 @loading_run_by_name
 @error_catching
 def process_status_cmd(n_last_messages: int, display_processes: bool):
+    from tasdmc.logs import display as display_logs
+
     if config.is_local_run():
+        from tasdmc.system import processes
+
         saved_main_pid = fileio.get_saved_main_pid()
         if saved_main_pid is None:
             click.echo("Run was never launched (probably just forked?)")
@@ -115,6 +121,8 @@ def process_status_cmd(n_last_messages: int, display_processes: bool):
         if n_last_messages:
             display_logs.print_multiprocessing_log(n_last_messages)
     else:
+        from tasdmc import nodes
+
         nodes.print_statuses(n_last_messages, display_processes)
 
 
@@ -146,6 +154,8 @@ def process_status_cmd(n_last_messages: int, display_processes: bool):
 @loading_run_by_name
 @error_catching
 def system_resources_cmd(latest: bool, abstime: bool, dump_json: bool, per_node: bool):
+    from tasdmc.logs import display as display_logs
+
     if config.is_local_run():
         timeline = display_logs.SystemResourcesTimeline.parse_from_logs(include_previous_runs=(not latest))
         if dump_json:
@@ -155,6 +165,8 @@ def system_resources_cmd(latest: bool, abstime: bool, dump_json: bool, per_node:
     else:
         if dump_json:
             click.echo("--dump-json option ignored for distributed run")
+        from tasdmc import nodes
+
         timelines = nodes.collect_system_resources_timelines(latest)
         if per_node:
             for timeline in timelines:
@@ -171,4 +183,6 @@ def inputs_cmd():
     if config.is_local_run():
         click.echo(fileio.cards_gen_info_log().read_text())
     else:
+        from tasdmc import nodes
+
         nodes.print_inputs()
@@ -1,10 +1,10 @@
-from email.policy import default
 import click
-from pathlib import Path
 import tarfile
 import sys
 
-from tasdmc import config, nodes, fileio
+from typing import Tuple
+
+from tasdmc import config, fileio
 
 from tasdmc.utils import user_confirmation
 from tasdmc import __version__
@@ -39,3 +39,72 @@ def archive_results(output: str):
         tar.add(fileio.saved_run_config_file(), arcname=f"{in_archive_config_dir_name}/run.yaml")
         if config.is_distributed_run():
             tar.add(fileio.saved_nodes_config_file(), arcname=f"{in_archive_config_dir_name}/nodes.yaml")
+
+
+@cli.group("results", help="Query simulation results")
+def results_group():
+    pass
+
+
+@results_group.command(
+    "query",
+    help=(
+        "Query reconstruction results of RUN_NAME exported with pipeline.export_reconstructed_events_columns; "
+        + "results are indexed on the first query and reindexed when changed"
+    ),
+)
+@click.option(
+    "-w",
+    "--where",
+    multiple=True,
+    help="Condition(s) on columns, e.g. 'energy > 10 and theta < 45' (angles in degrees); may be used multiple times",
+)
+@click.option(
+    "-c",
+    "--columns",
+    default="set,energy,theta,phi",
+    show_default=True,
+    help="Comma-separated list of columns to print; 'set' and 'file' are event's minimal energy set and source file",
+)
+@click.option(
+    "-e",
+    "--log10E-min",
+    "log10E_min",
+    multiple=True,
+    type=click.FLOAT,
+    help="Query only results sampled with given minimal energy; may be used multiple times; defaults to all",
+)
+@click.option("--count", is_flag=True, default=False, help="Print only the number of matching events")
+@click.option("--dump-json", is_flag=True, default=False, help="Dump query result as json")
+@loading_run_by_name
+@error_catching
+def results_query(where: Tuple[str, ...], columns: str, log10E_min: Tuple[float, ...], count: bool, dump_json: bool):
+    import numpy as np
+    from tasdmc.results_index import ResultsIndex, QueryResult, parse_conditions
+    from tasdmc.steps.utils import log10E2str
+
+    columns_list = [c.strip() for c in columns.split(",") if c.strip()]
+    if config.is_local_run():
+        result = ResultsIndex().update().query(
+            parse_conditions(list(where)),
+            columns_list,
+            set_names=[log10E2str(e) for e in log10E_min] or None,
+        )
+    else:
+        from tasdmc import nodes
+
+        result = QueryResult(columns={c: np.empty(0) for c in columns_list})
+        for node_result in nodes.collect_query_results(where, columns_list, log10E_min):
+            result += node_result
+
+    if dump_json:
+        click.echo(result.dump())
+        return
+    if not count:
+        click.echo("\t".join(result.columns))
+        for row in zip(*result.columns.values()):
+            click.echo("\t".join(str(value) for value in row))
+    click.echo(
+        f"{result.n_events} events matched, {result.chunks_read} of {result.chunks_total} chunks read",
+        err=not count,
+    )
@@ -1,7 +1,7 @@
 import click
 from pathlib import Path
 
-from tasdmc import config, pipeline, fileio, nodes
+from tasdmc import config, fileio
 
 from tasdmc.cli.group import cli
 from tasdmc.cli.options import run_config_option, nodes_config_option
@@ -24,6 +24,8 @@ from tasdmc.cli.utils import run_simulation_in_background, error_catching, echo_
 )
 @error_catching
 def local_run_cmd(run_config_filename: str, dry: bool, remove_run_config_file: bool):
+    from tasdmc import pipeline
+
     config.RunConfig.load(run_config_filename)
     fileio.prepare_run_dir()
     if remove_run_config_file:
@@ -49,6 +51,8 @@ def local_run_cmd(run_config_filename: str, dry: bool, remove_run_config_file: b
 @nodes_config_option('nodes_config_filename')
 @error_catching
 def distributed_run_cmd(run_config_filename: str, nodes_config_filename: str, dry: bool):
+    from tasdmc import nodes
+
     config.RunConfig.load(run_config_filename)
     config.NodesConfig.load(nodes_config_filename)
     nodes.check_all()
@@ -2,9 +2,8 @@ import click
 import sys
 import traceback
 
-from tasdmc import pipeline, config, fileio
+from tasdmc import config, fileio
 from tasdmc.utils import user_confirmation
-from tasdmc.system import run_in_background
 
 
 def echo_running_msg():
@@ -12,6 +11,9 @@ def echo_running_msg():
 
 
 def run_simulation_in_background():
+    from tasdmc import pipeline
+    from tasdmc.system import run_in_background
+
     run_in_background(pipeline.run_simulation)
     echo_running_msg()
 
@@ -17,9 +17,6 @@ class DataFiles:
     atmos = config.Global.data_dir / 'atmos.bin'
 
 
-config.Global.runs_dir.mkdir(exist_ok=True, parents=True)
-
-
 def run_dir(run_name: Optional[str] = None) -> Path:
     run_name: str = run_name or config.get_key('name')
     return config.Global.runs_dir / run_name
@@ -119,6 +116,14 @@ def saved_nodes_config_file(run_name: Optional[str] = None):
     return run_dir(run_name) / 'nodes.yaml'
 
 
+def corsika_cards_manifest():
+    return corsika_input_files_dir() / 'cards_manifest.tsv'
+
+
+def results_index_dir():
+    return run_dir() / '_results_index'
+
+
 # log files
 
 
@@ -160,6 +165,7 @@ def prepare_run_dir(continuing: bool = False, create_only: bool = False):
         assert rd.exists(), "Can't continue with non-existent run dir"
     else:
         try:
+            rd.parent.mkdir(exist_ok=True, parents=True)
             rd.mkdir()
             click.echo(f"Run directory created: {rd.absolute()}")
         except FileExistsError as fee:
@@ -220,6 +226,8 @@ def get_config_paths(run_name: str) -> Tuple[Path, Path]:
 
 
 def get_all_run_names() -> List[str]:
+    if not config.Global.runs_dir.exists():
+        return []
     return [rd.name for rd in config.Global.runs_dir.iterdir()]
 
 
@@ -1,12 +1,10 @@
 from __future__ import annotations
-from multiprocessing.sharedctypes import Value
 
 import click
 import re
 import os
 from collections import defaultdict
 from datetime import datetime, timedelta
-import plotext as plt
 import shutil
 from dataclasses import dataclass, asdict
 import json
@@ -18,8 +16,6 @@ import math
 from typing import List, Optional, TypeVar, Type, Dict, Set
 
 from tasdmc import fileio
-from tasdmc.steps.corsika_cards_generation import generate_corsika_cards
-from tasdmc.pipeline import get_steps_queue
 from tasdmc.logs.step_progress import EventType, PipelineStepProgress
 from tasdmc.logs.utils import str2datetime, datetime2str, timedelta2str
 
@@ -80,6 +76,7 @@ class PipelineProgress(LogData):
     failed: int
     running_now_count: Dict[str, int]
     step_order: List[str]
+    eta_seconds: Optional[float] = None  # expected time until all pipelines are finished, None if unknown
 
     def __add__(self, other: PipelineProgress) -> PipelineProgress:
         if not isinstance(other, PipelineProgress):
@@ -95,15 +92,29 @@ class PipelineProgress(LogData):
             },
             step_order=self.step_order,
             node_name=(f"{self.node_name} + {other.node_name}") if self.node_name and other.node_name else None,
+            # nodes run in parallel, so the campaign is finished when the slowest node is
+            eta_seconds=(
+                max(self.eta_seconds, other.eta_seconds)
+                if self.eta_seconds is not None and other.eta_seconds is not None
+                else None
+            ),
         )
 
     @classmethod
     def parse_from_log(cls) -> PipelineProgress:
+        from tasdmc.steps.corsika_cards_generation import generate_corsika_cards
+        from tasdmc.pipeline import get_steps_queue
+        from tasdmc.system.resources import used_processes
+        from tasdmc.logs.step_durations import StepDurationModel
+
         failed_pipelines: Set[str] = set()
         started_pipelines: Set[str] = set()
         last_completed_step_by_pipeline: Dict[str, str] = dict()
         last_started_step_by_pipeline: Dict[str, str] = dict()
+        finished_steps_count: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        step_durations = StepDurationModel.from_previous_logs()
         for step_progress in PipelineStepProgress.load():
+            step_durations.update(step_progress)
             pipeline_id = step_progress.pipeline_id
             started_pipelines.add(pipeline_id)
             if step_progress.event_type is EventType.FAILED:
@@ -112,8 +123,10 @@ class PipelineProgress(LogData):
                 last_started_step_by_pipeline[pipeline_id] = step_progress.step_name
             elif step_progress.event_type in {EventType.COMPLETED, EventType.SKIPPED}:
                 last_completed_step_by_pipeline[pipeline_id] = step_progress.step_name
+                finished_steps_count[pipeline_id][step_progress.step_name] += 1
 
-        n_total = len(generate_corsika_cards(logging=False, dry=True))
+        corsika_card_paths = generate_corsika_cards(logging=False, dry=True)
+        n_total = len(corsika_card_paths)
         n_failed = len(failed_pipelines)
         n_pending = n_total - len(started_pipelines)
         n_running_and_completed = len(started_pipelines.difference(failed_pipelines))
@@ -156,6 +169,14 @@ class PipelineProgress(LogData):
                 running_now_step = last_started_step
             n_running_by_step[running_now_step] += 1
 
+        remaining_seconds = step_durations.estimate_remaining_seconds(
+            step_names=step_names_in_order,
+            # pipeline ID is CORSIKA card file name stem, see CorsikaStep
+            unfinished_pipeline_ids={card.stem for card in corsika_card_paths} - completed_pipelines - failed_pipelines,
+            finished_steps_count=finished_steps_count,
+            now=datetime.utcnow(),
+        )
+
         return PipelineProgress(
             completed=n_completed,
             running=n_running,
@@ -164,6 +185,7 @@ class PipelineProgress(LogData):
             running_now_count=n_running_by_step,
             step_order=step_names_in_order,
             node_name=None,
+            eta_seconds=remaining_seconds / used_processes() if remaining_seconds is not None else None,
         )
 
     def print(self, with_node_name: bool = False, full_color: bool = True):
@@ -248,6 +270,11 @@ class PipelineProgress(LogData):
                         click.style("   ■", fg=step_color) + f" {step_label} ({step_count} / {sum(step_counts)})"
                     )
 
+        if self.eta_seconds is not None:
+            click.echo(f"\nEstimated time left: {timedelta2str(timedelta(seconds=self.eta_seconds))}")
+        elif self.running + self.pending > 0:
+            click.echo("\nEstimated time left: unknown (not enough steps completed yet)")
+
 
 @dataclass
 class SystemResourcesTimeline(LogData):
@@ -406,6 +433,8 @@ class SystemResourcesTimeline(LogData):
         return min(120, terminal_width), min(40, terminal_height)
 
     def display(self, absolute_x_axis: bool, with_node_name: bool = False):
+        import plotext as plt
+
         if with_node_name:
             self.echo_node_name()
         click.echo(f"System resources (as last monitored at {datetime2str(self.timestamps[-1])}):")
@@ -485,6 +514,8 @@ class SystemResourcesTimeline(LogData):
 
     @classmethod
     def display_multiple(cls, timelines: List[SystemResourcesTimeline]):
+        import plotext as plt
+
         all_timestamps_epoch = set(
             int(ts.timestamp()) for ts in chain.from_iterable([tl.timestamps for tl in timelines])
         )
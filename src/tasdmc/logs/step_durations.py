@@ -0,0 +1,146 @@
+"""Step duration model: mean step run time by step name and primary energy, fitted from pipelines.log.
+Used to estimate time left for the run and may be used to order steps by expected cost.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from tasdmc import fileio
+from tasdmc.logs.step_progress import EventType, PipelineStepProgress
+
+ANY_ENERGY = 'any'  # energy key for pipelines with unknown primary energy
+
+
+def energy_key(pipeline_id: str) -> str:
+    from tasdmc.steps.corsika_cards_generation import log10E_from_corsika_event_name
+
+    try:
+        return f"{log10E_from_corsika_event_name(pipeline_id):.1f}"
+    except ValueError:
+        return ANY_ENERGY
+
+
+@dataclass
+class DurationStats:
+    n: int = 0
+    mean: float = 0.0  # seconds
+
+    def add(self, duration: float):
+        self.n += 1
+        self.mean += (duration - self.mean) / self.n
+
+
+class StepDurationModel:
+    """Mean durations by step name and energy key (see energy_key)"""
+
+    def __init__(self):
+        self.stats: Dict[str, Dict[str, DurationStats]] = dict()
+        # step id -> pipeline id, step name, start timestamp
+        self.started_at: Dict[str, Tuple[str, str, float]] = dict()
+
+    def update(self, step_progress: PipelineStepProgress):
+        if step_progress.event_type is EventType.STARTED:
+            self.started_at[step_progress.step_id] = (
+                step_progress.pipeline_id,
+                step_progress.step_name,
+                step_progress.timestamp.timestamp(),
+            )
+        elif step_progress.event_type is EventType.COMPLETED:
+            started = self.started_at.pop(step_progress.step_id, None)
+            if started is None:
+                return
+            duration = step_progress.timestamp.timestamp() - started[2]
+            step_stats = self.stats.setdefault(step_progress.step_name, dict())
+            step_stats.setdefault(energy_key(step_progress.pipeline_id), DurationStats()).add(duration)
+        elif step_progress.event_type is EventType.FAILED:
+            self.started_at.pop(step_progress.step_id, None)
+
+    def update_from_log(self, log: Path, from_position: int = 0) -> int:
+        """Returns position in the log after the last complete line"""
+        if not log.exists():
+            return from_position
+        with open(log, 'rb') as f:
+            f.seek(from_position)
+            for line in f:
+                if not line.endswith(b'\n'):  # partially written line, will be read on the next update
+                    break
+                from_position += len(line)
+                step_progress = PipelineStepProgress.parse_line(line.decode('utf-8'))
+                if step_progress is not None:
+                    self.update(step_progress)
+        return from_position
+
+    def expected_duration(self, step_name: str, pipeline_id: str) -> Optional[float]:
+        """Expected step run time in seconds; falls back to the nearest known energy for the same step"""
+        step_stats = self.stats.get(step_name)
+        if not step_stats:
+            return None
+        energy = energy_key(pipeline_id)
+        if energy in step_stats:
+            return step_stats[energy].mean
+        known_energies = [float(e) for e in step_stats.keys() if e != ANY_ENERGY]
+        if energy == ANY_ENERGY or not known_energies:
+            total = sum(s.n for s in step_stats.values())
+            return sum(s.mean * s.n for s in step_stats.values()) / total
+        nearest_energy = min(known_energies, key=lambda e: abs(e - float(energy)))
+        return step_stats[f"{nearest_energy:.1f}"].mean
+
+    def step_cost(self, step: 'PipelineStep', default: float = 0.0) -> float:  # type: ignore
+        """Expected duration of the step, may be used for cost-based steps ordering"""
+        expected = self.expected_duration(step.name, step.pipeline_id)
+        return default if expected is None else expected
+
+    def estimate_remaining_seconds(
+        self,
+        step_names: List[str],
+        unfinished_pipeline_ids: Iterable[str],
+        finished_steps_count: Dict[str, Dict[str, int]],
+        now: datetime,
+    ) -> Optional[float]:
+        """Total expected run time of not yet finished steps, i.e. in one process; None if some step can't be
+        estimated
+
+        Args:
+            step_names (list of str): names of steps in a pipeline
+            unfinished_pipeline_ids (iterable of str): IDs of running and pending pipelines
+            finished_steps_count (dict): pipeline ID -> step name -> number of completed or skipped steps; number
+                                         of steps of each name in a pipeline is taken as the maximum over pipelines
+            now (datetime): current time, to account for steps that are running now
+        """
+        steps_per_pipeline = {
+            step_name: max([1] + [counts.get(step_name, 0) for counts in finished_steps_count.values()])
+            for step_name in step_names
+        }
+        unfinished_pipeline_ids = set(unfinished_pipeline_ids)
+        remaining = 0.0
+        for pipeline_id in unfinished_pipeline_ids:
+            finished_count = finished_steps_count.get(pipeline_id, dict())
+            for step_name in step_names:
+                n_left = steps_per_pipeline[step_name] - finished_count.get(step_name, 0)
+                if n_left <= 0:
+                    continue
+                expected = self.expected_duration(step_name, pipeline_id)
+                if expected is None:
+                    return None
+                remaining += n_left * expected
+        for pipeline_id, step_name, started_at in self.started_at.values():
+            if pipeline_id not in unfinished_pipeline_ids:
+                continue
+            expected = self.expected_duration(step_name, pipeline_id)
+            if expected is not None:
+                remaining -= min(now.timestamp() - started_at, expected)
+        return max(remaining, 0.0)
+
+    @classmethod
+    def from_previous_logs(cls) -> StepDurationModel:
+        """Model fitted on pipelines logs of the previous runs, to be updated with the current log events"""
+        model = StepDurationModel()
+        for previous_logs_dir in fileio.get_previous_logs_dirs():
+            model.update_from_log(previous_logs_dir / fileio.pipelines_log().name)
+        model.started_at.clear()  # steps running before the restart were interrupted
+        return model
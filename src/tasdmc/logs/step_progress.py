@@ -44,32 +44,36 @@ class PipelineStepProgress:
         with open(fileio.pipelines_log(), 'a') as f:
             f.write(' '.join(export_fields) + '\n')
 
+    @classmethod
+    def parse_line(cls, line: str) -> Optional[PipelineStepProgress]:
+        try:
+            datetime_str, pipeline_id, step_name, step_id, event_type_str, *rest = line.rstrip('\n').split(' ')
+        except ValueError:
+            return None
+        rest = ' '.join(rest)
+        event_type = EventType(event_type_str)
+        if event_type is EventType.COMPLETED and rest:
+            value = float(rest)
+        elif event_type is EventType.FAILED and rest:
+            value = rest
+        else:
+            value = None
+        return PipelineStepProgress(
+            timestamp=str2datetime(datetime_str),
+            pipeline_id=pipeline_id,
+            step_name=step_name,
+            step_id=step_id,
+            event_type=event_type,
+            value=value,
+        )
+
     @classmethod
     def load(cls) -> List[PipelineStepProgress]:
         step_progresses = []
         for line in fileio.pipelines_log().read_text().splitlines():
-            try:
-                datetime_str, pipeline_id, step_name, step_id, event_type_str, *rest = line.split(' ')
-            except ValueError:
-                continue
-            rest = ' '.join(rest)
-            event_type = EventType(event_type_str)
-            if event_type is EventType.COMPLETED and rest:
-                value = float(rest)
-            elif event_type is EventType.FAILED and rest:
-                value = rest
-            else:
-                value = None
-            step_progresses.append(
-                PipelineStepProgress(
-                    timestamp=str2datetime(datetime_str),
-                    pipeline_id=pipeline_id,
-                    step_name=step_name,
-                    step_id=step_id,
-                    event_type=event_type,
-                    value=value,
-                )
-            )
+            step_progress = cls.parse_line(line)
+            if step_progress is not None:
+                step_progresses.append(step_progress)
         return step_progresses
 
     @classmethod
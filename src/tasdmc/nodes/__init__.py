@@ -1,14 +1,18 @@
 import click
 from concurrent.futures import ThreadPoolExecutor
+import shlex
 import time
 
-from typing import Callable, Generator, List
+from typing import TYPE_CHECKING, Callable, Generator, Iterable, List
 
 from tasdmc import config, fileio
 from tasdmc.utils import user_confirmation
 from tasdmc.logs.display import PipelineProgress, SystemResourcesTimeline
 from .node_executor import NodeExecutor, NodeExecutorResult, node_executors_from_config
 
+if TYPE_CHECKING:
+    from tasdmc.results_index import QueryResult
+
 
 def _echo_ok():
     click.secho("OK", fg='green')
@@ -157,6 +161,37 @@ def collect_progress_data() -> List[PipelineProgress]:
     return plps
 
 
+def collect_query_results(where: Iterable[str], columns: List[str], log10E_min: Iterable[float]) -> List["QueryResult"]:
+    from tasdmc.results_index import QueryResult  # numpy and steps are not needed by other node commands
+
+    query_options = " ".join(
+        [f"--where {shlex.quote(w)}" for w in where]
+        + [f"--columns {shlex.quote(','.join(columns))}"]
+        + [f"--log10E-min {e}" for e in log10E_min]
+    )
+
+    def collect(ex: NodeExecutor) -> NodeExecutorResult:
+        return NodeExecutorResult.from_invoke_result(
+            ex.run(f"tasdmc results query {ex.node_run_name} {query_options} --dump-json"), ex
+        )
+
+    click.echo(f"Querying results on nodes...", err=True)
+    results: List[QueryResult] = []
+    some_failed = False
+    for res in _run_on_nodes_in_parallel(collect):
+        click.secho(f"{res.node_exec_name}: ", bold=True, nl=False, err=True)
+        if res.success:
+            click.secho("OK", fg='green', err=True)
+            results.append(QueryResult.load(res.data))
+        else:
+            click.secho("FAIL", fg='red', err=True)
+            click.echo(res.msg, err=True)
+            some_failed = True
+    if some_failed:
+        click.secho("Error querying results on some nodes, results are incomplete", fg="red", err=True)
+    return results
+
+
 def print_statuses(n_last_messages: int, display_processes: bool):
     click.echo(f"Checking nodes' statuses...")
 
@@ -8,7 +8,7 @@ from itertools import chain
 from typing import List, Union
 
 from tasdmc import config, fileio
-from tasdmc.system import monitor, resources, processes, run_in_background
+from tasdmc.system import resources
 from tasdmc.steps import (
     CorsikaStep,
     ParticleFileSplittingStep,
@@ -18,14 +18,24 @@ from tasdmc.steps import (
     Corsika2GeantParallelMergeStep,
     TothrowGenerationStep,
     EventsGenerationStep,
+    EventsGenerationMergeStep,
     SpectralSamplingStep,
     PipelineStep,
     ReconstructionStep,
     TawikiDumpStep,
 )
-from tasdmc.steps.aggregation import TawikiDumpsMergeStep, ReconstructedEventsArchivingStep
+from tasdmc.steps.aggregation import (
+    TawikiDumpsMergeStep,
+    ReconstructedEventsArchivingStep,
+    ReconstructedEventsChunkArchivingStep,
+    ReconstructedEventsColumnsExportStep,
+)
+from tasdmc.steps.aggregation.reconstructed_events import incremental_archiving_from_config
+from tasdmc.steps.aggregation.reconstructed_events_columns import export_columns_from_config
+from tasdmc.steps.processing.event_generation import epoch_group_size_from_config
 from tasdmc.steps.corsika_cards_generation import generate_corsika_cards
 from tasdmc.steps.base.step_status_shared import set_step_statuses_array
+from tasdmc.steps.base.process_slots_shared import ProcessSlots, set_process_slots
 from tasdmc.utils import batches
 
 
@@ -51,11 +61,17 @@ def get_steps_queue(
     """
     all_corsika_steps = CorsikaStep.from_corsika_cards(corsika_card_paths)
     queue: List[PipelineStep] = []
-    
+
     legacy_c2g_step = bool(config.get_key("pipeline.legacy_corsika2geant", default=True))
+    # with epoch groups, event generation for each shower is split into several steps followed by a merge step
+    split_event_generation = epoch_group_size_from_config() > 0
 
     archive_reconstructed_events = bool(config.get_key("pipeline.archive_all_reconstructed_events", default=True))
     reconstruction_steps_by_log10Emin = defaultdict(list)
+    # with incremental archiving, reconstructed events are archived in chunks right after each batch
+    archive_incrementally = archive_reconstructed_events and incremental_archiving_from_config()
+    archive_chunk_steps_by_log10Emin = defaultdict(list)
+    export_reconstructed_events_columns = export_columns_from_config()
 
     add_tawiki_steps = bool(config.get_key("pipeline.produce_tawiki_dumps", default=False))
     tawiki_dump_steps_by_log10Emin = defaultdict(list)
@@ -82,23 +98,41 @@ def get_steps_queue(
                 corsika2geant = Corsika2GeantStep.from_dethinning_steps(dethinning_steps)
             else:
                 # each dethinning step is immediately followed by c2g_parallel_process
-                c2g_process_steps = []
-                for dethinning_step in dethinning_steps:
-                    c2g_process = Corsika2GeantParallelProcessStep.from_dethinning_step(dethinning_step)
-                    c2g_process_steps.append(c2g_process)
+                c2g_process_steps = [
+                    Corsika2GeantParallelProcessStep.from_dethinning_step(dethinning_step)
+                    for dethinning_step in dethinning_steps
+                ]
+                merge_tree = Corsika2GeantParallelMergeStep.with_merge_tree_from_c2g_parallel_process_steps(
+                    c2g_process_steps
+                )
+                partial_merge_steps, corsika2geant = merge_tree
+                queued_step_ids = set()
+                for dethinning_step, c2g_process in zip(dethinning_steps, c2g_process_steps):
                     queue.append(dethinning_step)
                     queue.append(c2g_process)
-                corsika2geant = Corsika2GeantParallelMergeStep.from_c2g_parallel_process_steps(c2g_process_steps)
+                    queued_step_ids.add(id(c2g_process))
+                    # intermediate merges are queued as soon as all their inputs are, so that they start early;
+                    # merge steps are in level order, so a single pass also picks up newly ready upper levels
+                    for partial_merge in partial_merge_steps:
+                        if id(partial_merge) not in queued_step_ids and all(
+                            id(s) in queued_step_ids for s in partial_merge.previous_steps
+                        ):
+                            queue.append(partial_merge)
+                            queued_step_ids.add(id(partial_merge))
             queue.append(corsika2geant)
             c2g_steps_batch.append(corsika2geant)
         # after c2g, no cleanup is done between steps so we can launch them in batches again to avoid
         # pipeline jam (later steps sit in queue and just wait for the previous ones)
         tothrow_steps_batch = [TothrowGenerationStep.from_corsika2geant(c2g) for c2g in c2g_steps_batch]
         queue.extend(tothrow_steps_batch)
-        event_gen_steps_batch = [
-            EventsGenerationStep.from_corsika2geant_with_tothrow(c2g, tothrow)
-            for (c2g, tothrow) in zip(c2g_steps_batch, tothrow_steps_batch)
-        ]
+        event_gen_steps_batch: List[Union[EventsGenerationStep, EventsGenerationMergeStep]] = []
+        for c2g, tothrow in zip(c2g_steps_batch, tothrow_steps_batch):
+            if split_event_generation:
+                epoch_group_steps, event_gen = EventsGenerationMergeStep.with_epoch_group_steps(c2g, tothrow)
+                queue.extend(epoch_group_steps)
+            else:
+                event_gen = EventsGenerationStep.from_corsika2geant_with_tothrow(c2g, tothrow)
+            event_gen_steps_batch.append(event_gen)
         queue.extend(event_gen_steps_batch)
         # larger batch: original batch size * number of minimal energies to sample
         spectral_sampling_batch = list(
@@ -114,20 +148,34 @@ def get_steps_queue(
         ]
         queue.extend(reconstruction_steps_batch)
 
+        reconstruction_steps_batch_by_log10Emin = defaultdict(list)
         for reco in reconstruction_steps_batch:
             reconstruction_steps_by_log10Emin[reco.input_.log10E_min].append(reco)
+            reconstruction_steps_batch_by_log10Emin[reco.input_.log10E_min].append(reco)
             if add_tawiki_steps:
                 tawiki_dump_step = TawikiDumpStep.from_reconstruction_step(reco)
                 queue.append(tawiki_dump_step)
                 tawiki_dump_steps_by_log10Emin[reco.input_.log10E_min].append(tawiki_dump_step)
 
+        if include_aggregation_steps and archive_incrementally:
+            for log10E_min, reco_steps in reconstruction_steps_batch_by_log10Emin.items():
+                chunk_step = ReconstructedEventsChunkArchivingStep.from_reconstruction_steps(reco_steps, log10E_min)
+                queue.append(chunk_step)
+                archive_chunk_steps_by_log10Emin[log10E_min].append(chunk_step)
+
     if include_aggregation_steps:
         if add_tawiki_steps:
             for log10E_min, tawiki_dump_steps in tawiki_dump_steps_by_log10Emin.items():
                 queue.append(TawikiDumpsMergeStep.from_tawiki_dump_steps(tawiki_dump_steps, log10E_min))
-        if archive_reconstructed_events:
+        if archive_incrementally:
+            for log10E_min, chunk_steps in archive_chunk_steps_by_log10Emin.items():
+                queue.append(ReconstructedEventsArchivingStep.from_chunk_archiving_steps(chunk_steps, log10E_min))
+        elif archive_reconstructed_events:
             for log10E_min, reco_steps in reconstruction_steps_by_log10Emin.items():
                 queue.append(ReconstructedEventsArchivingStep.from_reconstruction_steps(reco_steps, log10E_min))
+        if export_reconstructed_events_columns:
+            for log10E_min, reco_steps in reconstruction_steps_by_log10Emin.items():
+                queue.append(ReconstructedEventsColumnsExportStep.from_reconstruction_steps(reco_steps, log10E_min))
     return queue
 
 
@@ -140,6 +188,8 @@ def with_pipelines_mask(steps: List[PipelineStep]) -> List[PipelineStep]:
 
 
 def run_simulation(dry: bool = False):
+    from tasdmc.system import monitor, processes, run_in_background
+
     processes.set_process_title("tasdmc main")
     processes.setup_safe_abort_signal_listener()
     fileio.save_main_process_pid()
@@ -156,15 +206,17 @@ def run_simulation(dry: bool = False):
     for idx, step in enumerate(steps):
         step.set_index(idx)
     shared_step_statuses_array = mp.Array(c_int8, len(steps), lock=True)  # initially all zeros = steps pending
+    shared_process_slots = ProcessSlots(resources.used_processes())
 
-    def init_worker_process(shared_array):
+    def init_worker_process(shared_array, process_slots):
         processes.set_process_title("tasdmc worker")
         set_step_statuses_array(shared_array)
+        set_process_slots(process_slots)
 
     with ProcessPoolExecutor(
         max_workers=resources.used_processes(),
-        initializer=init_worker_process,  # shared array is sent to each worker process here
-        initargs=(shared_step_statuses_array,),
+        initializer=init_worker_process,  # shared objects are sent to each worker process here
+        initargs=(shared_step_statuses_array, shared_process_slots),
     ) as executor:
         futures_queue: List[Future] = []
         for step in steps:
@@ -0,0 +1,304 @@
+"""Per-run index of columnar reconstruction results (see steps/aggregation/reconstructed_events_columns.py)
+for fast queries: each column of each exported .npz is stored as a separate .npy file, memory mapped on query,
+and split into fixed-size chunks with min/max statistics, so that only chunks that may contain matching events
+are read and only for requested columns
+"""
+
+from __future__ import annotations
+
+import json
+import operator
+import os
+import re
+from dataclasses import dataclass, asdict
+from pathlib import Path
+
+import numpy as np
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+from tasdmc import fileio
+from tasdmc.steps.aggregation.reconstructed_events_columns import FILE_ID_COLUMN, load_columns
+
+CHUNK_SIZE = 2**16  # events
+
+_INDEX_FILE_NAME = "index.json"
+_COLUMNS_FILE_PATTERN = re.compile(r"reconstructed_events\.(?P<set_name>\d+)\.npz")
+
+_OPERATORS: Dict[str, Callable[[np.ndarray, float], np.ndarray]] = {
+    "<=": operator.le,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    ">": operator.gt,
+}
+
+
+@dataclass
+class Condition:
+    column: str
+    op: str
+    value: float
+
+    @classmethod
+    def parse(cls, expr: str) -> Condition:
+        # operators are ordered so that two-char ones are matched first
+        match = re.fullmatch(
+            r"\s*(?P<column>\w+)\s*(?P<op>" + "|".join(map(re.escape, _OPERATORS)) + r")\s*(?P<value>\S+)\s*", expr
+        )
+        if match is None:
+            raise ValueError(f"Can't parse condition {expr!r}, expected '<column> <op> <value>', e.g. 'energy > 10'")
+        try:
+            value = float(match.group("value"))
+        except ValueError:
+            raise ValueError(f"Condition value must be a number, got {match.group('value')!r} in {expr!r}")
+        return Condition(column=match.group("column"), op=match.group("op"), value=value)
+
+    def mask(self, values: np.ndarray) -> np.ndarray:
+        return _OPERATORS[self.op](values, self.value)
+
+    def may_match(self, min_: Optional[float], max_: Optional[float]) -> bool:
+        """Whether a chunk with given min/max statistics may contain matching values"""
+        if min_ is None or max_ is None:  # no statistics, e.g. all NaNs
+            return self.op == "!="
+        if self.op == "<":
+            return min_ < self.value
+        if self.op == "<=":
+            return min_ <= self.value
+        if self.op == ">":
+            return max_ > self.value
+        if self.op == ">=":
+            return max_ >= self.value
+        if self.op == "==":
+            return min_ <= self.value <= max_
+        return not (min_ == max_ == self.value)
+
+
+def parse_conditions(where: List[str]) -> List[Condition]:
+    """Each expression may contain several conditions joined with 'and'"""
+    return [
+        Condition.parse(condition_expr)
+        for expr in where
+        for condition_expr in re.split(r"\s+and\s+", expr.strip(), flags=re.IGNORECASE)
+        if condition_expr
+    ]
+
+
+@dataclass
+class ChunkStats:
+    min: Dict[str, Optional[float]]
+    max: Dict[str, Optional[float]]
+
+
+@dataclass
+class IndexedSet:
+    """Results for one minimal energy, indexed from a single .npz file"""
+
+    name: str
+    source: str
+    source_size: int
+    source_mtime_ns: int
+    n_events: int
+    columns: Dict[str, str]  # name -> dtype
+    chunks: List[ChunkStats]
+
+    def column_file(self, index_dir: Path, column: str) -> Path:
+        return index_dir / f"{self.name}.{column}.npy"
+
+    def files_file(self, index_dir: Path) -> Path:
+        return index_dir / f"{self.name}.files.npy"
+
+    def is_up_to_date(self, source: Path) -> bool:
+        stat = source.stat()
+        return (self.source_size, self.source_mtime_ns) == (stat.st_size, stat.st_mtime_ns)
+
+    @classmethod
+    def build(cls, source: Path, name: str, index_dir: Path) -> IndexedSet:
+        stat = source.stat()
+        columns, files = load_columns(source)
+        n_events = len(columns[FILE_ID_COLUMN])
+        chunks = [ChunkStats(min=dict(), max=dict()) for _ in range(0, n_events, CHUNK_SIZE)]
+        for column, values in columns.items():
+            for chunk, start in zip(chunks, range(0, n_events, CHUNK_SIZE)):
+                chunk.min[column], chunk.max[column] = _min_max(values[start : start + CHUNK_SIZE])
+        indexed_set = IndexedSet(
+            name=name,
+            source=source.name,
+            source_size=stat.st_size,
+            source_mtime_ns=stat.st_mtime_ns,
+            n_events=n_events,
+            columns={column: values.dtype.str for column, values in columns.items()},
+            chunks=chunks,
+        )
+        for column, values in columns.items():
+            _save_atomically(indexed_set.column_file(index_dir, column), values)
+        _save_atomically(indexed_set.files_file(index_dir), files)
+        return indexed_set
+
+    @classmethod
+    def load(cls, data: dict) -> IndexedSet:
+        data["chunks"] = [ChunkStats(**chunk) for chunk in data["chunks"]]
+        return IndexedSet(**data)
+
+
+def _min_max(values: np.ndarray) -> Tuple[Optional[float], Optional[float]]:
+    if values.dtype.kind == "f":
+        values = values[~np.isnan(values)]
+    if values.size == 0:
+        return None, None
+    return values.min().item(), values.max().item()
+
+
+def _save_atomically(path: Path, values: np.ndarray):
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:  # file object prevents numpy from appending .npy extension
+        np.save(f, values)
+    os.replace(tmp_path, path)
+
+
+@dataclass
+class QueryResult:
+    columns: Dict[str, np.ndarray]
+    chunks_total: int = 0
+    chunks_read: int = 0
+
+    @property
+    def n_events(self) -> int:
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def dump(self) -> str:
+        return json.dumps(
+            {
+                "columns": {column: values.tolist() for column, values in self.columns.items()},
+                "chunks_total": self.chunks_total,
+                "chunks_read": self.chunks_read,
+            }
+        )
+
+    @classmethod
+    def load(cls, dump: str) -> QueryResult:
+        data = json.loads(dump)
+        return QueryResult(
+            columns={column: np.array(values) for column, values in data["columns"].items()},
+            chunks_total=data["chunks_total"],
+            chunks_read=data["chunks_read"],
+        )
+
+    def __add__(self, other: QueryResult) -> QueryResult:
+        if not isinstance(other, QueryResult):
+            return NotImplemented
+        return QueryResult(
+            columns={column: _concatenate(values, other.columns[column]) for column, values in self.columns.items()},
+            chunks_total=self.chunks_total + other.chunks_total,
+            chunks_read=self.chunks_read + other.chunks_read,
+        )
+
+
+def _concatenate(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    # empty placeholders are float, so they are skipped to keep dtypes of string columns
+    if first.size == 0:
+        return second
+    if second.size == 0:
+        return first
+    return np.concatenate((first, second))
+
+
+class ResultsIndex:
+    """Index of all columnar results in a directory (by default, run's final directory); index is stored
+    in a separate directory and rebuilt for each results file changed since the last indexing"""
+
+    def __init__(self, results_dir: Optional[Path] = None, index_dir: Optional[Path] = None):
+        self.results_dir = results_dir or fileio.final_dir()
+        self.index_dir = index_dir or fileio.results_index_dir()
+        self.sets: Dict[str, IndexedSet] = dict()
+
+    @property
+    def index_file(self) -> Path:
+        return self.index_dir / _INDEX_FILE_NAME
+
+    def update(self) -> ResultsIndex:
+        if self.index_file.exists():
+            saved = json.loads(self.index_file.read_text())
+            self.sets = {name: IndexedSet.load(set_data) for name, set_data in saved.items()}
+        sources: Dict[str, Path] = dict()
+        for source in self.results_dir.glob("reconstructed_events.*.npz"):
+            match = _COLUMNS_FILE_PATTERN.fullmatch(source.name)
+            if match is not None:
+                sources[match.group("set_name")] = source
+        updated = set(self.sets) != set(sources)
+        self.index_dir.mkdir(exist_ok=True)
+        for name in set(self.sets) - set(sources):
+            removed_set = self.sets.pop(name)
+            for column in removed_set.columns:
+                removed_set.column_file(self.index_dir, column).unlink(missing_ok=True)
+            removed_set.files_file(self.index_dir).unlink(missing_ok=True)
+        for name, source in sources.items():
+            indexed_set = self.sets.get(name)
+            if indexed_set is None or not indexed_set.is_up_to_date(source):
+                self.sets[name] = IndexedSet.build(source, name, self.index_dir)
+                updated = True
+        if updated:
+            tmp_index_file = self.index_file.with_name(self.index_file.name + ".tmp")
+            tmp_index_file.write_text(json.dumps({name: asdict(s) for name, s in sorted(self.sets.items())}, indent=1))
+            os.replace(tmp_index_file, self.index_file)
+        return self
+
+    def query(
+        self, conditions: List[Condition], columns: List[str], set_names: Optional[List[str]] = None
+    ) -> QueryResult:
+        """Select requested columns of events matching all conditions; besides indexed columns, 'set' (minimal
+        energy set name) and 'file' (source reconstructed events file name) may be requested"""
+        if set_names is None:
+            set_names = sorted(self.sets)
+        for name in set_names:
+            if name not in self.sets:
+                raise ValueError(f"No results for {name!r}, available are: {', '.join(sorted(self.sets)) or 'none'}")
+        indexed_columns = {column for name in set_names for column in self.sets[name].columns}
+        for column in [c.column for c in conditions]:
+            if column not in indexed_columns:
+                raise ValueError(f"Unknown column {column!r}, available are: {', '.join(sorted(indexed_columns))}")
+        for column in columns:
+            if column not in indexed_columns | {"set", "file"}:
+                raise ValueError(
+                    f"Unknown column {column!r}, available are: {', '.join(sorted(indexed_columns | {'set', 'file'}))}"
+                )
+        result = QueryResult(columns={column: np.empty(0) for column in columns})
+        for name in set_names:
+            result += self._query_set(self.sets[name], conditions, columns)
+        return result
+
+    def _query_set(self, indexed_set: IndexedSet, conditions: List[Condition], columns: List[str]) -> QueryResult:
+        mapped: Dict[str, np.ndarray] = dict()
+
+        def column_values(column: str) -> np.ndarray:
+            if column not in mapped:
+                mapped[column] = np.load(indexed_set.column_file(self.index_dir, column), mmap_mode="r")
+            return mapped[column]
+
+        selected: Dict[str, List[np.ndarray]] = {column: [] for column in columns}
+        chunks_read = 0
+        for i_chunk, chunk in enumerate(indexed_set.chunks):
+            if not all(c.may_match(chunk.min.get(c.column), chunk.max.get(c.column)) for c in conditions):
+                continue
+            chunks_read += 1
+            chunk_slice = slice(i_chunk * CHUNK_SIZE, min((i_chunk + 1) * CHUNK_SIZE, indexed_set.n_events))
+            mask = np.ones(chunk_slice.stop - chunk_slice.start, dtype=bool)
+            for c in conditions:
+                mask &= c.mask(column_values(c.column)[chunk_slice])
+            if not mask.any():
+                continue
+            for column in columns:
+                if column == "set":
+                    selected[column].append(np.full(np.count_nonzero(mask), indexed_set.name))
+                elif column == "file":
+                    if "files" not in mapped:
+                        mapped["files"] = np.load(indexed_set.files_file(self.index_dir))
+                    selected[column].append(mapped["files"][column_values(FILE_ID_COLUMN)[chunk_slice][mask]])
+                else:
+                    selected[column].append(np.array(column_values(column)[chunk_slice][mask]))
+        return QueryResult(
+            columns={column: np.concatenate(arrays) if arrays else np.empty(0) for column, arrays in selected.items()},
+            chunks_total=len(indexed_set.chunks),
+            chunks_read=chunks_read,
+        )
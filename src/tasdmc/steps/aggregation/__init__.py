@@ -1,8 +1,11 @@
 from .tawiki_dumps import TawikiDumpsMergeStep
-from .reconstructed_events import ReconstructedEventsArchivingStep
+from .reconstructed_events import ReconstructedEventsArchivingStep, ReconstructedEventsChunkArchivingStep
+from .reconstructed_events_columns import ReconstructedEventsColumnsExportStep
 
 
 __all__ = [
     "TawikiDumpsMergeStep",
     "ReconstructedEventsArchivingStep",
+    "ReconstructedEventsChunkArchivingStep",
+    "ReconstructedEventsColumnsExportStep",
 ]
@@ -2,15 +2,17 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
+import gzip
+import shutil
 import tarfile
 
-from tasdmc import fileio
+from tasdmc import config, fileio
 from tasdmc.steps.base.step import PipelineStep
-from tasdmc.steps.base.files import Files, files_dataclass
+from tasdmc.steps.base.files import Files, NotAllRetainedFiles, files_dataclass
 from tasdmc.steps.utils import log10E2str, check_last_line_contains
 from tasdmc.steps.processing.reconstruction import ReconstructedEvents, ReconstructionStep
 
-from typing import List
+from typing import BinaryIO, List, Tuple, Union
 
 
 @files_dataclass
@@ -39,27 +41,121 @@ class ReconstructedEventFilesArchive(Files):
         check_last_line_contains(self.log, "OK")
 
 
+@files_dataclass
+class ReconstructedEventFilesArchiveChunk(NotAllRetainedFiles):
+    """Part of the archive for a batch of reconstructions: a gzip member with tar headers and contents of the files,
+    but without end-of-archive marker, so that concatenated chunks make a valid .tar.gz"""
+
+    chunk: Path
+    log: Path
+
+    @property
+    def not_retained(self) -> List[Path]:
+        return [self.chunk]
+
+    @classmethod
+    def new(cls, input_: ReconstructedEventFilesSet, log10E_min: float) -> ReconstructedEventFilesArchiveChunk:
+        # chunk is identified by its contents, so that changed batching doesn't confuse continued runs
+        chunk_id = input_.get_id().rsplit(".", 1)[1][:12]
+        chunk = fileio.reconstruction_dir() / f"reconstructed_events.{log10E2str(log10E_min)}.{chunk_id}.tar.gz.part"
+        return ReconstructedEventFilesArchiveChunk(
+            chunk=chunk,
+            log=Path(str(chunk) + ".log"),
+        )
+
+    def _check_contents(self):
+        check_last_line_contains(self.log, "OK")
+
+
+@files_dataclass
+class ReconstructedEventFilesArchiveChunksSet(Files):
+    chunks: List[ReconstructedEventFilesArchiveChunk]
+    chunk_inputs: List[ReconstructedEventFilesSet]  # to rebuild chunks deleted after the previous archiving
+
+    @property
+    def all_files(self) -> List[Path]:  # chunks are deleted after archiving, logs remain
+        return [c.log for c in self.chunks]
+
+
 @dataclass
-class ReconstructedEventsArchivingStep(PipelineStep):
+class ReconstructedEventsChunkArchivingStep(PipelineStep):
     input_: ReconstructedEventFilesSet
+    output: ReconstructedEventFilesArchiveChunk
+
+    @property
+    def description(self) -> str:
+        return (
+            f"Archiving {len(self.input_.reconstructed_event_files)} rufldf.dst.gz files into "
+            + f"{self.output.chunk.relative_to(fileio.run_dir())}"
+        )
+
+    @classmethod
+    def from_reconstruction_steps(
+        cls, steps: List[ReconstructionStep], log10E_min: float
+    ) -> ReconstructedEventsChunkArchivingStep:
+        input_ = ReconstructedEventFilesSet([reco_step.output for reco_step in steps])
+        return ReconstructedEventsChunkArchivingStep(
+            input_=input_,
+            output=ReconstructedEventFilesArchiveChunk.new(input_, log10E_min),
+            previous_steps=steps,
+        )
+
+    def _run(self):
+        with open(self.output.chunk, "wb") as chunk:
+            realized_dsts, not_realized_dsts = _write_chunk(chunk, self.input_.reconstructed_event_files)
+        with open(self.output.log, "w") as log:
+            _write_archive_log(log, realized_dsts, not_realized_dsts)
+
+    @classmethod
+    def validate_config(cls):
+        _archive_compresslevel_from_config()
+
+
+@dataclass
+class ReconstructedEventsArchivingStep(PipelineStep):
+    input_: Union[ReconstructedEventFilesSet, ReconstructedEventFilesArchiveChunksSet]
     output: ReconstructedEventFilesArchive
 
     @property
     def description(self) -> str:
+        if isinstance(self.input_, ReconstructedEventFilesArchiveChunksSet):
+            return (
+                f"Concatenating {len(self.input_.chunks)} archive chunks into "
+                + f"{self.output.tar.relative_to(fileio.run_dir())}"
+            )
         return f"Archiving rufldf.dst.gz files into {self.output.tar.relative_to(fileio.run_dir())}"
 
     @classmethod
-    def from_reconstruction_steps(cls, steps: List[ReconstructionStep], log10E_min: float) -> ReconstructedEventsArchivingStep:
+    def from_reconstruction_steps(
+        cls, steps: List[ReconstructionStep], log10E_min: float
+    ) -> ReconstructedEventsArchivingStep:
         return ReconstructedEventsArchivingStep(
             input_=ReconstructedEventFilesSet([reco_step.output for reco_step in steps]),
             output=ReconstructedEventFilesArchive.new(log10E_min),
             previous_steps=steps,
         )
 
+    @classmethod
+    def from_chunk_archiving_steps(
+        cls, steps: List[ReconstructedEventsChunkArchivingStep], log10E_min: float
+    ) -> ReconstructedEventsArchivingStep:
+        return ReconstructedEventsArchivingStep(
+            input_=ReconstructedEventFilesArchiveChunksSet(
+                chunks=[chunk_step.output for chunk_step in steps],
+                chunk_inputs=[chunk_step.input_ for chunk_step in steps],
+            ),
+            output=ReconstructedEventFilesArchive.new(log10E_min),
+            previous_steps=steps,
+        )
+
     def _run(self):
+        if isinstance(self.input_, ReconstructedEventFilesArchiveChunksSet):
+            self._concatenate_chunks()
+            return
         realized_dsts = 0
         not_realized_dsts = 0
-        with tarfile.open(self.output.tar, "w:gz") as tar, open(self.output.log, "w") as log:
+        compresslevel = _archive_compresslevel_from_config()
+        with tarfile.open(self.output.tar, "w:gz", compresslevel=compresslevel) as tar:
             for reconstructed_events_dst in self.input_.reconstructed_event_files:
                 if not reconstructed_events_dst.is_realized:
                     not_realized_dsts += 1
@@ -67,6 +163,95 @@ class ReconstructedEventsArchivingStep(PipelineStep):
                     reco_events_path = reconstructed_events_dst.rufldf_dst
                     tar.add(reco_events_path, arcname=reco_events_path.name)
                     realized_dsts += 1
-            log.write(f"Added recontructed events files in the archive: {realized_dsts}\n")
-            log.write(f"Non-existent files (i.e. no events produced from the shower): {not_realized_dsts}\n")
-            log.write("\nOK\n")
+        with open(self.output.log, "w") as log:
+            _write_archive_log(log, realized_dsts, not_realized_dsts)
+
+    def _concatenate_chunks(self):
+        realized_dsts = 0
+        not_realized_dsts = 0
+        with open(self.output.tar, "wb") as tar:
+            for chunk, chunk_input in zip(self.input_.chunks, self.input_.chunk_inputs):
+                if chunk.chunk.exists():
+                    with open(chunk.chunk, "rb") as chunk_file:
+                        shutil.copyfileobj(chunk_file, tar)
+                    chunk_realized, chunk_not_realized = _read_archive_log(chunk.log)
+                else:
+                    # chunk was deleted after the previous archiving (e.g. the step is rerun after new showers were
+                    # added), but its chunk archiving step is not rerun, so it is rebuilt from retained rufldf files
+                    chunk_realized, chunk_not_realized = _write_chunk(tar, chunk_input.reconstructed_event_files)
+                realized_dsts += chunk_realized
+                not_realized_dsts += chunk_not_realized
+            tar.write(gzip.compress(_END_OF_ARCHIVE))
+        with open(self.output.log, "w") as log:
+            _write_archive_log(log, realized_dsts, not_realized_dsts)
+
+    def _post_run(self):
+        if isinstance(self.input_, ReconstructedEventFilesArchiveChunksSet):
+            for chunk in self.input_.chunks:
+                chunk.delete_not_retained_files()
+
+    @classmethod
+    def validate_config(cls):
+        _archive_compresslevel_from_config()
+        incremental_archiving_from_config()
+
+
+_END_OF_ARCHIVE = bytes(2 * tarfile.BLOCKSIZE)
+
+
+def _write_tar_members(out: BinaryIO, reconstructed_event_files: List[ReconstructedEvents]) -> Tuple[int, int]:
+    """Write tar headers and contents of realized reconstructed events files, without end-of-archive marker;
+    returns numbers of realized and not realized files"""
+    realized_dsts = 0
+    not_realized_dsts = 0
+    for reconstructed_events_dst in reconstructed_event_files:
+        if not reconstructed_events_dst.is_realized:
+            not_realized_dsts += 1
+            continue
+        reco_events_path = reconstructed_events_dst.rufldf_dst
+        stat = reco_events_path.stat()
+        tarinfo = tarfile.TarInfo(reco_events_path.name)
+        tarinfo.size = stat.st_size
+        tarinfo.mtime = int(stat.st_mtime)
+        tarinfo.mode = stat.st_mode & 0o7777
+        tarinfo.uid = stat.st_uid
+        tarinfo.gid = stat.st_gid
+        out.write(tarinfo.tobuf(tarfile.DEFAULT_FORMAT, tarfile.ENCODING, "surrogateescape"))
+        with open(reco_events_path, "rb") as f:
+            shutil.copyfileobj(f, out)
+        out.write(bytes(-stat.st_size % tarfile.BLOCKSIZE))
+        realized_dsts += 1
+    return realized_dsts, not_realized_dsts
+
+
+def _write_chunk(out: BinaryIO, reconstructed_event_files: List[ReconstructedEvents]) -> Tuple[int, int]:
+    """Write archive chunk, i.e. a gzip member with tar members of realized reconstructed events files"""
+    with gzip.GzipFile(fileobj=out, mode="wb", compresslevel=_archive_compresslevel_from_config()) as chunk:
+        return _write_tar_members(chunk, reconstructed_event_files)
+
+
+def _write_archive_log(log, realized_dsts: int, not_realized_dsts: int):
+    log.write(f"Added recontructed events files in the archive: {realized_dsts}\n")
+    log.write(f"Non-existent files (i.e. no events produced from the shower): {not_realized_dsts}\n")
+    log.write("\nOK\n")
+
+
+def _read_archive_log(log: Path) -> Tuple[int, int]:
+    realized_line, not_realized_line, *_ = log.read_text().splitlines()
+    return int(realized_line.rsplit(":", 1)[1]), int(not_realized_line.rsplit(":", 1)[1])
+
+
+def _archive_compresslevel_from_config() -> int:
+    compresslevel = config.get_key("pipeline.reconstructed_events_archive_compresslevel", default=9)
+    if isinstance(compresslevel, int) and 0 <= compresslevel <= 9:
+        return compresslevel
+    else:
+        raise ValueError("pipeline.reconstructed_events_archive_compresslevel is expected to be integer in [0; 9]")
+
+
+def incremental_archiving_from_config() -> bool:
+    incremental = config.get_key("pipeline.incremental_reconstructed_events_archive", default=False)
+    if isinstance(incremental, bool):
+        return incremental
+    else:
+        raise ValueError("pipeline.incremental_reconstructed_events_archive is expected to be boolean")
@@ -0,0 +1,196 @@
+"""Export of per-event reconstruction results into a compact columnar store
+
+Columns are stored as plain typed arrays in an uncompressed .npz file, so that loading a whole run's results
+takes milliseconds instead of reading all reconstructed .dst.gz files. Values are taken from rufldf bank
+(LDF fit, index 0 of two-element fields) and rusdmc bank (thrown MC truth). Units are the same as in the banks,
+except for MC truth angles: energies in EeV, angles in degrees (rusdmc stores them in radians, they are converted
+on export), core positions in units of bank fields, i.e. 1200 m in rufldf and cm in rusdmc.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from tasdmc import config, fileio
+from tasdmc.steps.base.step import PipelineStep
+from tasdmc.steps.base.files import Files, files_dataclass
+from tasdmc.steps.utils import log10E2str, check_last_line_contains
+from tasdmc.steps.processing.reconstruction import ReconstructionStep
+from tasdmc.steps.aggregation.reconstructed_events import ReconstructedEventFilesSet
+
+from typing import Dict, List, Optional, Tuple
+
+# column name -> (bank field, index in array field or None for scalar field, stored dtype)
+ColumnSpec = Tuple[str, Optional[int], str]
+
+RECONSTRUCTION_COLUMNS: Dict[str, ColumnSpec] = {
+    "energy": ("rufldf.energy", 0, "f4"),
+    "theta": ("rufldf.theta", None, "f4"),
+    "phi": ("rufldf.phi", None, "f4"),
+    "xcore": ("rufldf.xcore", 0, "f4"),
+    "ycore": ("rufldf.ycore", 0, "f4"),
+    "s800": ("rufldf.s800", 0, "f4"),
+    "chi2": ("rufldf.chi2", 0, "f4"),
+    "ndof": ("rufldf.ndof", 0, "i2"),
+}
+
+MC_TRUTH_COLUMNS: Dict[str, ColumnSpec] = {
+    "mc_energy": ("rusdmc.energy", None, "f4"),
+    "mc_theta": ("rusdmc.theta", None, "f4"),
+    "mc_phi": ("rusdmc.phi", None, "f4"),
+    "mc_xcore": ("rusdmc.corexyz", 0, "f4"),
+    "mc_ycore": ("rusdmc.corexyz", 1, "f4"),
+    "mc_parttype": ("rusdmc.parttype", None, "i4"),
+}
+
+ALL_COLUMNS: Dict[str, ColumnSpec] = {**RECONSTRUCTION_COLUMNS, **MC_TRUTH_COLUMNS}
+
+# rufldf stores angles in degrees and rusdmc in radians
+_RADIANS_TO_DEGREES_COLUMNS = {"mc_theta", "mc_phi"}
+
+FILE_ID_COLUMN = "file_id"  # index of the source file in "files" array stored alongside the columns
+
+
+def _banks_fields(column_specs: Dict[str, ColumnSpec]) -> Dict[str, List[str]]:
+    banks_fields: Dict[str, List[str]] = dict()
+    for bank_field, _, _ in column_specs.values():
+        bank, field = bank_field.split(".")
+        fields = banks_fields.setdefault(bank, [])
+        if field not in fields:
+            fields.append(field)
+    return banks_fields
+
+
+def records_to_columns(records: np.ndarray, with_mc_truth: bool = True) -> Dict[str, np.ndarray]:
+    """Convert structured array of records read by dstreader (fields named "bank.field") to columns;
+    without MC truth, corresponding columns are filled with NaNs (or -1 for integer ones)"""
+    columns: Dict[str, np.ndarray] = dict()
+    for column, (bank_field, index, dtype) in ALL_COLUMNS.items():
+        if column in MC_TRUTH_COLUMNS and not with_mc_truth:
+            columns[column] = np.full(records.size, np.nan if np.dtype(dtype).kind == "f" else -1, dtype=dtype)
+            continue
+        values = records[bank_field]
+        if index is not None:
+            values = values[:, index]
+        if column in _RADIANS_TO_DEGREES_COLUMNS:
+            values = np.degrees(values)
+        columns[column] = values.astype(dtype)
+    return columns
+
+
+def read_reconstruction_columns(rufldf_dst: Path) -> Dict[str, np.ndarray]:
+    from dstreader import DstFile
+
+    with DstFile(rufldf_dst) as dst:
+        records = dst.read_all_columns(_banks_fields(ALL_COLUMNS))
+    if records.size > 0:
+        return records_to_columns(records)
+    # events without rusdmc bank are skipped by dstreader, so trying to read them without MC truth
+    with DstFile(rufldf_dst) as dst:
+        records = dst.read_all_columns(_banks_fields(RECONSTRUCTION_COLUMNS))
+    return records_to_columns(records, with_mc_truth=False)
+
+
+def concatenate_columns(
+    columns_by_file: List[Dict[str, np.ndarray]], file_ids: Optional[List[int]] = None
+) -> Dict[str, np.ndarray]:
+    """Concatenate per-file columns, adding file_id column; file ids default to indices in the list"""
+    if file_ids is None:
+        file_ids = list(range(len(columns_by_file)))
+    concatenated: Dict[str, np.ndarray] = dict()
+    for column, (_, _, dtype) in ALL_COLUMNS.items():
+        concatenated[column] = np.concatenate(
+            [np.empty(0, dtype=dtype)] + [columns[column] for columns in columns_by_file]
+        )
+    concatenated[FILE_ID_COLUMN] = np.concatenate(
+        [np.empty(0, dtype="u4")]
+        + [np.full(columns["energy"].size, file_id, dtype="u4") for file_id, columns in zip(file_ids, columns_by_file)]
+    )
+    return concatenated
+
+
+def save_columns(npz: Path, columns: Dict[str, np.ndarray], files: List[str]):
+    with open(npz, "wb") as f:  # file object prevents numpy from appending .npz extension
+        np.savez(f, files=np.array(files, dtype=str), **columns)
+
+
+def load_columns(npz: Path) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """Load columns and source file names saved by the export step"""
+    with np.load(npz) as data:
+        files = data["files"]
+        columns = {column: data[column] for column in data.files if column != "files"}
+    return columns, files
+
+
+@files_dataclass
+class ReconstructedEventsColumns(Files):
+    npz: Path
+    log: Path
+
+    @classmethod
+    def new(cls, log10E_min: float) -> ReconstructedEventsColumns:
+        npz = fileio.final_dir() / f"reconstructed_events.{log10E2str(log10E_min)}.npz"
+        return ReconstructedEventsColumns(
+            npz=npz,
+            log=Path(str(npz) + ".log"),
+        )
+
+    def _check_contents(self):
+        check_last_line_contains(self.log, "OK")
+
+
+@dataclass
+class ReconstructedEventsColumnsExportStep(PipelineStep):
+    input_: ReconstructedEventFilesSet
+    output: ReconstructedEventsColumns
+
+    @property
+    def description(self) -> str:
+        return f"Exporting reconstruction results into {self.output.npz.relative_to(fileio.run_dir())}"
+
+    @classmethod
+    def from_reconstruction_steps(
+        cls, steps: List[ReconstructionStep], log10E_min: float
+    ) -> ReconstructedEventsColumnsExportStep:
+        return ReconstructedEventsColumnsExportStep(
+            input_=ReconstructedEventFilesSet([reco_step.output for reco_step in steps]),
+            output=ReconstructedEventsColumns.new(log10E_min),
+            previous_steps=steps,
+        )
+
+    def _run(self):
+        files: List[str] = []
+        columns_by_file: List[Dict[str, np.ndarray]] = []
+        for reconstructed_events in self.input_.reconstructed_event_files:
+            if not reconstructed_events.is_realized:
+                continue
+            files.append(reconstructed_events.rufldf_dst.name)
+            columns_by_file.append(read_reconstruction_columns(reconstructed_events.rufldf_dst))
+        columns = concatenate_columns(columns_by_file)
+        save_columns(self.output.npz, columns, files)
+        with open(self.output.log, "w") as log:
+            log.write(f"Events exported: {columns[FILE_ID_COLUMN].size}\n")
+            log.write(f"Reconstructed events files read: {len(files)}\n")
+            log.write("\nOK\n")
+
+    @classmethod
+    def validate_config(cls):
+        export_columns_from_config()
+        try:
+            import dstreader  # noqa: F401
+        except ImportError:
+            raise ImportError(
+                "pipeline.export_reconstructed_events_columns is set, "
+                + "but dstreader package is not installed (see src/utils/dstreader)"
+            )
+
+
+def export_columns_from_config() -> bool:
+    export = config.get_key("pipeline.export_reconstructed_events_columns", default=False)
+    if isinstance(export, bool):
+        return export
+    else:
+        raise ValueError("pipeline.export_reconstructed_events_columns is expected to be boolean")
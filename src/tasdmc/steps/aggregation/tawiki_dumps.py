@@ -1,26 +1,37 @@
 from __future__ import annotations
 
+import fcntl
+from contextlib import contextmanager
 from dataclasses import dataclass
 from pathlib import Path
 
-from tasdmc import fileio
+from tasdmc import config, fileio
 from tasdmc.steps.utils import log10E2str
 from tasdmc.steps.base.step import PipelineStep
 from tasdmc.steps.base.files import Files, files_dataclass
 from tasdmc.steps.processing.tawiki_dump import TawikiDumpFiles, TawikiDumpStep
+from tasdmc.utils import concatenate_and_hash
 
 from itertools import chain
-from typing import List
+from typing import Dict, Iterable, List, TextIO
 
 
 @files_dataclass
 class TawikiDumpFileSet(Files):
     tdfs: List[TawikiDumpFiles]
+    incremental: bool = False
 
     @property
     def all_files(self) -> List[Path]:  # for Files hashing and identification purposes
         return chain.from_iterable((tdf.log, tdf.dump) for tdf in self.tdfs)
 
+    def _get_file_contents_hash(self, file: Path) -> str:
+        if self.incremental and file.suffix == '.sdascii' and file.exists():
+            # dumps were already read by incremental merger, it tracks their changes by size and mtime as well
+            stat = file.stat()
+            return concatenate_and_hash([stat.st_size, stat.st_mtime_ns])
+        return super()._get_file_contents_hash(file)
+
 
 @files_dataclass
 class MergedTawikiDump(Files):
@@ -48,19 +59,165 @@ class TawikiDumpsMergeStep(PipelineStep):
     @classmethod
     def from_tawiki_dump_steps(cls, steps: List[TawikiDumpStep], log10E_min: float) -> TawikiDumpsMergeStep:
         return TawikiDumpsMergeStep(
-            input_=TawikiDumpFileSet([s.output for s in steps]),
+            input_=TawikiDumpFileSet([s.output for s in steps], incremental=incremental_merge_from_config()),
             output=MergedTawikiDump.new(log10E_min),
             previous_steps=steps,
         )
 
     def _run(self):
+        if self.input_.incremental:
+            with IncrementalTawikiDumpMerger(self.output).locked() as merger:
+                merger.sync(self.input_.tdfs)
+                with open(self.output.log, "w") as log:
+                    for tdf in self.input_.tdfs:
+                        log.write(f"{tdf.dump.relative_to(fileio.run_dir())} - {merger.entries[tdf.dump.name].lines}\n")
+            return
         with open(self.output.merged_dump, "w") as out, open(self.output.log, "w") as log:
             for tdf in self.input_.tdfs:
-                line_count = 0
-                with open(tdf.dump, "r") as in_:
-                    for line in in_:
-                        line = line.strip()
-                        if line:
-                            line_count += 1
-                            out.write(line + '\n')
+                line_count = _copy_dump_lines(tdf.dump, out)
                 log.write(f"{tdf.dump.relative_to(fileio.run_dir())} - {line_count}\n")
+
+    @classmethod
+    def validate_config(cls):
+        incremental_merge_from_config()
+
+
+def _copy_dump_lines(dump: Path, out: TextIO) -> int:
+    line_count = 0
+    with open(dump, "r") as in_:
+        for line in in_:
+            line = line.strip()
+            if line:
+                line_count += 1
+                out.write(line + '\n')
+    return line_count
+
+
+@dataclass
+class _ManifestEntry:
+    dump_name: str
+    offset: int  # in merged dump, bytes
+    length: int
+    lines: int
+    dump_size: int  # source dump's size and modification time, to detect changes without reading it
+    dump_mtime_ns: int
+
+    def dump(self) -> str:
+        return '\t'.join(str(v) for v in self.__dict__.values())
+
+    @classmethod
+    def parse(cls, line: str) -> _ManifestEntry:
+        dump_name, *values = line.split('\t')
+        return _ManifestEntry(dump_name, *[int(v) for v in values])
+
+    def is_up_to_date(self, dump: Path) -> bool:
+        stat = dump.stat()
+        return stat.st_size == self.dump_size and stat.st_mtime_ns == self.dump_mtime_ns
+
+
+class IncrementalTawikiDumpMerger:
+    """Appends TA Wiki dumps to the merged dump as soon as they are produced, so that it's available (and
+    consistent) at any time during the run. Manifest lists each dump's segment in the merged dump; only new
+    or changed dumps are read on each merge. Concurrent steps are serialized with a lock file.
+
+    During the run dumps are ordered as their steps finish; final sync puts them in steps order, so that the
+    result is the same as with non-incremental merge.
+    """
+
+    def __init__(self, merged: MergedTawikiDump):
+        self.merged_dump = merged.merged_dump
+        self.manifest = fileio.reconstruction_dir() / (merged.merged_dump.name + '.manifest')
+        self.lock_file = fileio.reconstruction_dir() / (merged.merged_dump.name + '.lock')
+        self.entries: Dict[str, _ManifestEntry] = dict()
+
+    @contextmanager
+    def locked(self):
+        with open(self.lock_file, 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self._load()
+                yield self
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _load(self):
+        self.entries = dict()
+        if self.manifest.exists() and self.merged_dump.exists():
+            for line in self.manifest.read_text().splitlines():
+                if line:
+                    entry = _ManifestEntry.parse(line)
+                    self.entries[entry.dump_name] = entry
+        merged_size = max((e.offset + e.length for e in self.entries.values()), default=0)
+        if not self.merged_dump.exists() or self.merged_dump.stat().st_size < merged_size:
+            self.entries = dict()  # inconsistent with manifest, e.g. merged dump was removed; starting anew
+            merged_size = 0
+        # dropping tail possibly left by interrupted append
+        with open(self.merged_dump, 'a') as f:
+            f.truncate(merged_size)
+        if not self.entries:
+            self.manifest.write_text('')
+
+    def append(self, dump: Path):
+        """Append dump to the merged one; no-op if it's already there and hasn't changed since"""
+        entry = self.entries.get(dump.name)
+        if entry is not None:
+            if entry.is_up_to_date(dump):
+                return
+            self._rewrite_without([dump.name])
+        stat = dump.stat()
+        offset = self.merged_dump.stat().st_size
+        with open(self.merged_dump, 'a') as out:
+            lines = _copy_dump_lines(dump, out)
+        length = self.merged_dump.stat().st_size - offset
+        entry = _ManifestEntry(dump.name, offset, length, lines, stat.st_size, stat.st_mtime_ns)
+        self.entries[dump.name] = entry
+        with open(self.manifest, 'a') as manifest:
+            manifest.write(entry.dump() + '\n')
+
+    def sync(self, tdfs: Iterable[TawikiDumpFiles]):
+        """Make merged dump contain exactly given dumps, in the given order"""
+        dumps = [tdf.dump for tdf in tdfs]
+        dump_names = [d.name for d in dumps]
+        dump_names_set = set(dump_names)
+        stale = [name for name in self.entries if name not in dump_names_set]
+        if stale:
+            self._rewrite_without(stale)
+        for dump in dumps:
+            self.append(dump)
+        if self._names_in_merged_order() != dump_names:
+            self._rewrite(dump_names)
+
+    def _names_in_merged_order(self) -> List[str]:
+        return [e.dump_name for e in sorted(self.entries.values(), key=lambda e: e.offset)]
+
+    def _rewrite_without(self, dump_names: Iterable[str]):
+        dropped = set(dump_names)
+        self._rewrite([name for name in self._names_in_merged_order() if name not in dropped])
+
+    def _rewrite(self, dump_names: List[str]):
+        """Rewrite merged dump with only given dumps' segments in the given order"""
+        tmp_merged_dump = self.merged_dump.with_name(self.merged_dump.name + '.tmp')
+        new_entries: Dict[str, _ManifestEntry] = dict()
+        with open(self.merged_dump, 'rb') as src, open(tmp_merged_dump, 'wb') as dst:
+            for e in (self.entries[name] for name in dump_names):
+                src.seek(e.offset)
+                new_entries[e.dump_name] = _ManifestEntry(
+                    e.dump_name, dst.tell(), e.length, e.lines, e.dump_size, e.dump_mtime_ns
+                )
+                dst.write(src.read(e.length))
+        tmp_merged_dump.replace(self.merged_dump)
+        self.entries = new_entries
+        self.manifest.write_text(''.join(e.dump() + '\n' for e in new_entries.values()))
+
+
+def append_to_merged_tawiki_dump(tdf: TawikiDumpFiles):
+    with IncrementalTawikiDumpMerger(MergedTawikiDump.new(tdf.log10E_min)).locked() as merger:
+        merger.append(tdf.dump)
+
+
+def incremental_merge_from_config() -> bool:
+    incremental = config.get_key('pipeline.incremental_tawiki_dumps_merge', default=False)
+    if isinstance(incremental, bool):
+        return incremental
+    else:
+        raise ValueError("pipeline.incremental_tawiki_dumps_merge is expected to be boolean")
@@ -288,15 +288,19 @@ class NotAllRetainedFiles(Files):
         """Delete files that are not retained after pipeline end and create .deleted files in their place"""
         for f in self.not_retained:
             if f.exists():
-                with open(self._with_deleted_suffix(f), 'w') as del_f:
-                    del_f.write(
-                        f'{f}\nwas produced and then deleted\n\n'
-                        + f'its size was {f.stat().st_size} bytes\n\n'
-                        + 'its contents hash was:\n'
-                        + file_contents_hash(f)
-                    )
+                self.mark_deleted(f, size=f.stat().st_size, contents_hash=file_contents_hash(f))
                 f.unlink()
 
+    def mark_deleted(self, f: Path, size: int, contents_hash: str):
+        """Create .deleted file for a file that was produced and deleted (or was never stored on disk at all)"""
+        with open(self._with_deleted_suffix(f), 'w') as del_f:
+            del_f.write(
+                f'{f}\nwas produced and then deleted\n\n'
+                + f'its size was {size} bytes\n\n'
+                + 'its contents hash was:\n'
+                + contents_hash
+            )
+
 
 class OptionalFiles(Files):
     """Subclass for cases when Files may or may not be produced. If they are, they are checked as always."""
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from contextlib import contextmanager, nullcontext
+from ctypes import c_int
+import multiprocessing as mp
+
+from typing import Optional
+
+
+class ProcessSlots:
+    """Number of processes that may be busy at once, shared by all worker processes. Each running step reserves
+    as many slots as processes it runs, so steps running several routines at once (e.g. streamed dethinning) are
+    counted against the same limit as worker processes themselves
+    """
+
+    def __init__(self, total: int):
+        self.total = total
+        self._free = mp.Value(c_int, total, lock=False)
+        self._multislot_reservations_waiting = mp.Value(c_int, 0, lock=False)
+        self._condition = mp.Condition()
+
+    @contextmanager
+    def reserved(self, n: int):
+        n = max(1, min(n, self.total))
+        with self._condition:
+            if n > 1:
+                self._multislot_reservations_waiting.value += 1
+                self._condition.wait_for(lambda: self._free.value >= n)
+                self._multislot_reservations_waiting.value -= 1
+            else:
+                # single slots are not taken while a multislot reservation is waiting, so that it is not starved
+                self._condition.wait_for(
+                    lambda: self._free.value >= 1 and self._multislot_reservations_waiting.value == 0
+                )
+            self._free.value -= n
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._free.value += n
+                self._condition.notify_all()
+
+
+PROCESS_SLOTS_SHARED: Optional[ProcessSlots] = None
+
+
+def reserved_process_slots(n: int):
+    if PROCESS_SLOTS_SHARED is None:  # running outside of the worker pool
+        return nullcontext()
+    return PROCESS_SLOTS_SHARED.reserved(n)
+
+
+def set_process_slots(slots: ProcessSlots):
+    global PROCESS_SLOTS_SHARED
+    PROCESS_SLOTS_SHARED = slots
@@ -13,6 +13,7 @@ from tasdmc import logs, config
 from tasdmc.logs import step_progress, pipeline_progress
 from .files import Files
 from .step_status_shared import StepRuntimeStatus
+from .process_slots_shared import reserved_process_slots
 
 
 class StepFailedException(Exception):
@@ -67,6 +68,12 @@ class PipelineStep(ABC):
     def save_runtime_status(self, status: StepRuntimeStatus):
         status.save(self._step_status_index_in_shared_array)
 
+    @property
+    def n_processes(self) -> int:
+        """Number of processes busy while the step is running; may be overriden by steps running several
+        routines at once"""
+        return 1
+
     @property
     @abstractmethod
     def description(self) -> str:
@@ -150,14 +157,15 @@ class PipelineStep(ABC):
                         )
                     step_progress.skipped(self)
                 else:
-                    step_progress.started(self)
-                    self.input_.assert_files_are_ready()
-                    self.output.prepare_for_step_run()
-                    self.input_.store_contents_hash()
-                    self._run()
-                    assert self.input_.same_hash_as_stored(), "Input hash changed while step was running"
-                    self.output.assert_files_are_ready()
-                    self._post_run()
+                    with reserved_process_slots(self.n_processes):
+                        step_progress.started(self)
+                        self.input_.assert_files_are_ready()
+                        self.output.prepare_for_step_run()
+                        self.input_.store_contents_hash()
+                        self._run()
+                        assert self.input_.same_hash_as_stored(), "Input hash changed while step was running"
+                        self.output.assert_files_are_ready()
+                        self._post_run()
                     step_progress.completed(self, output_size_mb=self.output.total_size('Mb'))
 
                 self.save_runtime_status(StepRuntimeStatus.COMPLETED)
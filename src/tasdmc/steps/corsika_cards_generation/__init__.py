@@ -6,6 +6,7 @@ Based on runcorsd-old/gen_infiles_primary.sh
 from __future__ import annotations
 from pathlib import Path
 import getpass
+import re
 from math import ceil
 
 from typing import List, Tuple, Generator, Iterable
@@ -18,11 +19,32 @@ from .corsika_card import (
     LOG10_E_MAX_POSSIBLE,
     LOG10_E_MIN_POSSIBLE,
     LOG10_E_STEP,
+    random_seeds,
+    fill_card_template,
+)
+from .cards_manifest import (
+    CardManifestEntry,
+    read_cards_manifest,
+    append_to_cards_manifest,
+    existing_card_runnrs,
+    unlisted_card_entry,
 )
 
 
 def generate_corsika_cards(logging: bool = True, dry: bool = False) -> List[Path]:
+    """Generates CORSIKA cards for the configured energy range and returns paths to all of them, including those
+    generated earlier (as listed in the cards manifest). Listed cards whose files are missing are regenerated
+    with the same seeds; card files missing from the manifest are added to it with their seeds. With dry=True, only enumerates cards' paths without writing any files; when logging
+    is disabled too, this involves no filesystem access at all.
+    """
     generated_card_paths: List[Path] = []
+    if logging or not dry:
+        already_generated = read_cards_manifest(save_built=not dry)
+        existing_runnrs = existing_card_runnrs()
+    else:
+        already_generated = dict()
+        existing_runnrs = set()
+    corsika_input_files_dir = fileio.corsika_input_files_dir()
 
     particle, particle_id = particle_id_from_config()
     if logging:
@@ -63,28 +85,39 @@ def generate_corsika_cards(logging: bool = True, dry: bool = False) -> List[Path
     if logging:
         logs.cards_generation_info('\nCards per energy bin')
     for log10E in log10E_range_from_config():
-        cd.set_fixed_log10en(log10E)
-        params = BTS_PAR[log10E]
-        energy_id = int(params[0])
-        cd.set_THIN(params[1], params[2], params[3])
-        cd.set_THINH(params[4], params[5])
-
+        energy_id = int(BTS_PAR[log10E][0])
         cards_count = get_cards_count_at_log10E(log10E)  # a total number of cards
         skipped_cards_count = 0
         card_index_range = list(card_index_range_from_config(cards_count))
         if len(card_index_range) == 0:
             continue
+        new_cards: List[CardManifestEntry] = []
         for card_index in card_index_range:
             runnr = file_index_to_runnr(card_index, energy_id)
-            card_file = fileio.corsika_input_files_dir() / f"DAT{runnr}.in"
-            generated_card_paths.append(card_file)
-            if card_file.exists():
+            card_path = corsika_input_files_dir / f"DAT{runnr}.in"
+            generated_card_paths.append(card_path)
+            if runnr in already_generated and runnr in existing_runnrs:
                 skipped_cards_count += 1
                 continue
-            cd.set_RUNNR(runnr)
-            cd.set_random_seeds()
             if not dry:
-                card_file.write_text(cd.buf + "\n")
+                new_cards.append(
+                    already_generated.get(runnr)
+                    or (unlisted_card_entry(card_path) if runnr in existing_runnrs else None)
+                    or CardManifestEntry(card_index, log10E, runnr, seeds=random_seeds())
+                )
+
+        if new_cards:
+            cd.set_fixed_log10en(log10E)
+            params = BTS_PAR[log10E]
+            cd.set_THIN(params[1], params[2], params[3])
+            cd.set_THINH(params[4], params[5])
+            card_template = cd.as_template()
+            for new_card in new_cards:
+                card_text = fill_card_template(card_template, new_card.runnr, new_card.seeds) + "\n"
+                if new_card.runnr in existing_runnrs and new_card.card_file.read_text() == card_text:
+                    continue  # complete card file, only missing from the manifest
+                new_card.card_file.write_text(card_text)
+            append_to_cards_manifest(c for c in new_cards if c.runnr not in already_generated)
 
         if is_subset_configured():
             cards_count_msg = f"{len(card_index_range)}/{cards_count} cards, starting at {card_index_range[0]}"
@@ -178,6 +211,18 @@ def log10E_bounds_from_config() -> Tuple[float, float]:
         raise ValueError(str(e))
 
 
+def log10E_from_corsika_event_name(corsika_event_name: str) -> float:
+    """Primary energy of the shower from its DATnnnnXX name, where XX is the energy channel from BTS_PAR"""
+    m = re.match(r'DAT\d\d\d\d(?P<energy_id>\d\d)', corsika_event_name)
+    if m is None:
+        raise ValueError(f"CORSIKA event name '{corsika_event_name}' doesn't match expected pattern 'DATnnnnXX'!")
+    energy_id = int(m.group("energy_id"))
+    for log10E, bts_params in BTS_PAR.items():
+        if bts_params[0] == energy_id:
+            return log10E
+    raise ValueError(f"CORSIKA event name '{corsika_event_name}' contains unknown energy ID: {energy_id}")
+
+
 def log10E_range_from_config() -> Generator[float, None, None]:
     log10E_min, log10E_max = log10E_bounds_from_config()
     for E_bin_i in range(1 + int((log10E_max - log10E_min) / LOG10_E_STEP)):
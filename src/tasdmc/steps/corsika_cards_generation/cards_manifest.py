@@ -0,0 +1,86 @@
+"""Manifest of generated CORSIKA cards, written once at generation so that already generated cards can be
+listed without looking at each card file
+"""
+
+from __future__ import annotations
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from tasdmc import fileio
+from .corsika_card import N_SEEDS
+
+
+@dataclass
+class CardManifestEntry:
+    card_index: int
+    log10E: float
+    runnr: str
+    seeds: Tuple[int, ...]
+
+    @property
+    def card_file(self) -> Path:
+        return fileio.corsika_input_files_dir() / f"DAT{self.runnr}.in"
+
+    def dump(self) -> str:
+        return '\t'.join([str(self.card_index), f"{self.log10E:.1f}", self.runnr, *[str(s) for s in self.seeds]])
+
+    @classmethod
+    def parse(cls, line: str) -> CardManifestEntry:
+        card_index, log10E, runnr, *seeds = line.split('\t')
+        return CardManifestEntry(
+            card_index=int(card_index),
+            log10E=float(log10E),
+            runnr=runnr,
+            seeds=tuple(int(s) for s in seeds),
+        )
+
+    @classmethod
+    def from_card_file(cls, card_file: Path) -> CardManifestEntry:
+        from . import log10E_from_corsika_event_name
+
+        card = card_file.read_text()
+        runnr = re.search(r'^RUNNR (\d+)', card, re.MULTILINE).group(1)
+        return CardManifestEntry(
+            card_index=int(runnr[:-2]),
+            log10E=log10E_from_corsika_event_name(card_file.stem),
+            runnr=runnr,
+            seeds=tuple(int(s) for s in re.findall(r'^SEED (\d+) 0 0$', card, re.MULTILINE)),
+        )
+
+
+def read_cards_manifest(save_built: bool = True) -> Dict[str, CardManifestEntry]:
+    """Generated cards by RUNNR. For runs created before the manifest was introduced it is
+    built from the card files found in the CORSIKA input directory and, if save_built is set, saved"""
+    manifest_file = fileio.corsika_cards_manifest()
+    if manifest_file.exists():
+        entries = [CardManifestEntry.parse(line) for line in manifest_file.read_text().splitlines() if line]
+    else:
+        existing_card_files = sorted(fileio.corsika_input_files_dir().glob('DAT*.in'))
+        entries = [CardManifestEntry.from_card_file(cf) for cf in existing_card_files]
+        if save_built and entries:
+            append_to_cards_manifest(entries)
+    return {e.runnr: e for e in entries}
+
+
+def unlisted_card_entry(card_file: Path) -> Optional[CardManifestEntry]:
+    """Entry for a card file that was written but not added to the manifest, i.e. generation was interrupted
+    in between; None if the file is written only partially and its seeds can't be read back"""
+    try:
+        entry = CardManifestEntry.from_card_file(card_file)
+    except (AttributeError, ValueError):
+        return None
+    return entry if len(entry.seeds) == N_SEEDS else None
+
+
+def existing_card_runnrs() -> Set[str]:
+    """RUNNRs of card files present in the CORSIKA input directory, listed with a single directory scan"""
+    return {cf.stem[len('DAT') :] for cf in fileio.corsika_input_files_dir().glob('DAT*.in')}
+
+
+def append_to_cards_manifest(entries: Iterable[CardManifestEntry]):
+    with open(fileio.corsika_cards_manifest(), 'a') as f:
+        for e in entries:
+            f.write(e.dump() + '\n')
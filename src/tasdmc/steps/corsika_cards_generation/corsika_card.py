@@ -1,9 +1,12 @@
 """Based on corcard.py script, repurposed for use as a module"""
 
 import re
+import copy
 import math
 import random
 
+from typing import Tuple
+
 
 PARTICLE_ID_BY_NAME = {
     'proton': 14,
@@ -221,8 +224,15 @@ class CorsikaCardData:
         self.replace_card("SEED", "{:d} 0 0".format(seed5), occurrence=5)
 
     def set_random_seeds(self):
-        # CORSIKA v73695 allows random integer seeds in [1, 900000000] interval
-        self.set_SEED(*[random.randint(1, 900000000) for _ in range(5)])
+        self.set_SEED(*random_seeds())
+
+    def as_template(self) -> str:
+        """Card text with RUNNR and SEED values left as placeholders to be filled with fill_card_template"""
+        template = copy.copy(self)
+        template.set_RUNNR('@RUNNR@')
+        for i in range(5):
+            template.replace_card("SEED", f"@SEED{i}@ 0 0", occurrence=i + 1)
+        return template.buf
 
     def set_USER(self, user):
         self.replace_card("USER", user)
@@ -234,3 +244,18 @@ class CorsikaCardData:
         if not self.epos_cards_added:
             self.buf = self.buf + "\n" + EPOS_CARDS.strip()
             self.epos_cards_added = True
+
+
+N_SEEDS = 5
+
+
+def random_seeds() -> Tuple[int, ...]:
+    # CORSIKA v73695 allows random integer seeds in [1, 900000000] interval
+    return tuple(random.randint(1, 900000000) for _ in range(N_SEEDS))
+
+
+def fill_card_template(template: str, runnr: str, seeds: Tuple[int, ...]) -> str:
+    card = template.replace('@RUNNR@', runnr)
+    for i, seed in enumerate(seeds):
+        card = card.replace(f'@SEED{i}@', str(seed))
+    return card
@@ -0,0 +1,429 @@
+"""Memory-mapped numpy view of CORSIKA particle files (DATnnnnnn, their .pNN parts and dethinned outputs)
+
+Particle file is a sequence of Fortran records, each holding NSUBBLOCK subblocks surrounded by 4-byte record length
+markers. Subblock starts with a 4-byte name for header records (RUNH, EVTH, LONG, EVTE, RUNE), otherwise it contains
+NSENTENCE particles, 8 floats each for thinned and 7 floats each for dethinned files (the latter lack weight).
+"""
+
+import numpy as np
+from pathlib import Path
+from math import ceil
+from dataclasses import dataclass, field
+
+from typing import BinaryIO, Dict, List, Optional, Generator
+
+from tasdmc.steps.exceptions import FilesCheckFailed
+
+NSUBBLOCK = 21
+NSENTENCE = 39
+THINNED_PARTICLE_WORDS = 8
+DETHINNED_PARTICLE_WORDS = 7
+WORD_BYTES = 4
+
+HEADER_NAMES = ('RUNH', 'EVTH', 'LONG', 'EVTE', 'RUNE')
+HEADER_CODES = {name: int(np.frombuffer(name.encode(), dtype='<u4')[0]) for name in HEADER_NAMES}
+HEADER_NAMES_BY_CODE = {code: name for name, code in HEADER_CODES.items()}
+_HEADER_CODES_ARRAY = np.array(list(HEADER_CODES.values()), dtype='<u4')
+
+PARTICLE_FIELDS = ('description', 'px', 'py', 'pz', 'x', 'y', 't', 'weight')
+
+DEFAULT_CHUNK_BLOCKS = 4096  # ~100 Mb of thinned particle data
+
+
+def block_length(particle_words: int) -> int:
+    return NSUBBLOCK * NSENTENCE * particle_words * WORD_BYTES
+
+
+def particle_dtype(particle_words: int) -> np.dtype:
+    return np.dtype([(name, '<f4') for name in PARTICLE_FIELDS[:particle_words]])
+
+
+@dataclass
+class ParticleFileStats:
+    n_blocks: int = 0
+    n_subblocks: Dict[str, int] = field(default_factory=dict)  # header names, 'PART' and 'EMPTY' (zero padding)
+    n_particles: int = 0
+    n_particles_by_id: Dict[int, int] = field(default_factory=dict)  # CORSIKA particle id -> count
+    total_weight: Optional[float] = None  # thinned files only
+    max_weight: Optional[float] = None
+
+
+class ParticleFile:
+    """Zero-copy view of a CORSIKA particle file; all arrays are backed by np.memmap and read lazily"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        size = self.path.stat().st_size
+        if size < 2 * WORD_BYTES:
+            raise FilesCheckFailed(f"{self.path.name} is too short to be a CORSIKA particle file ({size} bytes)")
+        self._bytes = np.memmap(self.path, dtype=np.uint8, mode='r')
+
+        self.block_length = int(self._bytes[:WORD_BYTES].view('<i4')[0])
+        for particle_words in (THINNED_PARTICLE_WORDS, DETHINNED_PARTICLE_WORDS):
+            if self.block_length == block_length(particle_words):
+                self.particle_words = particle_words
+                break
+        else:
+            raise FilesCheckFailed(
+                f"{self.path.name} starts with unexpected record length {self.block_length}, "
+                + f"expected {block_length(THINNED_PARTICLE_WORDS)} (thinned) "
+                + f"or {block_length(DETHINNED_PARTICLE_WORDS)} (dethinned)"
+            )
+        self.subblock_words = NSENTENCE * self.particle_words
+        self.subblock_bytes = self.subblock_words * WORD_BYTES
+        self.record_bytes = self.block_length + 2 * WORD_BYTES
+        self.n_blocks, self.trailing_bytes = divmod(size, self.record_bytes)
+        self._header_positions: Optional[Dict[str, np.ndarray]] = None
+        self._n_empty_subblocks: Optional[int] = None
+
+    @property
+    def is_thinned(self) -> bool:
+        return self.particle_words == THINNED_PARTICLE_WORDS
+
+    @property
+    def n_subblocks(self) -> int:
+        return self.n_blocks * NSUBBLOCK
+
+    def _view(self, dtype: np.dtype, inner_shape: tuple = (), inner_strides: tuple = (), offset: int = WORD_BYTES):
+        return np.ndarray(
+            shape=(self.n_blocks, NSUBBLOCK) + inner_shape,
+            dtype=dtype,
+            buffer=self._bytes,
+            offset=offset,
+            strides=(self.record_bytes, self.subblock_bytes) + inner_strides,
+        )
+
+    @property
+    def leading_markers(self) -> np.ndarray:
+        return np.ndarray((self.n_blocks,), '<i4', buffer=self._bytes, offset=0, strides=(self.record_bytes,))
+
+    @property
+    def trailing_markers(self) -> np.ndarray:
+        return np.ndarray(
+            (self.n_blocks,),
+            '<i4',
+            buffer=self._bytes,
+            offset=self.record_bytes - WORD_BYTES,
+            strides=(self.record_bytes,),
+        )
+
+    @property
+    def subblocks(self) -> np.ndarray:
+        """Raw subblock words, shape (n_blocks, NSUBBLOCK, subblock_words)"""
+        return self._view(np.dtype('<f4'), (self.subblock_words,), (WORD_BYTES,))
+
+    @property
+    def subblock_codes(self) -> np.ndarray:
+        """First word of each subblock as uint32, compare with HEADER_CODES; shape (n_blocks, NSUBBLOCK)"""
+        return self._view(np.dtype('<u4'))
+
+    @property
+    def particles(self) -> np.ndarray:
+        """Structured particle records, shape (n_blocks, NSUBBLOCK, NSENTENCE); header subblocks included as is"""
+        dtype = particle_dtype(self.particle_words)
+        return self._view(dtype, (NSENTENCE,), (dtype.itemsize,))
+
+    def iter_chunks(self, chunk_blocks: int = DEFAULT_CHUNK_BLOCKS) -> Generator[slice, None, None]:
+        for start in range(0, self.n_blocks, chunk_blocks):
+            yield slice(start, min(start + chunk_blocks, self.n_blocks))
+
+    def _scan_subblocks(self):
+        header_positions = {name: [] for name in HEADER_NAMES}
+        n_empty = 0
+        for chunk in self.iter_chunks():
+            codes = self.subblock_codes[chunk].ravel()
+            n_empty += int(np.count_nonzero(codes == 0))
+            headers_idx = np.flatnonzero(np.isin(codes, _HEADER_CODES_ARRAY))
+            for idx in headers_idx:
+                header_positions[HEADER_NAMES_BY_CODE[int(codes[idx])]].append(chunk.start * NSUBBLOCK + idx)
+        self._header_positions = {name: np.array(pos, dtype=np.int64) for name, pos in header_positions.items()}
+        self._n_empty_subblocks = n_empty
+
+    @property
+    def header_positions(self) -> Dict[str, np.ndarray]:
+        """Flat subblock indices of each header record type"""
+        if self._header_positions is None:
+            self._scan_subblocks()
+        return self._header_positions
+
+    def subblock_counts(self) -> Dict[str, int]:
+        counts = {name: len(positions) for name, positions in self.header_positions.items()}
+        counts['EMPTY'] = self._n_empty_subblocks
+        counts['PART'] = self.n_subblocks - sum(counts.values())
+        return counts
+
+    def header(self, name: str) -> Optional[np.ndarray]:
+        """View of the last header record with given name (as corsika_split_th uses it) or None if there's none"""
+        positions = self.header_positions[name]
+        if not len(positions):
+            return None
+        block_idx, subblock_idx = divmod(int(positions[-1]), NSUBBLOCK)
+        return self.subblocks[block_idx, subblock_idx]
+
+    def particle_subblocks_mask(self, chunk: slice) -> np.ndarray:
+        codes = self.subblock_codes[chunk]
+        return (codes != 0) & ~np.isin(codes, _HEADER_CODES_ARRAY)
+
+    def iter_particles(self, chunk_blocks: int = DEFAULT_CHUNK_BLOCKS) -> Generator[np.ndarray, None, None]:
+        """Non-empty particle records in chunks; each chunk is a (flat, copied) structured array"""
+        for chunk in self.iter_chunks(chunk_blocks):
+            particles = self.subblocks[chunk][self.particle_subblocks_mask(chunk)].reshape(-1, self.particle_words)
+            particles = particles[particles[:, 0] != 0]  # filtering plain floats is much faster than structured
+            yield particles.view(particle_dtype(self.particle_words))[:, 0]
+
+    def check_integrity(self, check_weights: bool = True):
+        """Vectorized structural check, raises FilesCheckFailed with the first problem found"""
+        name = self.path.name
+        if self.trailing_bytes:
+            raise FilesCheckFailed(f"{name} is truncated: {self.trailing_bytes} bytes after the last full record")
+        for markers, which in ((self.leading_markers, "leading"), (self.trailing_markers, "trailing")):
+            bad_blocks = np.flatnonzero(markers != self.block_length)
+            if len(bad_blocks):
+                raise FilesCheckFailed(
+                    f"{name} has {len(bad_blocks)} records with bad {which} length marker, "
+                    + f"first in record #{bad_blocks[0]}: {markers[bad_blocks[0]]} != {self.block_length}"
+                )
+
+        positions = self.header_positions
+        if not len(positions['RUNH']) or positions['RUNH'][0] != 0:
+            raise FilesCheckFailed(f"{name} doesn't start with RUNH record")
+        if not len(positions['RUNE']):
+            raise FilesCheckFailed(f"{name} doesn't contain RUNE record")
+        if len(positions['EVTH']) != len(positions['EVTE']):
+            raise FilesCheckFailed(
+                f"{name} contains {len(positions['EVTH'])} EVTH and {len(positions['EVTE'])} EVTE records"
+            )
+        last_rune = int(positions['RUNE'][-1])
+        last_block_idx, last_subblock_idx = divmod(last_rune, NSUBBLOCK)
+        tail_codes = np.concatenate(
+            (
+                self.subblock_codes[last_block_idx, last_subblock_idx + 1 :],
+                self.subblock_codes[last_block_idx + 1 :].ravel(),
+            )
+        )
+        if np.any(tail_codes != 0):
+            raise FilesCheckFailed(f"{name} contains non-empty subblocks after the last RUNE record")
+
+        if check_weights and self.is_thinned:
+            for particles in self.iter_particles():
+                weights = particles['weight']
+                bad_weights = ~np.isfinite(weights) | (weights <= 0)
+                if np.any(bad_weights):
+                    raise FilesCheckFailed(
+                        f"{name} contains {np.count_nonzero(bad_weights)} particles with non-finite or non-positive "
+                        + f"weight, e.g. {weights[bad_weights][0]}"
+                    )
+
+    def stats(self) -> ParticleFileStats:
+        stats = ParticleFileStats(n_blocks=self.n_blocks, n_subblocks=self.subblock_counts())
+        if self.is_thinned:
+            stats.total_weight = 0.0
+            stats.max_weight = 0.0
+        for particles in self.iter_particles():
+            stats.n_particles += len(particles)
+            ids = (particles['description'] // 1000).astype(np.int64)
+            if len(ids) and ids.min() >= 0:
+                counts = np.bincount(ids)
+                ids = np.flatnonzero(counts)
+                counts = counts[ids]
+            else:
+                ids, counts = np.unique(ids, return_counts=True)
+            for id_, count in zip(ids.tolist(), counts.tolist()):
+                stats.n_particles_by_id[id_] = stats.n_particles_by_id.get(id_, 0) + count
+            if self.is_thinned and len(particles):
+                weights = particles['weight'].astype(np.float64)
+                stats.total_weight += float(weights.sum())
+                stats.max_weight = max(stats.max_weight, float(weights.max()))
+        return stats
+
+
+def check_particle_file_integrity(particle_file: Path, check_weights: bool = True):
+    ParticleFile(particle_file).check_integrity(check_weights)
+
+
+# single-pass splitting, equivalent to corsika_split_th.c
+
+
+@dataclass
+class SplitPart:
+    path: Path
+    n_particle_subblocks: int
+    subblocks_range: slice  # flat subblock positions in source file, may include header subblocks to skip
+    n_headers_in_range: int
+    record_bytes: int
+
+    @property
+    def n_subblocks(self) -> int:
+        # RUNH, EVTH, particle subblocks, EVTE and RUNE, padded with zero subblocks to the full record
+        return ceil((self.n_particle_subblocks + 4) / NSUBBLOCK) * NSUBBLOCK
+
+    @property
+    def size(self) -> int:
+        return self.n_subblocks // NSUBBLOCK * self.record_bytes
+
+    @property
+    def size_up_to_rune(self) -> int:
+        subblock_bytes = (self.record_bytes - 2 * WORD_BYTES) // NSUBBLOCK
+        n_padding_subblocks = self.n_subblocks - (self.n_particle_subblocks + 4)
+        return self.size - WORD_BYTES - n_padding_subblocks * subblock_bytes
+
+
+@dataclass
+class SplitPlan:
+    source: ParticleFile
+    headers: Dict[str, np.ndarray]
+    parts: List[SplitPart]
+
+    @property
+    def marker(self) -> bytes:
+        return np.array([self.source.block_length], dtype='<i4').tobytes()
+
+
+def _split_points(n_particle_subblocks: int, n_parts: int) -> List[int]:
+    """Numbers of particle subblocks (1-based) after which corsika_split_th.c switches to the next part"""
+    split_points = []
+    for part_idx in range(1, n_parts):
+        split_point = max(
+            ceil(part_idx * n_particle_subblocks / n_parts) + 1, split_points[-1] + 1 if split_points else 0
+        )
+        if split_point > n_particle_subblocks:
+            break
+        split_points.append(split_point)
+    return split_points
+
+
+def plan_split(particle_file: Path, outputs: List[Path]) -> SplitPlan:
+    """Read headers and compute part boundaries without reading the bulk of the particle file
+
+    Header records are read from the first record and the file tail (where CORSIKA writes LONG, EVTE and RUNE), so
+    the number of particle subblocks and hence part boundaries are known before streaming through the file.
+    Parts list is shorter than outputs if there are too few particle subblocks, as with corsika_split_th.c.
+    """
+    pf = ParticleFile(particle_file)
+    if pf.trailing_bytes:
+        raise FilesCheckFailed(f"{pf.path.name} is truncated: {pf.trailing_bytes} bytes after the last full record")
+    codes = pf.subblock_codes
+
+    tail_start = pf.n_blocks
+    tail_headers = set()
+    while tail_start > 1:
+        block_headers = {HEADER_NAMES_BY_CODE.get(int(code)) for code in codes[tail_start - 1]} - {None}
+        if not block_headers and {'EVTE', 'RUNE'} <= tail_headers:
+            break
+        tail_headers |= block_headers
+        tail_start -= 1
+
+    header_positions = {name: [] for name in HEADER_NAMES}
+    for block_idx in [0] + list(range(max(tail_start, 1), pf.n_blocks)):
+        for subblock_idx, code in enumerate(codes[block_idx]):
+            if int(code) in HEADER_NAMES_BY_CODE:
+                header_positions[HEADER_NAMES_BY_CODE[int(code)]].append(block_idx * NSUBBLOCK + subblock_idx)
+    headers: Dict[str, np.ndarray] = {}
+    for name in ('RUNH', 'EVTH', 'EVTE', 'RUNE'):
+        if not header_positions[name]:
+            raise FilesCheckFailed(f"{pf.path.name} doesn't contain {name} record")
+        last_position = divmod(header_positions[name][-1], NSUBBLOCK)  # the last one is used, as in C routine
+        headers[name] = np.array(pf.subblocks[last_position])
+    all_header_positions = sorted(sum(header_positions.values(), []))
+
+    def flat_position(particle_subblock_idx: int) -> int:
+        position = particle_subblock_idx
+        for header_position in all_header_positions:
+            if header_position <= position:
+                position += 1
+            else:
+                break
+        return position
+
+    n_particle_subblocks = pf.n_subblocks - len(all_header_positions)
+    part_ends = _split_points(n_particle_subblocks, len(outputs)) + [n_particle_subblocks]
+    parts: List[SplitPart] = []
+    part_start = 0
+    for output, part_end in zip(outputs, part_ends):
+        if part_end > part_start:
+            subblocks_range = slice(flat_position(part_start), flat_position(part_end - 1) + 1)
+        else:
+            subblocks_range = slice(0, 0)
+        parts.append(
+            SplitPart(
+                path=output,
+                n_particle_subblocks=part_end - part_start,
+                subblocks_range=subblocks_range,
+                n_headers_in_range=sum(subblocks_range.start < p < subblocks_range.stop for p in all_header_positions),
+                record_bytes=pf.record_bytes,
+            )
+        )
+        part_start = part_end
+    return SplitPlan(source=pf, headers=headers, parts=parts)
+
+
+class _SplitPartWriter:
+    """Writes subblocks into a particle file part, framing them into records exactly like corsika_split_th.c does"""
+
+    def __init__(self, f: BinaryIO, plan: SplitPlan):
+        self.f = f
+        self.marker = plan.marker
+        self.f.write(self.marker)
+        self.f.write(plan.headers['RUNH'].tobytes())
+        self.f.write(plan.headers['EVTH'].tobytes())
+        self.n_subblocks = 2  # within current record
+
+    def write(self, subblocks: np.ndarray):
+        written = 0
+        while written < len(subblocks):
+            batch = min(len(subblocks) - written, NSUBBLOCK - self.n_subblocks)
+            self.f.write(subblocks[written : written + batch].tobytes())
+            written += batch
+            self.n_subblocks += batch
+            if self.n_subblocks == NSUBBLOCK:
+                self.n_subblocks = 0
+                self.f.write(self.marker * 2)
+
+    def finish(self, plan: SplitPlan):
+        self.write(plan.headers['EVTE'][np.newaxis, :])
+        run_end = plan.headers['RUNE']
+        self.f.write(run_end.tobytes())
+        self.n_subblocks += 1
+        self.f.write(bytes(run_end.nbytes * (NSUBBLOCK - self.n_subblocks)))
+        self.f.write(self.marker)
+
+
+def write_split_part(plan: SplitPlan, part: SplitPart, f: BinaryIO, chunk_blocks: int = DEFAULT_CHUNK_BLOCKS):
+    """Stream one part into a binary file object; parts are independent and may be written concurrently"""
+    pf = plan.source
+    writer = _SplitPartWriter(f, plan)
+    n_headers_seen = 0
+    start_block = part.subblocks_range.start // NSUBBLOCK
+    stop_block = ceil(part.subblocks_range.stop / NSUBBLOCK)
+    for block_start in range(start_block, stop_block, chunk_blocks):
+        chunk = slice(block_start, min(block_start + chunk_blocks, stop_block))
+        if np.any(pf.leading_markers[chunk] != pf.block_length) or np.any(
+            pf.trailing_markers[chunk] != pf.block_length
+        ):
+            raise FilesCheckFailed(f"{pf.path.name} contains records with bad length markers")
+        in_part = slice(
+            max(part.subblocks_range.start - chunk.start * NSUBBLOCK, 0),
+            part.subblocks_range.stop - chunk.start * NSUBBLOCK,
+        )
+        is_particle_subblock = ~np.isin(pf.subblock_codes[chunk].ravel()[in_part], _HEADER_CODES_ARRAY)
+        n_headers_seen += int(np.count_nonzero(~is_particle_subblock))
+        if n_headers_seen > part.n_headers_in_range:
+            raise FilesCheckFailed(
+                f"{pf.path.name} contains header records in the middle of the file, it can't be split in a single pass"
+            )
+        writer.write(pf.subblocks[chunk].reshape(-1, pf.subblock_words)[in_part][is_particle_subblock])
+    writer.finish(plan)
+
+
+def split_particle_file(
+    particle_file: Path, outputs: List[Path], chunk_blocks: int = DEFAULT_CHUNK_BLOCKS
+) -> List[Path]:
+    """Single-pass equivalent of corsika_split_th.c producing byte-identical parts
+
+    Returns list of actually written parts, which is shorter than outputs if there are too few particle subblocks.
+    """
+    plan = plan_split(particle_file, outputs)
+    for part in plan.parts:
+        with open(part.path, 'wb') as f:
+            write_split_part(plan, part, f, chunk_blocks)
+    return [part.path for part in plan.parts]
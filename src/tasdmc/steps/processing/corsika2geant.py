@@ -1,7 +1,6 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from pathlib import Path
-from gdown.cached_download import assert_md5sum
 
 from typing import List
 
@@ -129,4 +128,6 @@ def _validate_sdgeant():
     assert (
         fileio.DataFiles.sdgeant.exists()
     ), f"{fileio.DataFiles.sdgeant} file not found, use 'tasdmc download-data-files'"
+    from gdown.cached_download import assert_md5sum
+
     assert_md5sum(fileio.DataFiles.sdgeant, '0cebc42f86e227e2fb2397dd46d7d981', quiet=True)
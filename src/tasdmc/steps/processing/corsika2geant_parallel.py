@@ -1,19 +1,21 @@
 from __future__ import annotations
+import os
+import hashlib
+import subprocess
 from dataclasses import dataclass
 from pathlib import Path
 
-from typing import List
+from typing import List, Optional, Tuple, Union
 
-from tasdmc import fileio
-from tasdmc.subprocess_utils import execute_routine, Pipes
+from tasdmc import config, fileio
+from tasdmc.subprocess_utils import execute_routine, start_routine, open_fifo_for_reading, open_fifo_for_writing, Pipes
 from tasdmc.steps.base import NotAllRetainedFiles, PipelineStep, files_dataclass
 from tasdmc.steps.utils import check_file_is_empty, check_last_line_contains
-from tasdmc.utils import concatenate_and_hash
+from tasdmc.utils import concatenate_and_hash, batches
 
-from .dethinning import DethinningOutputFiles, DethinningStep
+from .dethinning import SplitParticleFile, DethinningOutputFiles, DethinningStep
 from .corsika2geant import C2GOutputFiles, _validate_sdgeant
 
-
 # process separate dethinned particle files and produce partial files
 
 
@@ -40,6 +42,16 @@ class PartialTileFile(NotAllRetainedFiles):
             corsika_event_name=corsika_event_name,
         )
 
+    @classmethod
+    def for_merge_tree_node(cls, corsika_event_name: str, level: int, index: int) -> PartialTileFile:
+        ptile = str(fileio.c2g_output_files_dir() / f'{corsika_event_name}.merged_{level}_{index:02d}.partial_tile')
+        return PartialTileFile(
+            partial_tile=Path(ptile),
+            stdout=Path(ptile + '.stdout'),
+            stderr=Path(ptile + '.stderr'),
+            corsika_event_name=corsika_event_name,
+        )
+
     def _check_contents(self):
         check_file_is_empty(self.stderr, ignore_strings=['$$$ dst_get_block_ : End of input file reached'])
         check_last_line_contains(self.stdout, 'OK')
@@ -66,7 +78,8 @@ class Corsika2GeantParallelProcessStep(PipelineStep):
         with Pipes(self.output.stdout, self.output.stderr) as (stdout, stderr):
             execute_routine(
                 'corsika2geant_parallel_process.run',
-                [self.input_.dethinned_particle, fileio.DataFiles.sdgeant, self.output.partial_tile],
+                [self.input_.dethinned_particle, fileio.DataFiles.sdgeant, self.output.partial_tile]
+                + _merge_tree_args(),
                 stdout,
                 stderr,
             )
@@ -79,6 +92,70 @@ class Corsika2GeantParallelProcessStep(PipelineStep):
         _validate_sdgeant()
 
 
+# piped mode: dethinning output is relayed into partial tile file generation and never lands on disk
+
+_RELAY_CHUNK_SIZE = 2**20
+
+
+def run_dethinning_piped_into_tiling(split_particle_file: SplitParticleFile, dethinning_output: DethinningOutputFiles):
+    """Run dethinning and partial tile file generation routines together, relaying dethinned particles between
+    them through named pipes
+
+    Dethinned particle file never lands on disk, but .deleted file and input hash are created for it as if it was
+    processed and deleted in a regular way, so Corsika2GeantParallelProcessStep treats its output as already
+    produced. Since dethinned file size is not known in advance, full contents md5 is recorded in .deleted file.
+    """
+    partial_tile = PartialTileFile.from_dethinning_output(dethinning_output)
+    tiling_fifo = dethinning_output.dethinned_particle
+    dethinning_fifo = Path(str(tiling_fifo) + '.fifo')
+    for fifo in (dethinning_fifo, tiling_fifo):
+        fifo.unlink(missing_ok=True)
+        os.mkfifo(fifo)
+
+    partial_tile.prepare_for_step_run()
+    hasher = hashlib.md5()
+    size = 0
+    try:
+        with Pipes(dethinning_output.stdout, dethinning_output.stderr) as (
+            dethinning_stdout,
+            dethinning_stderr,
+        ), Pipes(partial_tile.stdout, partial_tile.stderr) as (tiling_stdout, tiling_stderr):
+            dethinning = start_routine(
+                'dethinning.run', [split_particle_file.particle, dethinning_fifo], dethinning_stdout, dethinning_stderr
+            )
+            tiling = start_routine(
+                'corsika2geant_parallel_process.run',
+                [tiling_fifo, fileio.DataFiles.sdgeant, partial_tile.partial_tile] + _merge_tree_args(),
+                tiling_stdout,
+                tiling_stderr,
+            )
+            try:
+                with open_fifo_for_reading(dethinning_fifo, dethinning) as source, open_fifo_for_writing(
+                    tiling_fifo, tiling
+                ) as sink:
+                    while True:
+                        chunk = source.read(_RELAY_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        hasher.update(chunk)
+                        sink.write(chunk)
+                        size += len(chunk)
+                for process in (dethinning, tiling):
+                    if process.wait() != 0:
+                        raise subprocess.CalledProcessError(process.returncode, process.args)
+            except Exception:
+                dethinning.kill()
+                tiling.kill()
+                raise
+    finally:
+        dethinning_fifo.unlink(missing_ok=True)
+        tiling_fifo.unlink(missing_ok=True)
+
+    dethinning_output.mark_deleted(dethinning_output.dethinned_particle, size=size, contents_hash=hasher.hexdigest())
+    partial_tile.assert_files_are_ready()
+    dethinning_output.store_contents_hash()  # as if Corsika2GeantParallelProcessStep was run with this input
+
+
 # merge partial tile files into one final tile
 
 
@@ -102,13 +179,13 @@ class PartialTileFileSet(NotAllRetainedFiles):
             f.writelines([f'{ptf.partial_tile}\n' for ptf in self.partial_tile_files])
 
     @classmethod
-    def from_partial_tile_files(cls, ptfs: List[PartialTileFile]) -> PartialTileFileSet:
+    def from_partial_tile_files(cls, ptfs: List[PartialTileFile], listing: Optional[Path] = None) -> PartialTileFileSet:
         if len(ptfs) == 0:
             raise ValueError("Cannot create PartialTileFileSet from empty list of PartialTileFile objects")
         corsika_event_name = ptfs[0].corsika_event_name
         return PartialTileFileSet(
             ptfs,
-            listing=fileio.c2g_output_files_dir() / (corsika_event_name + ".partial_tiles_list"),
+            listing=listing or fileio.c2g_output_files_dir() / (corsika_event_name + ".partial_tiles_list"),
             corsika_event_name=corsika_event_name,
         )
 
@@ -122,6 +199,61 @@ class PartialTileFileSet(NotAllRetainedFiles):
         return concatenate_and_hash(dethinning_output_hashes)
 
 
+@dataclass
+class Corsika2GeantParallelPartialMergeStep(PipelineStep):
+    """Intermediate node of partial tile files merge tree, merging several partial tile files into one"""
+
+    input_: PartialTileFileSet
+    output: PartialTileFile
+
+    @classmethod
+    def from_partial_tile_steps(
+        cls, partial_tile_steps: List[PartialTileStep], level: int, index: int
+    ) -> Corsika2GeantParallelPartialMergeStep:
+        output = PartialTileFile.for_merge_tree_node(partial_tile_steps[0].output.corsika_event_name, level, index)
+        return Corsika2GeantParallelPartialMergeStep(
+            input_=PartialTileFileSet.from_partial_tile_files(
+                [step.output for step in partial_tile_steps], listing=Path(str(output.partial_tile) + 's_list')
+            ),
+            output=output,
+            previous_steps=partial_tile_steps,
+        )
+
+    @property
+    def description(self) -> str:
+        return (
+            f"Merging {len(self.input_.partial_tile_files)} partial tile files "
+            + f"into {self.output.partial_tile.name}"
+        )
+
+    def _run(self):
+        with Pipes(self.output.stdout, self.output.stderr) as (stdout, stderr):
+            if _merge_engine_from_config() == 'numpy':
+                from tasdmc.steps.tile_file import merge_partial_tile_files
+
+                merge_partial_tile_files(
+                    [ptf.partial_tile for ptf in self.input_.partial_tile_files],
+                    self.output.partial_tile,
+                    partial_output=True,
+                )
+                stdout.write("OK")
+            else:
+                self.input_.create_listing_file()
+                execute_routine(
+                    'corsika2geant_parallel_merge.run',
+                    [self.input_.listing, self.output.partial_tile, '--partial'],
+                    stdout,
+                    stderr,
+                )
+                self.input_.listing.unlink()
+
+    def _post_run(self):
+        self.input_.delete_not_retained_files()
+
+
+PartialTileStep = Union[Corsika2GeantParallelProcessStep, Corsika2GeantParallelPartialMergeStep]
+
+
 @dataclass
 class Corsika2GeantParallelMergeStep(PipelineStep):
     input_: PartialTileFileSet
@@ -129,7 +261,7 @@ class Corsika2GeantParallelMergeStep(PipelineStep):
 
     @classmethod
     def from_c2g_parallel_process_steps(
-        cls, c2g_p_process_steps: List[Corsika2GeantParallelProcessStep]
+        cls, c2g_p_process_steps: List[PartialTileStep]
     ) -> Corsika2GeantParallelMergeStep:
         input_ = PartialTileFileSet.from_partial_tile_files([step.output for step in c2g_p_process_steps])
         return Corsika2GeantParallelMergeStep(
@@ -138,20 +270,82 @@ class Corsika2GeantParallelMergeStep(PipelineStep):
             previous_steps=c2g_p_process_steps,
         )
 
+    @classmethod
+    def with_merge_tree_from_c2g_parallel_process_steps(
+        cls, c2g_p_process_steps: List[Corsika2GeantParallelProcessStep]
+    ) -> Tuple[List[Corsika2GeantParallelPartialMergeStep], Corsika2GeantParallelMergeStep]:
+        """Build k-ary merge tree of partial tile files; intermediate merge steps are returned in level order
+        (i.e. each step comes after all steps it depends on), the root step produces the final tile file
+        """
+        arity = _merge_tree_arity_from_config()
+        level_steps: List[PartialTileStep] = list(c2g_p_process_steps)
+        partial_merge_steps: List[Corsika2GeantParallelPartialMergeStep] = []
+        level = 1
+        while arity and len(level_steps) > arity:
+            next_level_steps: List[PartialTileStep] = []
+            for index, group in enumerate(batches(level_steps, arity)):
+                if len(group) == 1:  # leftover step is merged on the next level
+                    next_level_steps.append(group[0])
+                    continue
+                partial_merge = Corsika2GeantParallelPartialMergeStep.from_partial_tile_steps(group, level, index)
+                partial_merge_steps.append(partial_merge)
+                next_level_steps.append(partial_merge)
+            level_steps = next_level_steps
+            level += 1
+        return partial_merge_steps, cls.from_c2g_parallel_process_steps(level_steps)
+
     @property
     def description(self) -> str:
         return f"Merging partial tile files into final tile for {self.input_.corsika_event_name}"
 
     def _run(self):
-        self.input_.create_listing_file()
         with Pipes(self.output.stdout, self.output.stderr) as (stdout, stderr):
-            execute_routine(
-                'corsika2geant_parallel_merge.run',
-                [self.input_.listing, self.output.tile],
-                stdout,
-                stderr,
-            )
-        self.input_.listing.unlink()
+            if _merge_engine_from_config() == 'numpy':
+                from tasdmc.steps.tile_file import merge_partial_tile_files
+
+                merge_partial_tile_files(
+                    [ptf.partial_tile for ptf in self.input_.partial_tile_files],
+                    self.output.tile,
+                    merge_tree=bool(_merge_tree_arity_from_config()),
+                )
+                stdout.write("OK")
+            else:
+                self.input_.create_listing_file()
+                execute_routine(
+                    'corsika2geant_parallel_merge.run',
+                    [self.input_.listing, self.output.tile] + _merge_tree_args(),
+                    stdout,
+                    stderr,
+                )
+                self.input_.listing.unlink()
 
     def _post_run(self):
         self.input_.delete_not_retained_files()
+
+    @classmethod
+    def validate_config(cls):
+        _merge_tree_arity_from_config()
+        _merge_engine_from_config()
+
+
+def _merge_tree_arity_from_config() -> int:
+    arity = config.get_key('pipeline.partial_tiles_merge_arity', default=0)
+    if isinstance(arity, int) and (arity == 0 or arity >= 2):
+        return arity
+    else:
+        raise ValueError("pipeline.partial_tiles_merge_arity is expected to be 0 (no merge tree) or integer >= 2")
+
+
+def _merge_tree_args() -> List[str]:
+    """Partial tile files for the merge tree have quantized min arrival times and are merged accordingly;
+    the flat merge keeps routines' default behavior, so that partial tile files of runs in progress stay compatible
+    """
+    return ['--merge-tree'] if _merge_tree_arity_from_config() else []
+
+
+def _merge_engine_from_config() -> str:
+    engine = config.get_key('pipeline.partial_tiles_merge_engine', default='cpp')
+    if engine in {'cpp', 'numpy'}:
+        return engine
+    else:
+        raise ValueError("pipeline.partial_tiles_merge_engine is expected to be either 'cpp' or 'numpy'")
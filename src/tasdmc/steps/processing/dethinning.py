@@ -1,16 +1,30 @@
 from __future__ import annotations
+import os
 from dataclasses import dataclass
 from pathlib import Path
+from contextlib import ExitStack
+from concurrent.futures import ThreadPoolExecutor
+import subprocess
 
-from typing import List
+from typing import List, BinaryIO
 
-from tasdmc import fileio
-from tasdmc.subprocess_utils import execute_routine, Pipes
+from tasdmc import config, fileio
+from tasdmc.subprocess_utils import execute_routine, start_routine, open_fifo_for_writing, Pipes
 
 from tasdmc.steps.base import NotAllRetainedFiles, PipelineStep, files_dataclass
-from tasdmc.steps.utils import check_particle_file_contents, check_file_is_empty, check_last_line_contains
+from tasdmc.steps.exceptions import FilesCheckFailed
+from tasdmc.steps.utils import (
+    check_particle_file_contents,
+    check_file_is_empty,
+    check_last_line_contains,
+    StreamingContentsHasher,
+)
 
-from .particle_file_splitting import SplitParticleFiles, ParticleFileSplittingStep
+from .particle_file_splitting import (
+    SplitParticleFiles,
+    ParticleFileSplittingStep,
+    _streamed_dethinning_from_config,
+)
 
 
 @files_dataclass
@@ -32,8 +46,18 @@ class DethinningOutputFiles(NotAllRetainedFiles):
     stdout: Path
     stderr: Path
 
+    piped_into_tiling: bool = False
+
+    @property
+    def must_exist(self) -> List[Path]:
+        if self.piped_into_tiling:
+            return [self.stdout, self.stderr]
+        return self.all_files
+
     @property
     def not_retained(self) -> List[Path]:
+        if self.piped_into_tiling:
+            return []
         return [self.dethinned_particle]
 
     @classmethod
@@ -44,12 +68,17 @@ class DethinningOutputFiles(NotAllRetainedFiles):
             dethinned_particle=dethinning_dir / (particle_file_name + '.dethinned'),
             stdout=dethinning_dir / (particle_file_name + '.dethin.stdout'),
             stderr=dethinning_dir / (particle_file_name + '.dethin.stderr'),
+            piped_into_tiling=_piped_into_tiling_from_config(),
         )
 
     def _check_contents(self):
         check_file_is_empty(self.stderr)
         check_last_line_contains(self.stdout, 'OK')
-        check_particle_file_contents(self.dethinned_particle)
+        if self.piped_into_tiling:
+            if not self._with_deleted_suffix(self.dethinned_particle).exists():
+                raise FilesCheckFailed(f"{self.dethinned_particle.name} was piped into tiling but has no .deleted file")
+        else:
+            check_particle_file_contents(self.dethinned_particle)
 
 
 @dataclass
@@ -71,11 +100,120 @@ class DethinningStep(PipelineStep):
 
     @property
     def description(self) -> str:
+        if self.output.piped_into_tiling:
+            return f"Dethinning {self.input_.particle.name} piped into partial tile file generation"
         return f"Dethinning {self.input_.particle.name}"
 
     def _run(self):
+        if self.output.piped_into_tiling:
+            from .corsika2geant_parallel import run_dethinning_piped_into_tiling
+
+            run_dethinning_piped_into_tiling(self.input_, self.output)
+            return
         with Pipes(self.output.stdout, self.output.stderr) as (stdout, stderr):
             execute_routine('dethinning.run', [self.input_.particle, self.output.dethinned_particle], stdout, stderr)
 
     def _post_run(self):
         self.input_.delete_not_retained_files()
+
+    @classmethod
+    def validate_config(cls):
+        _piped_into_tiling_from_config()
+
+
+def _piped_into_tiling_from_config() -> bool:
+    piped = config.get_key('dethinning.piped_into_tiling', default=False)
+    if not isinstance(piped, bool):
+        raise ValueError("dethinning.piped_into_tiling is expected to be boolean")
+    if piped and config.get_key("pipeline.legacy_corsika2geant", default=True):
+        raise ValueError("dethinning.piped_into_tiling requires pipeline.legacy_corsika2geant to be False")
+    if piped and _streamed_dethinning_from_config():
+        raise ValueError("dethinning.piped_into_tiling can't be used together with dethinning.streamed")
+    return piped
+
+
+# streamed mode: split parts go to dethinning through named pipes and never land on disk
+
+
+class _StreamedPartWriter:
+    """Hashes split part contents as if it was a regular file and writes them into named pipe; since dethinning
+    routine stops reading at RUNE record, pipe may be closed by the reader before trailing zero padding is written
+    """
+
+    def __init__(self, fifo: BinaryIO, size: int, size_up_to_rune: int):
+        self.fifo = fifo
+        self.hasher = StreamingContentsHasher(size)
+        self.size_up_to_rune = size_up_to_rune
+        self.reader_closed_pipe = False
+
+    def write(self, data: bytes):
+        if not self.reader_closed_pipe:
+            try:
+                self.fifo.write(data)
+            except BrokenPipeError:
+                if self.hasher.offset < self.size_up_to_rune:
+                    raise
+                self.reader_closed_pipe = True
+        self.hasher.update(data)
+
+    def close(self):
+        try:
+            self.fifo.close()
+        except BrokenPipeError:  # flushing buffered padding into closed pipe
+            pass
+
+
+def run_streamed_dethinning(particle_file: Path, split_files: SplitParticleFiles):
+    """Split particle file into named pipes read by concurrently running dethinning routines
+
+    Split parts never land on disk, but .deleted files and input hashes are created for them as if they were
+    dethinned and deleted in a regular way, so DethinningSteps treat their outputs as already produced.
+    """
+    from tasdmc.steps.particle_file import plan_split, write_split_part
+
+    plan = plan_split(particle_file, split_files.files)
+    split_particle_files = [SplitParticleFile(part.path) for part in plan.parts]
+    dethinning_outputs = [DethinningOutputFiles.from_particle_file(spf) for spf in split_particle_files]
+    for part in plan.parts:
+        part.path.unlink(missing_ok=True)
+        os.mkfifo(part.path)
+
+    with ExitStack() as stack:
+        dethinning_processes: List[subprocess.Popen] = []
+        for spf, output in zip(split_particle_files, dethinning_outputs):
+            output.prepare_for_step_run()
+            stdout, stderr = stack.enter_context(Pipes(output.stdout, output.stderr))
+            dethinning_processes.append(
+                start_routine('dethinning.run', [spf.particle, output.dethinned_particle], stdout, stderr)
+            )
+
+        def stream_part(part_idx: int) -> str:
+            part = plan.parts[part_idx]
+            writer = _StreamedPartWriter(
+                open_fifo_for_writing(part.path, dethinning_processes[part_idx]), part.size, part.size_up_to_rune
+            )
+            try:
+                write_split_part(plan, part, writer)
+            finally:
+                writer.close()
+            return writer.hasher.hexdigest()
+
+        try:
+            with ThreadPoolExecutor(max_workers=len(plan.parts)) as executor:
+                part_hashes = list(executor.map(stream_part, range(len(plan.parts))))
+            for process in dethinning_processes:
+                if process.wait() != 0:
+                    raise subprocess.CalledProcessError(process.returncode, process.args)
+        except Exception:
+            for process in dethinning_processes:
+                process.kill()
+            raise
+        finally:
+            for part in plan.parts:
+                part.path.unlink(missing_ok=True)
+
+    for output in dethinning_outputs:
+        output.assert_files_are_ready()
+    for spf, part, part_hash in zip(split_particle_files, plan.parts, part_hashes):
+        spf.mark_deleted(spf.particle, size=part.size, contents_hash=part_hash)
+        spf.store_contents_hash()  # as if DethinningStep was run with this input
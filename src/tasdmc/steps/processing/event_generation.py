@@ -8,20 +8,21 @@ import os
 import re
 import random
 import tarfile
-from gdown.cached_download import assert_md5sum
 
-from typing import List, Dict, Iterable, Tuple
+from typing import List, Dict, Iterable, Optional, TextIO, Tuple
 
 from tasdmc import fileio, config
 from tasdmc.steps.base import Files, PipelineStep, files_dataclass
 from tasdmc.steps.exceptions import FilesCheckFailed, BadDataFiles
 from tasdmc.steps.utils import check_file_is_empty, check_last_line_contains, check_dst_file_not_empty, passed
+from tasdmc.utils import batches
 from .corsika2geant import C2GOutputFiles, Corsika2GeantStep
 from .tothrow_generation import TothrowFile, TothrowGenerationStep
 
 from tasdmc.subprocess_utils import (
     concatenate_dst_files,
     list_events_in_dst_file,
+    validate_in_process_dst_io,
     UnlimitedStackSize,
 )
 
@@ -82,11 +83,10 @@ class EventFiles(Files):
     def from_input(cls, input_files: C2GOutputWithTothrowFiles) -> EventFiles:
         corsika_event_name = input_files.c2g_output.corsika_event_name
         calibration_by_epoch = _get_calibration_files_by_epoch()
-        max_epoch_len = len(str(max(calibration_by_epoch.keys())))
         events_file_by_epoch: Dict[int, Path] = {}
         events_log_by_epoch = {}
         for epoch in calibration_by_epoch.keys():
-            epoch_str = format(epoch, f"0{max_epoch_len}d")
+            epoch_str = _epoch_str(epoch, calibration_by_epoch)
             events_file_by_epoch[epoch] = fileio.events_dir() / f'{corsika_event_name}_epoch{epoch_str}.dst.gz'
         events_log_by_epoch = {k: Path(str(v) + '.log') for k, v in events_file_by_epoch.items()}
         return EventFiles(
@@ -105,15 +105,10 @@ class EventFiles(Files):
 
     def per_epoch_files(self) -> Iterable[Tuple[int, Path, Path, Path]]:
         """epoch number, events file, log file, calibration file"""
-        return (
-            (
-                epoch,
-                self.events_file_by_epoch[epoch],
-                self.events_log_by_epoch[epoch],
-                self.calibration_file_by_epoch[epoch],
-            )
-            for epoch in sorted(self.calibration_file_by_epoch.keys())
-        )
+        return _per_epoch_files(self.events_file_by_epoch, self.events_log_by_epoch, self.calibration_file_by_epoch)
+
+    def epoch_str(self, epoch: int) -> str:
+        return _epoch_str(epoch, self.calibration_file_by_epoch)
 
     def _check_contents(self):
         check_file_is_empty(
@@ -125,6 +120,27 @@ class EventFiles(Files):
         check_dst_file_not_empty(self.merged_events_file)
 
 
+def _per_epoch_files(
+    events_file_by_epoch: Dict[int, Path],
+    events_log_by_epoch: Dict[int, Path],
+    calibration_file_by_epoch: Dict[int, Path],
+) -> Iterable[Tuple[int, Path, Path, Path]]:
+    return (
+        (
+            epoch,
+            events_file_by_epoch[epoch],
+            events_log_by_epoch[epoch],
+            calibration_file_by_epoch[epoch],
+        )
+        for epoch in sorted(calibration_file_by_epoch.keys())
+    )
+
+
+def _epoch_str(epoch: int, calibration_file_by_epoch: Dict[int, Path]) -> str:
+    max_epoch_len = len(str(max(calibration_file_by_epoch.keys())))
+    return format(epoch, f"0{max_epoch_len}d")
+
+
 @dataclass
 class EventsGenerationStep(PipelineStep):
     input_: C2GOutputWithTothrowFiles
@@ -144,133 +160,9 @@ class EventsGenerationStep(PipelineStep):
         )
 
     def _run(self):
-        n_try = _n_try_from_config()
-        smear_energies = _smear_energies_from_config()
-        _, n_particles_per_epoch = self.input_.tothrow.get_showlib_and_nparticles()
         with open(self.output.log, 'w') as log, open(self.output.errorlog, 'w') as errorlog:
-            log.write(f"Poissonian mean N particles per epoch: {n_particles_per_epoch}\n")
-            # event generation happens on a per-epoch basis: for each calibration epoch found in calibration
-            # directory sdmc_spctr program is run
-            events_thrown_by_file = dict()
-            for epoch, epoch_events_file, epoch_log_file, sdcalib_file in self.output.per_epoch_files():
-                if (
-                    # it is possible for this step to be partially completed
-                    # this is probably not the best use of "step" abstraction, but here we are
-                    # when this hapens we attempt to spot per-epoch events that are already there
-                    # and not rerun them; no hashing is done here, we rely on following checks:
-                    # * log exists and ends with "Done"
-                    # * dst file exists and contains the same number of events as mentioned in the log (see later)
-                    epoch_log_file.exists()
-                    and passed(check_last_line_contains)(epoch_log_file, "Done")
-                    and epoch_events_file.exists()
-                    and passed(check_dst_file_not_empty)(epoch_events_file)
-                ):
-                    log.write(f'Events for epoch {epoch} ({sdcalib_file.name}) were already generated\n')
-                else:
-                    log.write(f'Generating events for epoch {epoch} ({sdcalib_file.name})\n')
-                    epoch_log_file.unlink(missing_ok=True)
-                    epoch_events_file.unlink(missing_ok=True)
-                    for i_try in range(1, n_try + 1):
-                        log.write(f'\tAttempt {i_try}/{n_try}\n')
-                        with UnlimitedStackSize(), Pipes(epoch_log_file, epoch_log_file, append=True) as (
-                            stdout,
-                            stderr,
-                        ):
-                            sdmc_spctr_res = execute_routine(
-                                _get_sdmc_spctr_executable(),
-                                [
-                                    self.input_.c2g_output.tile,
-                                    epoch_events_file,
-                                    n_particles_per_epoch,
-                                    random.randint(1, int(1e6)),
-                                    epoch,
-                                    sdcalib_file,
-                                    fileio.DataFiles.atmos,
-                                    1 if smear_energies else 0,
-                                    # TODO: azi.txt file may optionally be passed here
-                                ],
-                                stdout=stdout,
-                                stderr=stderr,
-                                global_=True,
-                                check_errors=False,
-                            )
-                        if sdmc_spctr_res.returncode == 0 and passed(check_last_line_contains)(epoch_log_file, "Done"):
-                            break
-                    else:
-                        errorlog.write(f'Events for epoch {epoch} not generated after {n_try} attempts\n')
-                        epoch_events_file.unlink(missing_ok=True)
-                        continue  # still trying to generate other epochs before failing the step completely
-
-                # counting how many events were actually thrown in the succesfull sdmc_spctr call
-                # NOTE: the distribution of N events thrown may not be actually Poisson due to many attempts made;
-                #       if, for example, attempts with larger N fail, the distribution will be skewed to the left from
-                #       the mean. this needs further investigation...
-                events_thrown_match = re.findall(r"^Number of Events Thrown: (\d*)$", epoch_log_file.read_text(), re.M)
-                if not events_thrown_match:
-                    errorlog.write(
-                        f'Events generated ({epoch_events_file}) but log does not contain a number of events thrown\n'
-                    )
-                    epoch_events_file.unlink(missing_ok=True)
-                    continue
-                events_thrown_from_log = int(events_thrown_match[-1])
-                events_thrown_from_dst = len(list_events_in_dst_file(epoch_events_file))
-                if events_thrown_from_log != events_thrown_from_dst:
-                    errorlog.write(
-                        f'N events thrown according to log ({events_thrown_from_log}) differs from N events in '
-                        + f'{epoch_events_file.name} ({events_thrown_from_dst})\n'
-                    )
-                    epoch_events_file.unlink(missing_ok=True)
-                    continue
-                events_thrown = events_thrown_from_dst
-
-                log.write(f'\tEvents actually generated: {events_thrown}\n')
-                events_thrown_by_file[epoch_events_file] = events_thrown
-
-                # if >0 events thrown, sort them by time
-                if events_thrown > 0:
-                    epoch_events_file_stem = epoch_events_file.name.split('.')[0]
-                    epoch_events_file_unsorted = epoch_events_file.parent / (
-                        epoch_events_file_stem + '_unsorted.dst.gz'
-                    )
-                    epoch_events_file.rename(epoch_events_file_unsorted)
-                    with Pipes(epoch_log_file, epoch_log_file, append=True) as (stdout, stderr):
-                        tsort_res = execute_routine(
-                            'sdmc_tsort.run',
-                            [epoch_events_file_unsorted, '-o1f', epoch_events_file],
-                            stdout,
-                            stderr,
-                            global_=True,
-                            check_errors=False,
-                        )
-                    epoch_events_file_unsorted.unlink(missing_ok=True)
-                    if tsort_res.returncode != 0:
-                        errorlog.write(
-                            f'Time-sorting of events in {epoch_events_file.name} failed, '
-                            + f'see details in {epoch_log_file.name}\n'
-                        )
-                        epoch_events_file.unlink(missing_ok=True)
-
-            # if events for all epochs were generated, merge them into one final file
-            if not all(epoch_events_file.exists() for _, epoch_events_file, *_ in self.output.per_epoch_files()):
-                errorlog.write('Events for some epochs were not generated\n')
-            else:
-                epoch_event_files_to_merge = [
-                    epoch_events_file
-                    for _, epoch_events_file, *_ in self.output.per_epoch_files()
-                    if events_thrown_by_file[epoch_events_file] > 0
-                ]
-                concatenate_dst_files(
-                    epoch_event_files_to_merge,
-                    self.output.merged_events_file,
-                    self.output.concat_log,
-                    self.output.concat_log,
-                )
-                with tarfile.open(self.output.logs_archive, 'w:gz') as tar:
-                    for _, epoch_events_file, epoch_log, _ in self.output.per_epoch_files():
-                        epoch_events_file.unlink()
-                        tar.add(epoch_log, epoch_log.name, recursive=False)
-                        epoch_log.unlink()
-                log.write("\nOK\n")
+            events_thrown_by_file = _generate_epochs_events(self.input_, self.output.per_epoch_files(), log, errorlog)
+            _merge_epochs_events(self.output, events_thrown_by_file, log, errorlog)
 
     @classmethod
     def validate_config(cls):
@@ -278,13 +170,321 @@ class EventsGenerationStep(PipelineStep):
             test_sdmc_spctr_runnable()
         _n_try_from_config()
         _smear_energies_from_config()
+        validate_in_process_dst_io()
         assert (
             fileio.DataFiles.atmos.exists()
         ), f"{fileio.DataFiles.atmos} file not found, use 'tasdmc download-data-files'"
+        from gdown.cached_download import assert_md5sum
+
         assert_md5sum(fileio.DataFiles.atmos, '254c7999be0a48bd65e4bc8cbea4867f', quiet=True)
         _get_calibration_files_by_epoch()
 
 
+# event generation may be split into steps each throwing events for a group of epochs, followed by a merge step
+
+
+@files_dataclass
+class EpochGroupEventFiles(Files):
+    log: Path
+    errorlog: Path
+    events_file_by_epoch: Dict[int, Path]
+    events_log_by_epoch: Dict[int, Path]
+
+    calibration_file_by_epoch: Dict[int, Path]
+
+    # merge step output, see files_were_produced
+    merged_events_file: Path
+    merge_log: Path
+
+    @property
+    def id_paths(self) -> List[Path]:
+        return [self.log, self.errorlog]
+
+    @property
+    def must_exist(self) -> List[Path]:
+        return self.id_paths  # per-epoch files are removed by the merge step
+
+    @property
+    def all_files(self) -> List[Path]:
+        return self.id_paths + [*self.events_file_by_epoch.values(), *self.events_log_by_epoch.values()]
+
+    @classmethod
+    def from_event_files(cls, event_files: EventFiles, epochs: List[int]) -> EpochGroupEventFiles:
+        corsika_event_name = event_files.merged_events_file.name.split('.')[0]
+        epochs_str = f"{event_files.epoch_str(epochs[0])}-{event_files.epoch_str(epochs[-1])}"
+        return EpochGroupEventFiles(
+            log=fileio.events_dir() / f'{corsika_event_name}.evgen.epochs{epochs_str}.stdout',
+            errorlog=fileio.events_dir() / f'{corsika_event_name}.evgen.epochs{epochs_str}.stderr',
+            events_file_by_epoch={epoch: event_files.events_file_by_epoch[epoch] for epoch in epochs},
+            events_log_by_epoch={epoch: event_files.events_log_by_epoch[epoch] for epoch in epochs},
+            calibration_file_by_epoch={epoch: event_files.calibration_file_by_epoch[epoch] for epoch in epochs},
+            merged_events_file=event_files.merged_events_file,
+            merge_log=event_files.log,
+        )
+
+    def prepare_for_step_run(self):
+        self.errorlog.unlink(missing_ok=True)
+
+    def per_epoch_files(self) -> Iterable[Tuple[int, Path, Path, Path]]:
+        """epoch number, events file, log file, calibration file"""
+        return _per_epoch_files(self.events_file_by_epoch, self.events_log_by_epoch, self.calibration_file_by_epoch)
+
+    def files_were_produced(self) -> bool:
+        # per-epoch files are deleted by the merge step, so without them the group is only considered produced
+        # if they were merged; otherwise the group is rerun, so that the merge step can be (re)run too
+        epoch_files = [*self.events_file_by_epoch.values(), *self.events_log_by_epoch.values()]
+        if not all(f.exists() for f in epoch_files) and not self._merge_completed():
+            return False
+        return super().files_were_produced()
+
+    def _merge_completed(self) -> bool:
+        if not self.merged_events_file.exists() or not self.merge_log.exists():
+            return False
+        try:
+            check_last_line_contains(self.merge_log, "OK")
+            return True
+        except FilesCheckFailed:
+            return False
+
+    def _check_contents(self):
+        check_file_is_empty(
+            self.errorlog,
+            ignore_strings=["$$$ dst_get_block_ : End of input file reached"],
+            include_file_contents_in_error=True,
+        )
+        check_last_line_contains(self.log, "OK")
+
+
+@dataclass
+class EventsGenerationEpochGroupStep(PipelineStep):
+    input_: C2GOutputWithTothrowFiles
+    output: EpochGroupEventFiles
+
+    @property
+    def description(self) -> str:
+        epochs = sorted(self.output.events_file_by_epoch.keys())
+        return (
+            f"Throwing CORSIKA shower {self.input_.c2g_output.corsika_event_name} on SD grid "
+            + f"to produce MC events for epochs {epochs[0]}-{epochs[-1]}"
+        )
+
+    def _run(self):
+        with open(self.output.log, 'w') as log, open(self.output.errorlog, 'w') as errorlog:
+            events_thrown_by_file = _generate_epochs_events(self.input_, self.output.per_epoch_files(), log, errorlog)
+            if len(events_thrown_by_file) == len(self.output.events_file_by_epoch):
+                log.write("\nOK\n")
+
+    @classmethod
+    def validate_config(cls):
+        EventsGenerationStep.validate_config()
+        epoch_group_size_from_config()
+
+
+@files_dataclass
+class EpochGroupEventFilesSet(Files):
+    groups: List[EpochGroupEventFiles]
+
+    @property
+    def all_files(self) -> List[Path]:  # per-epoch files are removed after merging, logs remain
+        return [group.log for group in self.groups]
+
+
+@dataclass
+class EventsGenerationMergeStep(PipelineStep):
+    input_: EpochGroupEventFilesSet
+    output: EventFiles
+
+    @property
+    def description(self) -> str:
+        return (
+            f"Merging MC events generated in {len(self.input_.groups)} epoch groups "
+            + f"into {self.output.merged_events_file.name}"
+        )
+
+    @classmethod
+    def with_epoch_group_steps(
+        cls, c2g_step: Corsika2GeantStep, tothrow_step: TothrowGenerationStep
+    ) -> Tuple[List[EventsGenerationEpochGroupStep], EventsGenerationMergeStep]:
+        input_ = C2GOutputWithTothrowFiles(c2g_step.output, tothrow_step.output)
+        event_files = EventFiles.from_input(input_)
+        epochs = sorted(event_files.calibration_file_by_epoch.keys())
+        epoch_group_steps = [
+            EventsGenerationEpochGroupStep(
+                input_=input_,
+                output=EpochGroupEventFiles.from_event_files(event_files, epochs_group),
+                previous_steps=[tothrow_step, c2g_step],
+            )
+            for epochs_group in batches(epochs, epoch_group_size_from_config())
+        ]
+        merge_step = EventsGenerationMergeStep(
+            input_=EpochGroupEventFilesSet([step.output for step in epoch_group_steps]),
+            output=event_files,
+            previous_steps=epoch_group_steps,
+        )
+        return epoch_group_steps, merge_step
+
+    def _run(self):
+        with open(self.output.log, 'w') as log, open(self.output.errorlog, 'w') as errorlog:
+            events_thrown_by_file = dict()
+            for epoch, epoch_events_file, epoch_log_file, _ in self.output.per_epoch_files():
+                if not epoch_events_file.exists():
+                    continue
+                events_thrown = _events_thrown_from_epoch_log(epoch_log_file)
+                if events_thrown is None:
+                    errorlog.write(f'Log for epoch {epoch} does not contain a number of events thrown\n')
+                    return
+                events_thrown_by_file[epoch_events_file] = events_thrown
+            log.write(f"Merging events for {len(events_thrown_by_file)} epochs\n")
+            _merge_epochs_events(self.output, events_thrown_by_file, log, errorlog)
+
+    @classmethod
+    def validate_config(cls):
+        validate_in_process_dst_io()
+
+
+def _generate_epochs_events(
+    input_: C2GOutputWithTothrowFiles,
+    per_epoch_files: Iterable[Tuple[int, Path, Path, Path]],
+    log: TextIO,
+    errorlog: TextIO,
+) -> Dict[Path, int]:
+    """Throw and time-sort events for each epoch, reusing already generated ones; returns numbers of events
+    thrown by epoch events file, epochs that failed are reported to errorlog and not included"""
+    n_try = _n_try_from_config()
+    smear_energies = _smear_energies_from_config()
+    _, n_particles_per_epoch = input_.tothrow.get_showlib_and_nparticles()
+    log.write(f"Poissonian mean N particles per epoch: {n_particles_per_epoch}\n")
+    # event generation happens on a per-epoch basis: for each calibration epoch found in calibration
+    # directory sdmc_spctr program is run
+    events_thrown_by_file = dict()
+    for epoch, epoch_events_file, epoch_log_file, sdcalib_file in per_epoch_files:
+        if (
+            # it is possible for this step to be partially completed
+            # this is probably not the best use of "step" abstraction, but here we are
+            # when this hapens we attempt to spot per-epoch events that are already there
+            # and not rerun them; no hashing is done here, we rely on following checks:
+            # * log exists and ends with "Done"
+            # * dst file exists and contains the same number of events as mentioned in the log (see later)
+            epoch_log_file.exists()
+            and passed(check_last_line_contains)(epoch_log_file, "Done")
+            and epoch_events_file.exists()
+            and passed(check_dst_file_not_empty)(epoch_events_file)
+        ):
+            log.write(f'Events for epoch {epoch} ({sdcalib_file.name}) were already generated\n')
+        else:
+            log.write(f'Generating events for epoch {epoch} ({sdcalib_file.name})\n')
+            epoch_log_file.unlink(missing_ok=True)
+            epoch_events_file.unlink(missing_ok=True)
+            for i_try in range(1, n_try + 1):
+                log.write(f'\tAttempt {i_try}/{n_try}\n')
+                with UnlimitedStackSize(), Pipes(epoch_log_file, epoch_log_file, append=True) as (
+                    stdout,
+                    stderr,
+                ):
+                    sdmc_spctr_res = execute_routine(
+                        _get_sdmc_spctr_executable(),
+                        [
+                            input_.c2g_output.tile,
+                            epoch_events_file,
+                            n_particles_per_epoch,
+                            random.randint(1, int(1e6)),
+                            epoch,
+                            sdcalib_file,
+                            fileio.DataFiles.atmos,
+                            1 if smear_energies else 0,
+                            # TODO: azi.txt file may optionally be passed here
+                        ],
+                        stdout=stdout,
+                        stderr=stderr,
+                        global_=True,
+                        check_errors=False,
+                    )
+                if sdmc_spctr_res.returncode == 0 and passed(check_last_line_contains)(epoch_log_file, "Done"):
+                    break
+            else:
+                errorlog.write(f'Events for epoch {epoch} not generated after {n_try} attempts\n')
+                epoch_events_file.unlink(missing_ok=True)
+                continue  # still trying to generate other epochs before failing the step completely
+
+        # counting how many events were actually thrown in the succesfull sdmc_spctr call
+        # NOTE: the distribution of N events thrown may not be actually Poisson due to many attempts made;
+        #       if, for example, attempts with larger N fail, the distribution will be skewed to the left from
+        #       the mean. this needs further investigation...
+        events_thrown_from_log = _events_thrown_from_epoch_log(epoch_log_file)
+        if events_thrown_from_log is None:
+            errorlog.write(
+                f'Events generated ({epoch_events_file}) but log does not contain a number of events thrown\n'
+            )
+            epoch_events_file.unlink(missing_ok=True)
+            continue
+        events_thrown_from_dst = len(list_events_in_dst_file(epoch_events_file))
+        if events_thrown_from_log != events_thrown_from_dst:
+            errorlog.write(
+                f'N events thrown according to log ({events_thrown_from_log}) differs from N events in '
+                + f'{epoch_events_file.name} ({events_thrown_from_dst})\n'
+            )
+            epoch_events_file.unlink(missing_ok=True)
+            continue
+        events_thrown = events_thrown_from_dst
+
+        log.write(f'\tEvents actually generated: {events_thrown}\n')
+        events_thrown_by_file[epoch_events_file] = events_thrown
+
+        # if >0 events thrown, sort them by time
+        if events_thrown > 0:
+            epoch_events_file_stem = epoch_events_file.name.split('.')[0]
+            epoch_events_file_unsorted = epoch_events_file.parent / (epoch_events_file_stem + '_unsorted.dst.gz')
+            epoch_events_file.rename(epoch_events_file_unsorted)
+            with Pipes(epoch_log_file, epoch_log_file, append=True) as (stdout, stderr):
+                tsort_res = execute_routine(
+                    'sdmc_tsort.run',
+                    [epoch_events_file_unsorted, '-o1f', epoch_events_file],
+                    stdout,
+                    stderr,
+                    global_=True,
+                    check_errors=False,
+                )
+            epoch_events_file_unsorted.unlink(missing_ok=True)
+            if tsort_res.returncode != 0:
+                errorlog.write(
+                    f'Time-sorting of events in {epoch_events_file.name} failed, '
+                    + f'see details in {epoch_log_file.name}\n'
+                )
+                epoch_events_file.unlink(missing_ok=True)
+    return events_thrown_by_file
+
+
+def _events_thrown_from_epoch_log(epoch_log_file: Path) -> Optional[int]:
+    events_thrown_match = re.findall(r"^Number of Events Thrown: (\d*)$", epoch_log_file.read_text(), re.M)
+    if not events_thrown_match:
+        return None
+    return int(events_thrown_match[-1])
+
+
+def _merge_epochs_events(output: EventFiles, events_thrown_by_file: Dict[Path, int], log: TextIO, errorlog: TextIO):
+    # if events for all epochs were generated, merge them into one final file
+    if not all(epoch_events_file.exists() for _, epoch_events_file, *_ in output.per_epoch_files()):
+        errorlog.write('Events for some epochs were not generated\n')
+        return
+    epoch_event_files_to_merge = [
+        epoch_events_file
+        for _, epoch_events_file, *_ in output.per_epoch_files()
+        if events_thrown_by_file[epoch_events_file] > 0
+    ]
+    concatenate_dst_files(
+        epoch_event_files_to_merge,
+        output.merged_events_file,
+        output.concat_log,
+        output.concat_log,
+    )
+    with tarfile.open(output.logs_archive, 'w:gz') as tar:
+        for _, epoch_events_file, epoch_log, _ in output.per_epoch_files():
+            epoch_events_file.unlink()
+            tar.add(epoch_log, epoch_log.name, recursive=False)
+            epoch_log.unlink()
+    log.write("\nOK\n")
+
+
 def _n_try_from_config() -> int:
     n_try = int(config.get_key("throwing.sdmc_spctr_n_try", default=10))
     assert n_try > 0, f"throwing.sdmc_spctr_n_try must be non-negative int, but {n_try} given"
@@ -295,6 +495,14 @@ def _smear_energies_from_config() -> bool:
     return bool(config.get_key("throwing.smear_events_in_bin", default=True))
 
 
+def epoch_group_size_from_config() -> int:
+    group_size = config.get_key("throwing.epochs_per_step", default=0)
+    if isinstance(group_size, int) and group_size >= 0:
+        return group_size
+    else:
+        raise ValueError("throwing.epochs_per_step is expected to be non-negative integer")
+
+
 @lru_cache(1)
 def _get_calibration_files_by_epoch() -> Dict[int, Path]:
     calibration_dirname = str(config.get_key("throwing.calibration_dir"))
@@ -1,14 +1,17 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from pathlib import Path
+from math import ceil
 
-from typing import List
+from typing import List, Optional
 
 from tasdmc import config
 from tasdmc.system import resources
 from tasdmc.subprocess_utils import execute_routine, Pipes
 
 from tasdmc.steps.base import NotAllRetainedFiles, PipelineStep, files_dataclass
+from tasdmc.steps.exceptions import FilesCheckFailed
+from tasdmc.steps.corsika_cards_generation import log10E_from_corsika_event_name
 from .corsika import CorsikaStep, CorsikaOutputFiles
 from tasdmc.steps.utils import check_particle_file_contents, check_file_is_empty, check_last_line_contains
 
@@ -18,25 +21,41 @@ class SplitParticleFiles(NotAllRetainedFiles):
     files: List[Path]
     stderr: Path
     stdout: Path
+    streamed: bool = False  # parts are streamed directly into dethinning and never stored on disk
 
     @property
     def not_retained(self) -> List[Path]:
-        return self.files
+        return [] if self.streamed else self.files
+
+    @property
+    def must_exist(self) -> List[Path]:
+        return [self.stdout, self.stderr] if self.streamed else self.all_files
 
     @classmethod
     def from_corsika_output_files(cls, cof: CorsikaOutputFiles) -> SplitParticleFiles:
-        n_split = _n_split_from_config()
+        n_split = _n_split_for_corsika_output(cof)
         return SplitParticleFiles(  # in sync with how these names are generated in C routine
-            files=[cof.particle.with_suffix(f'.p{i+1:02d}') for i in range(n_split)],
+            files=[_split_part_path(cof, i) for i in range(n_split)],
             stdout=cof.particle.with_suffix(".split.stdout"),
             stderr=cof.particle.with_suffix(".split.stderr"),
+            streamed=_streamed_dethinning_from_config(),
         )
 
     def _check_contents(self):
         check_file_is_empty(self.stderr)
         check_last_line_contains(self.stdout, "OK")
-        for f in self.files:
-            check_particle_file_contents(f)
+        if self.streamed:
+            # parts are marked in order after all of them are dethinned; there may be fewer parts than files
+            # if the particle file has too few particle subblocks (see plan_split)
+            streamed_parts = [f for f in self.files if self._with_deleted_suffix(f).exists()]
+            if not streamed_parts or streamed_parts != self.files[: len(streamed_parts)]:
+                raise FilesCheckFailed(
+                    f"Parts streamed into dethinning ({', '.join(f.name for f in streamed_parts) or 'none'}) "
+                    + f"are not the first ones of {', '.join(f.name for f in self.files)}"
+                )
+        else:
+            for f in self.files:
+                check_particle_file_contents(f)
 
 
 @dataclass
@@ -48,6 +67,11 @@ class ParticleFileSplittingStep(PipelineStep):
     def split_to(self) -> int:
         return len(self.output.files)
 
+    @property
+    def n_processes(self) -> int:
+        # streamed mode runs all dethinning routines for the shower at once
+        return self.split_to if self.output.streamed else 1
+
     @classmethod
     def from_corsika_step(cls, corsika_step: CorsikaStep) -> ParticleFileSplittingStep:
         return ParticleFileSplittingStep(
@@ -58,15 +82,34 @@ class ParticleFileSplittingStep(PipelineStep):
 
     @property
     def description(self) -> str:
+        if self.output.streamed:
+            return (
+                f"Splitting CORSIKA particle file {self.input_.particle.name} into {self.split_to} parts "
+                + "streamed into dethinning"
+            )
         return f"Splitting CORSIKA particle file {self.input_.particle.name} into {self.split_to} parts"
 
     def _run(self):
         with Pipes(self.output.stdout, self.output.stderr) as (stdout, stderr):
-            execute_routine('corsika_split_th.run', [self.input_.particle, self.split_to], stdout, stderr)
+            if self.output.streamed:
+                from .dethinning import run_streamed_dethinning
+
+                run_streamed_dethinning(self.input_.particle, self.output)
+                stdout.write("OK")
+            elif _single_pass_splitting_from_config():
+                from tasdmc.steps.particle_file import split_particle_file
+
+                split_particle_file(self.input_.particle, self.output.files)
+                stdout.write("OK")
+            else:
+                execute_routine('corsika_split_th.run', [self.input_.particle, self.split_to], stdout, stderr)
 
     @classmethod
     def validate_config(self):
         _n_split_from_config()
+        _log10E_per_part_from_config()
+        _single_pass_splitting_from_config()
+        _streamed_dethinning_from_config()
 
 
 def _n_split_from_config() -> int:
@@ -76,3 +119,59 @@ def _n_split_from_config() -> int:
         return n_split
     else:
         raise ValueError("dethinning.n_parallel is expected to be non-negative integer")
+
+
+def _log10E_per_part_from_config() -> Optional[float]:
+    log10E_per_part = config.get_key('dethinning.log10E_per_part', default=None)
+    if log10E_per_part is None:
+        return None
+    try:
+        return float(log10E_per_part)
+    except ValueError:
+        raise ValueError("dethinning.log10E_per_part is expected to be float")
+
+
+def n_split_for_log10E(log10E: float, n_split_max: int, log10E_per_part: float) -> int:
+    """Number of parts for a shower so that each part carries about 10^log10E_per_part eV of primary energy;
+    dethinning workload is roughly proportional to the primary energy
+    """
+    # rounding compensates float errors in log10E, e.g. 10 ** (18.3 - 17.3) is slightly more than 10
+    return max(1, min(n_split_max, ceil(round(10 ** (log10E - log10E_per_part), ndigits=6))))
+
+
+def _split_part_path(cof: CorsikaOutputFiles, i: int) -> Path:
+    return cof.particle.with_suffix(f'.p{i+1:02d}')
+
+
+def _n_split_for_corsika_output(cof: CorsikaOutputFiles) -> int:
+    # for continued runs, showers that have already been split keep their parts count
+    n_existing_parts = 0
+    while True:
+        part = _split_part_path(cof, n_existing_parts)
+        if not (part.exists() or NotAllRetainedFiles._with_deleted_suffix(part).exists()):
+            break
+        n_existing_parts += 1
+    if n_existing_parts > 0:
+        return n_existing_parts
+
+    n_split_max = _n_split_from_config()
+    log10E_per_part = _log10E_per_part_from_config()
+    if log10E_per_part is None:
+        return n_split_max
+    return n_split_for_log10E(log10E_from_corsika_event_name(cof.particle.name), n_split_max, log10E_per_part)
+
+
+def _single_pass_splitting_from_config() -> bool:
+    single_pass = config.get_key('dethinning.single_pass_splitting', default=False)
+    if isinstance(single_pass, bool):
+        return single_pass
+    else:
+        raise ValueError("dethinning.single_pass_splitting is expected to be boolean")
+
+
+def _streamed_dethinning_from_config() -> bool:
+    streamed = config.get_key('dethinning.streamed', default=False)
+    if isinstance(streamed, bool):
+        return streamed
+    else:
+        raise ValueError("dethinning.streamed is expected to be boolean")
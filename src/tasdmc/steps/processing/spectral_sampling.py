@@ -1,17 +1,21 @@
 """Spectral sampling step takes generated events and samples them according to a desired spectrum"""
 
 from __future__ import annotations
-from dataclasses import dataclass
+import os
+import gzip
+import subprocess
+from contextlib import ExitStack
+from dataclasses import dataclass, field
 from pathlib import Path
 from enum import Enum
 
-from typing import List
+from typing import Any, BinaryIO, List, Optional, Union
 
 from tasdmc import config, fileio
 from tasdmc.steps.base import OptionalFiles, PipelineStep, files_dataclass
-from tasdmc.steps.processing.event_generation import EventFiles, EventsGenerationStep
+from tasdmc.steps.processing.event_generation import EventFiles, EventsGenerationStep, EventsGenerationMergeStep
 
-from tasdmc.subprocess_utils import execute_routine, Pipes
+from tasdmc.subprocess_utils import execute_routine, start_routine, open_fifo_for_writing, Pipes
 from tasdmc.steps.corsika_cards_generation import log10E_bounds_from_config
 from tasdmc.steps.processing.tothrow_generation import dnde_exponent_from_config
 
@@ -62,6 +66,8 @@ class SpectralSampledEvents(OptionalFiles):
 class SpectralSamplingStep(PipelineStep):
     input_: EventFiles
     output: SpectralSampledEvents
+    # in single pass mode, the step with primary minimal energy samples events for all minimal energies
+    sampled_together: Optional[List[SpectralSampledEvents]] = field(default=None)
 
     @property
     def description(self) -> str:
@@ -71,8 +77,10 @@ class SpectralSamplingStep(PipelineStep):
         )
 
     @classmethod
-    def from_events_generation(cls, events_generation_step: EventsGenerationStep) -> List[SpectralSamplingStep]:
-        return [
+    def from_events_generation(
+        cls, events_generation_step: Union[EventsGenerationStep, EventsGenerationMergeStep]
+    ) -> List[SpectralSamplingStep]:
+        steps = [
             SpectralSamplingStep(
                 events_generation_step.output,
                 SpectralSampledEvents.from_events_file(events_generation_step.output, log10E_min),
@@ -80,22 +88,21 @@ class SpectralSamplingStep(PipelineStep):
             )
             for log10E_min in log10E_mins_from_config()
         ]
+        if _single_pass_from_config() and len(steps) > 1:
+            primary_step, *aux_steps = steps
+            primary_step.sampled_together = [step.output for step in aux_steps]
+            for aux_step in aux_steps:  # their outputs will be ready after primary step, so they are skipped
+                aux_step.previous_steps.append(primary_step)
+        return steps
 
     def _run(self):
+        if self.sampled_together:
+            run_single_pass_spectral_sampling(self.input_.merged_events_file, [self.output, *self.sampled_together])
+            return
         with Pipes(self.output.stdout, self.output.stderr) as (stdout, stderr):
             execute_routine(
                 'sdmc_conv_e2_to_spctr.run',
-                [
-                    '-o',
-                    self.output.events,
-                    '-s',
-                    TargetSpectrum.from_config().value,
-                    '-g',  # starting index of the MC event library, default 2.000000
-                    dnde_exponent_from_config(),
-                    '-e',  # minimum energy [EeV](before energy scale correction), default 0.3162 EeV
-                    10 ** (self.output.log10E_min - 18),  # log10(E/eV) => EeV
-                    self.input_.merged_events_file,
-                ],
+                _spectral_sampling_args(self.input_.merged_events_file, self.output),
                 stdout,
                 stderr,
                 global_=True,
@@ -106,6 +113,97 @@ class SpectralSamplingStep(PipelineStep):
         TargetSpectrum.from_config()
         log10E_mins_from_config()
         dnde_exponent_from_config()
+        _single_pass_from_config()
+
+
+def _spectral_sampling_args(events_file: Path, output: SpectralSampledEvents) -> List[Any]:
+    return [
+        '-o',
+        output.events,
+        '-s',
+        TargetSpectrum.from_config().value,
+        '-g',  # starting index of the MC event library, default 2.000000
+        dnde_exponent_from_config(),
+        '-e',  # minimum energy [EeV](before energy scale correction), default 0.3162 EeV
+        10 ** (output.log10E_min - 18),  # log10(E/eV) => EeV
+        events_file,
+    ]
+
+
+_RELAY_CHUNK_SIZE = 2**20
+
+
+def run_single_pass_spectral_sampling(events_file: Path, outputs: List[SpectralSampledEvents]):
+    """Run spectral sampling routines for all minimal energies together, decompressing events file once and
+    relaying its contents to each routine through a named pipe
+
+    Outputs other than the first one are prepared and checked here, since their steps are skipped afterwards.
+    """
+    fifos = [output.events.with_name(output.events.name.replace('.dst.gz', '.input.dst')) for output in outputs]
+    for fifo in fifos:
+        fifo.unlink(missing_ok=True)
+        os.mkfifo(fifo)
+    for output in outputs[1:]:
+        output.prepare_for_step_run()
+
+    try:
+        with ExitStack() as stack:
+            processes: List[subprocess.Popen] = []
+            for fifo, output in zip(fifos, outputs):
+                stdout, stderr = stack.enter_context(Pipes(output.stdout, output.stderr))
+                processes.append(
+                    start_routine(
+                        'sdmc_conv_e2_to_spctr.run',
+                        _spectral_sampling_args(fifo, output),
+                        stdout,
+                        stderr,
+                        global_=True,
+                    )
+                )
+            sinks: List[Optional[BinaryIO]] = []
+            try:
+                for fifo, process in zip(fifos, processes):
+                    sinks.append(open_fifo_for_writing(fifo, process))
+                with gzip.open(events_file, 'rb') as source:
+                    while True:
+                        chunk = source.read(_RELAY_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        for i, sink in enumerate(sinks):
+                            if sink is None:
+                                continue
+                            try:
+                                sink.write(chunk)
+                            except BrokenPipeError:  # reader has exited, its return code is checked below
+                                _close_sink(sink)
+                                sinks[i] = None
+                for i, sink in enumerate(sinks):
+                    _close_sink(sink)
+                    sinks[i] = None
+                for process in processes:
+                    if process.wait() != 0:
+                        raise subprocess.CalledProcessError(process.returncode, process.args)
+            except Exception:
+                for sink in sinks:
+                    _close_sink(sink)
+                for process in processes:
+                    process.kill()
+                raise
+    finally:
+        for fifo in fifos:
+            fifo.unlink(missing_ok=True)
+
+    for output in outputs[1:]:
+        output.assert_files_are_ready()
+
+
+def _close_sink(sink: Optional[BinaryIO]):
+    if sink is None:
+        return
+    try:
+        sink.close()
+    except BrokenPipeError:  # flushing buffered data into pipe closed by the reader
+        pass
 
 
 class TargetSpectrum(Enum):
@@ -136,3 +234,11 @@ def log10E_mins_from_config() -> List[float]:
     all_log10E_mins = [primary_log10E_min, *aux_log10E_min]
     assert all(isinstance(log10E, float) for log10E in all_log10E_mins)
     return all_log10E_mins
+
+
+def _single_pass_from_config() -> bool:
+    single_pass = config.get_key('spectral_sampling.single_pass', default=False)
+    if isinstance(single_pass, bool):
+        return single_pass
+    else:
+        raise ValueError("spectral_sampling.single_pass is expected to be boolean")
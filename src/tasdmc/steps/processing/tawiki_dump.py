@@ -69,3 +69,9 @@ class TawikiDumpStep(PipelineStep):
                 *pipes,
                 global_=True,
             )
+
+    def _post_run(self):
+        from tasdmc.steps.aggregation.tawiki_dumps import incremental_merge_from_config, append_to_merged_tawiki_dump
+
+        if incremental_merge_from_config():
+            append_to_merged_tawiki_dump(self.output)
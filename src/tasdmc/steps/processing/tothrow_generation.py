@@ -10,7 +10,6 @@ from dataclasses import dataclass
 from pathlib import Path
 import struct
 import math
-import re
 
 from typing import List, Tuple, Union
 
@@ -18,7 +17,11 @@ from tasdmc import config
 from tasdmc.steps.base import Files, PipelineStep, files_dataclass
 from tasdmc.steps.processing.corsika2geant import C2GOutputFiles, Corsika2GeantStep
 from tasdmc.steps.processing.corsika2geant_parallel import Corsika2GeantParallelMergeStep
-from tasdmc.steps.corsika_cards_generation import get_cards_count_at_log10E, log10E_bounds_from_config
+from tasdmc.steps.corsika_cards_generation import (
+    get_cards_count_at_log10E,
+    log10E_bounds_from_config,
+    log10E_from_corsika_event_name,
+)
 
 
 @files_dataclass
@@ -61,24 +64,7 @@ class TothrowGenerationStep(PipelineStep):
         )
 
     def _run(self):
-        # quick'n'dirty workaround - getting log10E from DATnnnnXX name
-        m = re.match(r'DAT\d\d\d\d(?P<energy_id>\d\d)', self.input_.corsika_event_name)
-        if m is None:
-            raise ValueError(
-                f"CORSIKA event name '{self.input_.corsika_event_name}' doesn't match expected pattern 'DATnnnnXX'!"
-            )
-        energy_id = int(m.group("energy_id"))
-        if 0 <= energy_id <= 25:
-            log10E = 18.0 + (energy_id - 0) * 0.1
-        elif 26 <= energy_id <= 39:
-            log10E = 16.6 + (energy_id - 26) * 0.1
-        elif 80 <= energy_id <= 85:
-            log10E = 16.0 + (energy_id - 80) * 0.1
-        else:
-            raise ValueError(
-                f"CORSIKA event name '{self.input_.corsika_event_name}' contains unknown energy ID: {energy_id}"
-            )
-        log10E = round(log10E, ndigits=1)
+        log10E = log10E_from_corsika_event_name(self.input_.corsika_event_name)
 
         N0 = _normalizing_constant_from_config()
         dndE_exponent = dnde_exponent_from_config()
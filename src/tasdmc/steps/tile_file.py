@@ -0,0 +1,391 @@
+"""Numpy-based merge of partial tile files, equivalent to corsika2geant_parallel_merge.run
+
+Partial tile file (see src/c_routines/corsika2geant_parallel/main_partial.c) consists of CORSIKA event header
+(NWORD floats), sparse min arrival times matrix as (m, n, time) triplets terminated with (-1, -1, SENTINEL_TIME)
+and a sequence of (m, n, vem_top, vem_bot, k, pz) unsigned short blocks, where k is the time bin number counted
+from the tile's min arrival time. Final tile file has the same event header followed by the same blocks, but
+with k counted from the shower core impact time.
+
+All float computations mirror C routine's single/double precision arithmetic, so that the outputs are identical
+byte-by-byte. As in the C routine, merge tree mode (merge_tree=True) expects partial tile files with quantized
+min arrival times and rounds time bin deltas, while the default flat merge truncates them.
+"""
+
+import numpy as np
+from pathlib import Path
+from dataclasses import dataclass
+
+from typing import List, Tuple
+
+from tasdmc.steps.exceptions import FilesCheckFailed
+
+MAP_SIDE = 16800  # m
+TILE_SIDE = 6  # m
+DISTMAX = MAP_SIDE // 2
+NX = MAP_SIDE // TILE_SIDE
+NY = MAP_SIDE // TILE_SIDE
+
+SENTINEL_TIME = np.float32(1e9)
+DT = 20  # ns
+TMAX = 1280
+CSPEED = 29.97925  # cm/ns
+OBSERVATION_LEVEL = np.float32(1430.0e2)  # cm
+
+NWORD = 7 * 39
+HEADER_BYTES = NWORD * 4
+VEM_MAX = np.float32(60000.0)
+
+MIN_ARRIVAL_TIME_DTYPE = np.dtype([('m', '<i2'), ('n', '<i2'), ('time', '<f4')])
+TILE_BLOCK_DTYPE = np.dtype(
+    [('m', '<u2'), ('n', '<u2'), ('vem_top', '<u2'), ('vem_bot', '<u2'), ('k', '<u2'), ('pz', '<u2')]
+)
+
+_F32 = np.float32
+_F64 = np.float64
+
+
+@dataclass
+class PartialTile:
+    header: np.ndarray  # NWORD float32
+    tiles: np.ndarray  # flat tile indices m * NY + n, int64
+    min_arrival_times: np.ndarray  # float32, same order as tiles
+    blocks: np.ndarray  # TILE_BLOCK_DTYPE
+
+
+def read_partial_tile_file(path: Path) -> PartialTile:
+    data = np.fromfile(path, dtype=np.uint8)
+    if data.size < HEADER_BYTES:
+        raise FilesCheckFailed(f"{path.name} is too short to be a partial tile file ({data.size} bytes)")
+    header = data[:HEADER_BYTES].view('<f4').astype(_F32)
+    body = data[HEADER_BYTES:]
+    # min arrival time triplets have non-negative m, so the first -1 is the delimiter
+    triplets = body[: body.size - body.size % MIN_ARRIVAL_TIME_DTYPE.itemsize].view(MIN_ARRIVAL_TIME_DTYPE)
+    delimiters = np.flatnonzero(triplets['m'] == -1)
+    if delimiters.size == 0:
+        raise FilesCheckFailed(f"{path.name} has no min arrival times delimiter")
+    triplets = triplets[: delimiters[0]]
+    blocks = body[(delimiters[0] + 1) * MIN_ARRIVAL_TIME_DTYPE.itemsize :]
+    blocks = blocks[: blocks.size - blocks.size % TILE_BLOCK_DTYPE.itemsize].view(TILE_BLOCK_DTYPE)
+    return PartialTile(
+        header=header,
+        tiles=triplets['m'].astype(np.int64) * NY + triplets['n'],
+        min_arrival_times=triplets['time'].astype(_F32),
+        blocks=blocks,
+    )
+
+
+def _roundf(x: np.ndarray) -> np.ndarray:
+    """C roundf, i.e. rounding half away from zero (np.round rounds half to even)"""
+    x = x.astype(_F64)
+    return np.trunc(x + np.copysign(0.5, x)).astype(_F32)
+
+
+def _to_ushort(x: np.ndarray) -> np.ndarray:
+    """C float -> unsigned short cast as compiled on x86-64 (truncation to int, then taking lower 16 bits)"""
+    return np.trunc(x).astype(np.int64).astype(np.uint16)
+
+
+def _time_bins_delta(from_: np.ndarray, to: np.ndarray, merge_tree: bool) -> np.ndarray:
+    """Number of DT time bins between min arrival times; see timeBinsDelta in main_merge.cpp"""
+    delta = (to - from_) / _F32(DT)
+    return _roundf(delta) if merge_tree else np.trunc(delta)
+
+
+def _hypotf(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    x = x.astype(_F64)
+    y = y.astype(_F64)
+    return np.sqrt(x * x + y * y).astype(_F32)
+
+
+def _tile_index_to_coord(idx: np.ndarray) -> np.ndarray:
+    """Output in m"""
+    return ((idx.astype(_F64) + 0.5) * TILE_SIDE - DISTMAX).astype(_F32)
+
+
+def _coord_to_tile_index(coord: np.ndarray) -> np.ndarray:
+    """Input in cm"""
+    return np.trunc((coord.astype(_F64) / 100.0 + DISTMAX) / TILE_SIDE).astype(np.int64)
+
+
+# sparse 3D matrices are stored as sorted int64 keys, packing tile index and signed short time bin number
+
+
+def _pack_keys(tiles: np.ndarray, k: np.ndarray) -> np.ndarray:
+    return tiles.astype(np.int64) * 2**16 + (k.astype(np.int64) + 2**15)
+
+
+def _unpack_keys(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    tiles, k = np.divmod(keys, 2**16)
+    return tiles, (k - 2**15).astype(np.int16)
+
+
+class _TileTimes:
+    """Sparse per-tile float32 values with fallback to SENTINEL_TIME"""
+
+    def __init__(self, tiles: np.ndarray, times: np.ndarray):
+        self.tiles = tiles
+        self.times = times
+
+    def lookup(self, tiles: np.ndarray) -> np.ndarray:
+        if self.tiles.size == 0:
+            return np.full(tiles.shape, SENTINEL_TIME, dtype=_F32)
+        idx = np.searchsorted(self.tiles, tiles)
+        idx_clipped = np.minimum(idx, self.tiles.size - 1)
+        found = (idx < self.tiles.size) & (self.tiles[idx_clipped] == tiles)
+        return np.where(found, self.times[idx_clipped], SENTINEL_TIME).astype(_F32)
+
+    def updated(self, tiles: np.ndarray, times: np.ndarray) -> '_TileTimes':
+        all_tiles = np.concatenate((self.tiles, tiles))
+        all_times = np.concatenate((self.times, times))
+        # new values take precedence: keeping the last occurrence of each tile in stable order
+        order = np.argsort(all_tiles, kind='stable')
+        all_tiles = all_tiles[order]
+        last = np.append(all_tiles[1:] != all_tiles[:-1], True)
+        return _TileTimes(all_tiles[last], all_times[order][last])
+
+
+@dataclass
+class _MergedTile:
+    header: np.ndarray
+    reference_times: _TileTimes  # time bins in keys are counted from these
+    global_times: _TileTimes
+    keys: np.ndarray
+    vem_top: np.ndarray
+    vem_bot: np.ndarray
+    pz: np.ndarray
+
+
+def _merge(partial_tiles: List[PartialTile], merge_tree: bool) -> _MergedTile:
+    file_idx = np.concatenate([np.full(pt.tiles.size, i) for i, pt in enumerate(partial_tiles)])
+    tiles = np.concatenate([pt.tiles for pt in partial_tiles])
+    times = np.concatenate([pt.min_arrival_times for pt in partial_tiles])
+
+    # the first min arrival time for the tile across all partial tile files is considered reference
+    order = np.lexsort((file_idx, tiles))
+    sorted_tiles = tiles[order]
+    first = np.insert(sorted_tiles[1:] != sorted_tiles[:-1], 0, True)
+    unique_tiles = sorted_tiles[first]
+    reference_times = _TileTimes(unique_tiles, times[order][first])
+    global_times = _TileTimes(unique_tiles, np.minimum.reduceat(times[order], np.flatnonzero(first)))
+
+    keys = []
+    for pt in partial_tiles:
+        current_times = _TileTimes(*_sorted_by_tiles(pt.tiles, pt.min_arrival_times))
+        block_tiles = pt.blocks['m'].astype(np.int16).astype(np.int64) * NY + pt.blocks['n'].astype(np.int16)
+        delta_k = _time_bins_delta(reference_times.lookup(block_tiles), current_times.lookup(block_tiles), merge_tree)
+        k = (pt.blocks['k'].astype(np.int16).astype(np.int64) + delta_k.astype(np.int64)).astype(np.int16)
+        keys.append(_pack_keys(block_tiles, k))
+    keys = np.concatenate(keys)
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    starts = np.flatnonzero(np.insert(keys[1:] != keys[:-1], 0, True))
+
+    def reduce_values(field: str) -> np.ndarray:
+        values = np.concatenate([pt.blocks[field] for pt in partial_tiles]).astype(np.int64)[order]
+        # unsigned short overflow wraps around just like in the C routine
+        return np.add.reduceat(values, starts).astype(np.uint16) if values.size else values.astype(np.uint16)
+
+    return _MergedTile(
+        header=partial_tiles[-1].header,
+        reference_times=reference_times,
+        global_times=global_times,
+        keys=keys[starts],
+        vem_top=reduce_values('vem_top'),
+        vem_bot=reduce_values('vem_bot'),
+        pz=reduce_values('pz'),
+    )
+
+
+def _sorted_by_tiles(tiles: np.ndarray, times: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    order = np.argsort(tiles, kind='stable')
+    return tiles[order], times[order]
+
+
+def _interpolation_region(merged: _MergedTile) -> Tuple[float, np.ndarray, np.ndarray]:
+    """Radius and m, n indices of near-axis tiles, masked in CORSIKA/dethinning and hence interpolated"""
+    axis_row_tiles = merged.global_times.tiles[
+        (merged.global_times.tiles % NY == NY // 2) & (merged.global_times.tiles // NY >= NX // 2)
+    ]
+    if axis_row_tiles.size == 0:
+        raise ValueError("Can't find the edge of the near-axis region: no tiles with particles along x axis")
+    m_edge = axis_row_tiles.min() // NY
+    interp_radius = _F32(float(_tile_index_to_coord(np.array([m_edge]))[0]) + 2.0)
+    interp_halfside = m_edge - NX // 2 + 5
+    m, n = np.meshgrid(
+        np.arange(NX // 2 - interp_halfside, NX // 2 + interp_halfside),
+        np.arange(NY // 2 - interp_halfside, NY // 2 + interp_halfside),
+        indexing='ij',
+    )
+    m = m.ravel()
+    n = n.ravel()
+    inside = _hypotf(_tile_index_to_coord(m), _tile_index_to_coord(n)) < interp_radius
+    return interp_radius, m[inside], n[inside]
+
+
+def _interpolate_min_arrival_times(
+    merged: _MergedTile, interp_radius: np.float32, m: np.ndarray, n: np.ndarray, merge_tree: bool
+):
+    x = _tile_index_to_coord(m)
+    y = _tile_index_to_coord(n)
+    radius_ratio = ((_F64(interp_radius) + 7.5) / _hypotf(x, y).astype(_F64)).astype(_F32)
+    # interpolated time is lerp between times at closest and farthest points on the ring
+    x_on_ring = (_F32(100) * x) * radius_ratio  # m -> cm
+    y_on_ring = (_F32(100) * y) * radius_ratio
+    t_close = merged.global_times.lookup(_coord_to_tile_index(x_on_ring) * NY + _coord_to_tile_index(y_on_ring))
+    t_far = merged.global_times.lookup(_coord_to_tile_index(-x_on_ring) * NY + _coord_to_tile_index(-y_on_ring))
+    interpolated_times = (
+        0.5 * (t_close + t_far).astype(_F64) + 0.5 * (t_close - t_far).astype(_F64) / radius_ratio.astype(_F64)
+    ).astype(_F32)
+    tiles = m * NY + n
+    if merge_tree:
+        # tiles that already have some data are re-referenced to keep their arrival times
+        old_reference_times = merged.reference_times.lookup(tiles)
+        has_data = old_reference_times != SENTINEL_TIME
+        ref2interp_delta_k = _roundf((old_reference_times - interpolated_times) / _F32(DT)).astype(np.int64)
+        entry_tiles, _ = _unpack_keys(merged.keys)
+        shifted = np.isin(entry_tiles, tiles[has_data])
+        # interpolated tiles are sorted and shift is the same for all tile's entries, so keys stay sorted
+        merged.keys[shifted] += ref2interp_delta_k[has_data][np.searchsorted(tiles[has_data], entry_tiles[shifted])]
+    merged.global_times = merged.global_times.updated(tiles, interpolated_times)
+    merged.reference_times = merged.reference_times.updated(tiles, interpolated_times)
+
+
+def _interpolate_tile(merged: _MergedTile, interp_radius: np.float32, m: np.ndarray, n: np.ndarray, merge_tree: bool):
+    zenith = merged.header[10]
+    cos_zenith = np.cos(_F64(zenith)).astype(_F32)
+    sectheta = _F32(1) / cos_zenith
+    x = _tile_index_to_coord(m)
+    y = _tile_index_to_coord(n)
+    r = _hypotf(x, y)
+    zencor = _hypotf(x / sectheta, y) / r
+    sampling_radius = _F32(_F64(interp_radius) + 7.5)  # offsetting to the next non-interpolated tile
+    r_ratio = sampling_radius / r
+    sample_m = _coord_to_tile_index((_F32(100) * x) * r_ratio)
+    sample_n = _coord_to_tile_index((_F32(100) * y) * r_ratio)
+    sample_tiles = sample_m * NY + sample_n
+    # e.g. if reference min arrival time happens to be 3*DT ahead of global min, this will be -3
+    global2ref_delta_k = _time_bins_delta(
+        merged.reference_times.lookup(sample_tiles), merged.global_times.lookup(sample_tiles), merge_tree
+    ).astype(np.int64)
+
+    # sampled tiles' entries with k in [delta_k, delta_k + TMAX) are copied to the interpolated tiles
+    lo = np.searchsorted(merged.keys, _pack_keys(sample_tiles, global2ref_delta_k))
+    hi = np.searchsorted(merged.keys, _pack_keys(sample_tiles, global2ref_delta_k + TMAX))
+    counts = hi - lo
+    target = np.repeat(np.arange(m.size), counts)
+    sample_idx = np.repeat(lo - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+    vem_top_sample = merged.vem_top[sample_idx]
+    vem_bot_sample = merged.vem_bot[sample_idx]
+    nonzero = (vem_top_sample > 0) | (vem_bot_sample > 0)
+    target = target[nonzero]
+    sample_idx = sample_idx[nonzero]
+    vem_top_sample = vem_top_sample[nonzero].astype(_F32)
+    vem_bot_sample = vem_bot_sample[nonzero].astype(_F32)
+    pz_sample = merged.pz[sample_idx].astype(_F32)
+    _, sample_k = _unpack_keys(merged.keys[sample_idx])
+    # for interpolated tiles reference min arr. time = global min arr. time, so k starts from 0
+    k = sample_k.astype(np.int64) - global2ref_delta_k[target]
+
+    r = r[target]
+    r_ratio = r_ratio[target]
+    radial_factor = np.power(r_ratio.astype(_F64), _F64(_F32(2.6))).astype(_F32)
+    attenuation_exponent = ((zencor[target] * (sampling_radius - r)).astype(_F64) / 575.0).astype(_F32)
+    vem_sample_to_interp_factor = radial_factor * np.exp(attenuation_exponent.astype(_F64)).astype(_F32)
+    vem_top_interp = np.minimum(vem_top_sample * vem_sample_to_interp_factor, VEM_MAX)
+    vem_bot_interp = np.minimum(vem_bot_sample * vem_sample_to_interp_factor, VEM_MAX)
+    vem_mean_sample = (0.5 * (vem_top_sample + vem_bot_sample).astype(_F64)).astype(_F32)
+    vem_mean_interp = (0.5 * (vem_top_interp + vem_bot_interp).astype(_F64)).astype(_F32)
+    costheta_sample = pz_sample / vem_mean_sample
+    r_relative = r / sampling_radius
+    # linear interpolation of cos theta between shower's (i.e. for particles near the core)
+    # and sample tile's (for particles sampling_radius m from the core)
+    pz_interp = (
+        vem_mean_interp.astype(_F64)
+        * ((r_relative * costheta_sample).astype(_F64) + (1.0 - r_relative.astype(_F64)) * cos_zenith.astype(_F64))
+    ).astype(_F32)
+
+    # interpolated values overwrite existing ones
+    all_keys = np.concatenate((merged.keys, _pack_keys(m[target] * NY + n[target], k)))
+    order = np.argsort(all_keys, kind='stable')
+    all_keys = all_keys[order]
+    last = np.append(all_keys[1:] != all_keys[:-1], True)
+    merged.keys = all_keys[last]
+    merged.vem_top = np.concatenate((merged.vem_top, _to_ushort(vem_top_interp)))[order][last]
+    merged.vem_bot = np.concatenate((merged.vem_bot, _to_ushort(vem_bot_interp)))[order][last]
+    merged.pz = np.concatenate((merged.pz, _to_ushort(pz_interp)))[order][last]
+
+
+def _core_impact_time(header: np.ndarray) -> np.float32:
+    """Time from the first interaction to the observation level along shower axis with the speed of light"""
+    height = header[6] - OBSERVATION_LEVEL
+    origin_x = (-header[7] / header[9]) * height
+    origin_y = (-header[8] / header[9]) * height
+    return _F32(_F64(_hypotf(_hypotf(origin_x, origin_y), height)) / CSPEED)
+
+
+def _tile_blocks(merged: _MergedTile, k: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    tiles, _ = _unpack_keys(merged.keys)
+    blocks = np.empty(np.count_nonzero(mask), dtype=TILE_BLOCK_DTYPE)
+    blocks['m'] = (tiles // NY)[mask]
+    blocks['n'] = (tiles % NY)[mask]
+    blocks['vem_top'] = merged.vem_top[mask]
+    blocks['vem_bot'] = merged.vem_bot[mask]
+    blocks['k'] = k[mask]
+    blocks['pz'] = merged.pz[mask]
+    return blocks
+
+
+def _dump_tile_file(merged: _MergedTile, output: Path, interpolated_tiles: np.ndarray, merge_tree: bool):
+    tmin = _core_impact_time(merged.header)
+    tiles, k = _unpack_keys(merged.keys)
+    reference_times = merged.reference_times.lookup(tiles)
+    # transforming # bins from min arrival time (in [0; TMAX]) to # bins from tmin
+    k_from_tmin = _to_ushort((reference_times + k.astype(_F32) * _F32(DT) - tmin) / _F32(DT))
+    if merge_tree:
+        # non-interpolated min arrival times are quantized in DT units relative to tmin
+        k_regular = _to_ushort(_roundf((reference_times - tmin) / _F32(DT)) + k.astype(_F32))
+        k_from_tmin = np.where(np.isin(tiles, interpolated_tiles), k_from_tmin, k_regular)
+    mask = (merged.vem_top > 0) | (merged.vem_bot > 0)
+    blocks = _tile_blocks(merged, k_from_tmin, mask)
+    with open(output, 'wb') as f:
+        f.write(merged.header.astype('<f4').tobytes())
+        f.write(blocks.tobytes())
+
+
+def _dump_partial_tile_file(merged: _MergedTile, output: Path):
+    tiles, k = _unpack_keys(merged.keys)
+    triplets = np.empty(merged.global_times.tiles.size + 1, dtype=MIN_ARRIVAL_TIME_DTYPE)
+    triplets['m'][:-1] = merged.global_times.tiles // NY
+    triplets['n'][:-1] = merged.global_times.tiles % NY
+    triplets['time'][:-1] = merged.global_times.times
+    triplets[-1] = (-1, -1, SENTINEL_TIME)
+    # both min arrival times are quantized in DT units, rounding only compensates float errors
+    ref2global_delta_k = _roundf(
+        (merged.reference_times.lookup(tiles) - merged.global_times.lookup(tiles)) / _F32(DT)
+    ).astype(np.int64)
+    mask = (merged.vem_top > 0) | (merged.vem_bot > 0) | (merged.pz > 0)
+    blocks = _tile_blocks(merged, (k.astype(np.int64) + ref2global_delta_k).astype(np.uint16), mask)
+    with open(output, 'wb') as f:
+        f.write(merged.header.astype('<f4').tobytes())
+        f.write(triplets.tobytes())
+        f.write(blocks.tobytes())
+
+
+def merge_partial_tile_files(
+    partial_tile_files: List[Path], output: Path, partial_output: bool = False, merge_tree: bool = False
+):
+    """Merge partial tile files into a tile file, interpolating the near-axis region; with partial_output
+    interpolation is skipped and the result is written in partial tile file format to be merged again later.
+    Partial tile files produced for the merge tree are merged with merge_tree=True, partial_output implies it.
+    """
+    if not partial_tile_files:
+        raise ValueError("At least one partial tile file is required for merge")
+    merge_tree = merge_tree or partial_output
+    merged = _merge([read_partial_tile_file(ptf) for ptf in partial_tile_files], merge_tree)
+    if partial_output:
+        _dump_partial_tile_file(merged, output)
+    else:
+        interp_radius, m, n = _interpolation_region(merged)
+        _interpolate_min_arrival_times(merged, interp_radius, m, n, merge_tree)
+        _interpolate_tile(merged, interp_radius, m, n, merge_tree)
+        _dump_tile_file(merged, output, interpolated_tiles=m * NY + n, merge_tree=merge_tree)
@@ -10,7 +10,7 @@ from typing import List, Callable, TypeVar, BinaryIO, Generator, Iterable, TypeV
 
 from tasdmc import fileio
 from tasdmc.subprocess_utils import list_events_in_dst_file, execute_routine, Pipes
-from tasdmc.steps.exceptions import FilesCheckFailed
+from tasdmc.steps.exceptions import FilesCheckFailed, HashComputationFailed
 
 
 def _read_file_backwards(f: BinaryIO, block_size: int = 1024) -> Generator[bytes, None, None]:
@@ -112,16 +112,33 @@ def check_dst_file_not_empty(file: Path):
         raise FilesCheckFailed(f"dst file {file.relative_to(fileio.run_dir())} is empty")
 
 
+_FULLY_HASHED_FILE_SIZE = 1024 * 1024
+_HASHED_BLOCKS_COUNT = 1024
+_HASHED_BLOCK_SIZE = 1024
+
+
+def _hashed_ranges(file_size: int) -> List[Tuple[int, int]]:
+    """Byte ranges read by file_contents_hash for large files"""
+    jump_size = file_size // _HASHED_BLOCKS_COUNT
+    ranges = []
+    for i in range(_HASHED_BLOCKS_COUNT - 1):
+        start = min(i * (_HASHED_BLOCK_SIZE + jump_size), file_size)
+        ranges.append((start, min(start + _HASHED_BLOCK_SIZE, file_size)))
+    # last block is read from the end
+    ranges.append((file_size - _HASHED_BLOCK_SIZE - 1, file_size - 1))
+    return ranges
+
+
 def file_contents_hash(file_path: Path, hasher_name: str = 'md5') -> str:
     hasher = hashlib.new(hasher_name)
     file_size = file_path.stat().st_size
     with open(file_path, 'rb') as f:
-        if file_size < 1024 * 1024:  # for files smaller than Mb hash is calculated directly
+        if file_size < _FULLY_HASHED_FILE_SIZE:  # for files smaller than Mb hash is calculated directly
             hasher.update(f.read())
         else:
             # for large files, read several blocks spread across file and use only them in hash
-            n_reads = 1024
-            block_size = 1024
+            n_reads = _HASHED_BLOCKS_COUNT
+            block_size = _HASHED_BLOCK_SIZE
             jump_size = file_size // n_reads
             for _ in range(n_reads - 1):
                 hasher.update(f.read1(block_size))
@@ -132,6 +149,56 @@ def file_contents_hash(file_path: Path, hasher_name: str = 'md5') -> str:
     return hasher.hexdigest()
 
 
+class StreamingContentsHasher:
+    """Computes the same hash as file_contents_hash for a file of known size that is written sequentially,
+    without reading it back (e.g. when file is written into a named pipe and never lands on disk)
+    """
+
+    def __init__(self, file_size: int, hasher_name: str = 'md5'):
+        self.file_size = file_size
+        self.hasher = hashlib.new(hasher_name)
+        self.offset = 0
+        if file_size < _FULLY_HASHED_FILE_SIZE:
+            self.ranges = None
+        else:
+            self.ranges = _hashed_ranges(file_size)
+            self.range_contents = [bytearray() for _ in self.ranges]
+            self.next_range_idx = 0
+
+    def _consume(self, range_idx: int, data: bytes, data_start: int, data_end: int):
+        start, end = self.ranges[range_idx]
+        if start < data_end and end > data_start:
+            self.range_contents[range_idx].extend(
+                data[max(start, data_start) - data_start : min(end, data_end) - data_start]
+            )
+
+    def update(self, data: bytes):
+        if self.ranges is None:
+            self.hasher.update(data)
+        else:
+            data_start = self.offset
+            data_end = data_start + len(data)
+            # all ranges but the last one are sorted and disjoint, so they are consumed one by one
+            while self.next_range_idx < len(self.ranges) - 1:
+                start, end = self.ranges[self.next_range_idx]
+                if start >= data_end:
+                    break
+                self._consume(self.next_range_idx, data, data_start, data_end)
+                if end > data_end:
+                    break
+                self.next_range_idx += 1
+            self._consume(len(self.ranges) - 1, data, data_start, data_end)
+        self.offset += len(data)
+
+    def hexdigest(self) -> str:
+        if self.offset != self.file_size:
+            raise HashComputationFailed(f"Expected {self.file_size} bytes to be hashed, got {self.offset}")
+        if self.ranges is not None:
+            for contents in self.range_contents:
+                self.hasher.update(contents)
+        return self.hasher.hexdigest()
+
+
 CheckFnArgs = TypeVar("CheckFnArgs")
 
 
@@ -1,12 +1,16 @@
+import os
+import errno
 import subprocess
+import threading
 from pathlib import Path
+from time import sleep
 from dataclasses import dataclass
 from functools import lru_cache
 import resource
 import signal
 from tempfile import TemporaryDirectory
 
-from typing import TextIO, Optional, List, Any, AnyStr
+from typing import TextIO, BinaryIO, Optional, List, Any, AnyStr, Tuple
 
 from tasdmc import config, fileio
 
@@ -26,13 +30,7 @@ def execute_routine(
     stdin_content: Optional[str] = None,
     run_from_directory: Optional[Path] = None,
 ):
-    executable_path = str(config.Global.bin_dir / executable) if not global_ else executable
-
-    routine_cmd = " ".join([str(a) for a in [executable_path, *args]])
-    if debug_routines_execution():
-        with open(fileio.routine_cmd_debug_log(), 'a') as f:
-            f.write(routine_cmd + "\n")
-
+    executable_path, routine_cmd = _prepare_routine_cmd(executable, global_, args)
     result = subprocess.run(
         [executable_path, *[str(a) for a in args]],
         cwd=run_from_directory,
@@ -51,6 +49,62 @@ def execute_routine(
     return result
 
 
+def start_routine(
+    executable: str,
+    args: List[Any],
+    stdout: Optional[TextIO] = None,
+    stderr: Optional[TextIO] = None,
+    global_: bool = False,
+) -> subprocess.Popen:
+    """Non-blocking version of execute_routine, for routines communicating with the caller through named pipes"""
+    executable_path, _ = _prepare_routine_cmd(executable, global_, args)
+    return subprocess.Popen([executable_path, *[str(a) for a in args]], stdout=stdout, stderr=stderr)
+
+
+def open_fifo_for_writing(fifo: Path, reader: subprocess.Popen, poll_interval: float = 0.05) -> BinaryIO:
+    """Open named pipe for writing without blocking forever if the reading process dies before opening it"""
+    while True:
+        try:
+            fd = os.open(fifo, os.O_WRONLY | os.O_NONBLOCK)
+            break
+        except OSError as e:
+            if e.errno != errno.ENXIO:  # ENXIO means no reader has opened the pipe yet
+                raise
+            if reader.poll() is not None:
+                raise BrokenPipeError(f"Reader process exited with code {reader.returncode} before opening {fifo.name}")
+            sleep(poll_interval)
+    os.set_blocking(fd, True)
+    return os.fdopen(fd, 'wb')
+
+
+def open_fifo_for_reading(fifo: Path, writer: subprocess.Popen, poll_interval: float = 0.05) -> BinaryIO:
+    """Open named pipe for reading without blocking forever if the writing process dies before opening it"""
+    opened: List[BinaryIO] = []
+    opener = threading.Thread(target=lambda: opened.append(open(fifo, 'rb')), daemon=True)
+    opener.start()
+    while opener.is_alive():
+        if writer.poll() is not None:
+            # connecting and immediately disconnecting dummy writer unblocks the opener, reader then gets EOF
+            try:
+                os.close(os.open(fifo, os.O_WRONLY | os.O_NONBLOCK))
+            except OSError as e:
+                if e.errno != errno.ENXIO:  # opener may have not reached open() call yet
+                    raise
+        opener.join(poll_interval)
+    if not opened:
+        raise OSError(f"Failed to open {fifo.name} for reading")
+    return opened[0]
+
+
+def _prepare_routine_cmd(executable: str, global_: bool, args: List[Any]) -> Tuple[str, str]:
+    executable_path = str(config.Global.bin_dir / executable) if not global_ else executable
+    routine_cmd = " ".join([str(a) for a in [executable_path, *args]])
+    if debug_routines_execution():
+        with open(fileio.routine_cmd_debug_log(), 'a') as f:
+            f.write(routine_cmd + "\n")
+    return executable_path, routine_cmd
+
+
 @dataclass
 class Pipes:
     stdout_file: Path
@@ -74,7 +128,31 @@ class Pipes:
         self.stderr.close()
 
 
+@lru_cache(1)
+def in_process_dst_io() -> bool:
+    """Whether DST files should be manipulated in-process with dstreader package instead of external routines"""
+    return bool(config.get_key("pipeline.in_process_dst_io", default=False))
+
+
+def validate_in_process_dst_io():
+    if in_process_dst_io():
+        try:
+            import dstreader  # noqa: F401
+        except ImportError:
+            raise ImportError(
+                "pipeline.in_process_dst_io is set, but dstreader package is not installed (see src/utils/dstreader)"
+            )
+
+
 def concatenate_dst_files(source_files: List[Path], output_file: Path, stdout_file: Path, stderr_file: Path):
+    if in_process_dst_io():
+        from dstreader import ops as dst_ops
+
+        with Pipes(stdout_file, stderr_file) as (stdout, _):
+            n_events = dst_ops.concatenate(source_files, output_file)
+            stdout.write(f"{n_events} events from {len(source_files)} files written to {output_file}\n")
+        return
+
     with Pipes(stdout_file, stderr_file) as (stdout, stderr):
         execute_routine('dstcat.run', ['-o', output_file, *source_files], stdout, stderr, global_=True)
 
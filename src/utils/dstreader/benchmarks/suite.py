@@ -0,0 +1,162 @@
+"""dstreader throughput benchmark suite
+
+Synthetic DST files are produced by replicating examples/example.dst.gz, then each benchmark
+is run several times and the best events/sec is reported. Results are written as JSON, so that
+runs on different commits may be compared:
+
+$ python benchmarks/suite.py --output before.json
+$ git checkout my-branch && python setup.py install
+$ python benchmarks/suite.py --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from dstreader import DstDataset, DstFile
+from dstreader import ops as dst_ops
+
+EXAMPLE_DST_FILE = Path(__file__).parent.parent / "examples" / "example.dst.gz"
+
+
+def make_synthetic_file(output: Path, replicas: int) -> int:
+    return dst_ops.concatenate([EXAMPLE_DST_FILE] * replicas, output)
+
+
+# single-file benchmarks: each function reads the whole file and returns the number of events processed
+
+
+def plain_iteration(dst: DstFile) -> int:
+    return sum(1 for _ in dst.events())
+
+
+def count_only(dst: DstFile) -> int:
+    return sum(1 for _ in dst.events(banks=[], yield_=None))
+
+
+def bank_filtered_iteration(dst: DstFile) -> int:
+    return sum(1 for _ in dst.events(banks=["rusdmc"], yield_=None))
+
+
+def scalar_field_access(dst: DstFile) -> int:
+    n = 0
+    for banks in dst.events(banks=["rusdmc"]):
+        if "rusdmc" in banks:
+            dst.get_bank("rusdmc")["energy"]
+            n += 1
+    return n
+
+
+def array_field_copy(dst: DstFile) -> int:
+    n = 0
+    for banks in dst.events(banks=["rusdraw"]):
+        if "rusdraw" in banks:
+            dst.get_bank("rusdraw")["fadc"]
+            n += 1
+    return n
+
+
+def array_field_view(dst: DstFile) -> int:
+    n = 0
+    for banks in dst.events(banks=["rusdraw"]):
+        if "rusdraw" in banks:
+            dst.get_bank("rusdraw", views=True)["fadc"]
+            n += 1
+    return n
+
+
+def columnar_extraction(dst: DstFile) -> int:
+    return dst.read_all_columns({"rusdmc": ["energy", "theta", "phi"]}).size
+
+
+SINGLE_FILE_BENCHMARKS: Dict[str, Callable[[DstFile], int]] = {
+    f.__name__: f
+    for f in [
+        plain_iteration,
+        count_only,
+        bank_filtered_iteration,
+        scalar_field_access,
+        array_field_copy,
+        array_field_view,
+        columnar_extraction,
+    ]
+}
+
+
+def best_rate(run: Callable[[], int], repeat: int) -> Dict[str, float]:
+    best_time: Optional[float] = None
+    n_events = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        n_events = run()
+        elapsed = time.perf_counter() - start
+        best_time = elapsed if best_time is None else min(best_time, elapsed)
+    return {"events": n_events, "seconds": best_time, "events_per_sec": n_events / best_time if best_time else 0.0}
+
+
+def run_suite(replicas: List[int], n_files: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    results: Dict[str, Dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for n_replicas in replicas:
+            synthetic_file = Path(tmpdir) / f"synthetic_x{n_replicas}.dst.gz"
+            make_synthetic_file(synthetic_file, n_replicas)
+            for name, benchmark in SINGLE_FILE_BENCHMARKS.items():
+
+                def run() -> int:
+                    with DstFile(synthetic_file) as dst:
+                        return benchmark(dst)
+
+                results[f"{name}[x{n_replicas}]"] = best_rate(run, repeat)
+
+        largest_file = Path(tmpdir) / f"synthetic_x{max(replicas)}.dst.gz"
+        dataset = DstDataset([largest_file] * n_files)
+        results[f"multi_file_count_only[{n_files} files]"] = best_rate(lambda: sum(dataset.map(count_only)), repeat)
+        results[f"multi_file_columns[{n_files} files]"] = best_rate(
+            lambda: dataset.read_all_columns({"rusdmc": ["energy", "theta", "phi"]}).size, repeat
+        )
+    return results
+
+
+def current_commit() -> Optional[str]:
+    res = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, cwd=Path(__file__).parent)
+    return res.stdout.decode("utf-8").strip() if res.returncode == 0 else None
+
+
+def print_comparison(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]]):
+    print(f"{'benchmark':<45} {'baseline, ev/s':>15} {'current, ev/s':>15} {'ratio':>7}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None or not base["events_per_sec"]:
+            print(f"{name:<45} {'-':>15} {result['events_per_sec']:>15.0f} {'-':>7}")
+        else:
+            ratio = result["events_per_sec"] / base["events_per_sec"]
+            print(f"{name:<45} {base['events_per_sec']:>15.0f} {result['events_per_sec']:>15.0f} {ratio:>7.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--replicas", nargs="+", type=int, default=[1, 10, 100], help="sizes of synthetic files")
+    parser.add_argument("--files", type=int, default=4, help="number of files in multi-file benchmarks")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, default=None, help="JSON file to write results to")
+    parser.add_argument("--compare", type=Path, default=None, help="JSON file with baseline results")
+    args = parser.parse_args()
+
+    results = run_suite(args.replicas, args.files, args.repeat)
+    report = {
+        "commit": current_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2))
+    if args.compare is not None:
+        print_comparison(results, json.loads(args.compare.read_text())["results"])
+    else:
+        print(json.dumps(report, indent=2))
@@ -0,0 +1,52 @@
+"""Benchmark of reading several DST files concurrently with threads and with worker processes
+
+$ python benchmarks/threaded_reading.py runs/my-run/final/*.dst.gz --workers 1 2 4 8
+
+Events are decoded one at a time because bank structs are process globals (see dstreader.units.BANK_STRUCTS_LOCK),
+so threaded reading does not scale with cores and is expected to take about the same time for any number of
+threads. Worker processes (DstDataset) do scale.
+Threads read columns, since banks of the current event in events() loop may be overwritten by other threads.
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+from dstreader import DstDataset, DstFile
+
+
+def read_mc_energies(dst: DstFile) -> int:
+    return dst.read_all_columns({"rusdmc": ["energy", "theta", "phi"]}).size
+
+
+def read_file(filename: str, func: Callable[[DstFile], int]) -> int:
+    with DstFile(filename) as dst:
+        return func(dst)
+
+
+def run_threads(files: List[str], n_workers: int) -> int:
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        return sum(executor.map(read_file, files, [read_mc_energies] * len(files)))
+
+
+def run_processes(files: List[str], n_workers: int) -> int:
+    return sum(DstDataset(files, max_workers=n_workers).map(read_mc_energies))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4])
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'threads, s':>12} {'processes, s':>14} {'events':>10}")
+    for n_workers in args.workers:
+        start = time.perf_counter()
+        n_events = run_threads(args.files, n_workers)
+        threads_time = time.perf_counter() - start
+        start = time.perf_counter()
+        n_events_processes = run_processes(args.files, n_workers)
+        processes_time = time.perf_counter() - start
+        assert n_events == n_events_processes, "Threads and processes read different number of events"
+        print(f"{n_workers:>8} {threads_time:>12.3f} {processes_time:>14.3f} {n_events:>10}")
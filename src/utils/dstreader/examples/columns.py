@@ -0,0 +1,11 @@
+from pathlib import Path
+
+from dstreader import DstFile
+
+example_dst_file = Path(__file__).parent / 'example.dst.gz'
+
+with DstFile(example_dst_file) as dst:
+    events = dst.read_all_columns({"rusdmc": ["energy", "theta", "phi"], "rusdraw": ["nofwf"]})
+    print(f"{events.size} events read")
+    print(events["rusdmc.energy"])
+    print(events[events["rusdraw.nofwf"] > 0]["rusdmc.theta"])
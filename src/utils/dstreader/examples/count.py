@@ -0,0 +1,14 @@
+from pathlib import Path
+
+from dstreader import DstFile
+
+example_dst_file = Path(__file__).parent / 'example.dst.gz'
+
+with DstFile(example_dst_file) as dst:
+    n_events = sum(1 for _ in dst.events(banks=[], yield_=None))
+    print(f"{n_events} events in file")
+
+with DstFile(example_dst_file) as dst:
+    for _ in dst.events(banks=["rusdmc"], yield_=None):
+        rusdmc = dst.get_bank('rusdmc')
+        print(f"E = {(1000 * rusdmc['energy']):.3f} PeV")
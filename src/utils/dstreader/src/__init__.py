@@ -1,5 +1,7 @@
+from .dataset import DstDataset
 from .dst_file import DstFile
 
 __all__ = [
     "DstFile",
+    "DstDataset",
 ]
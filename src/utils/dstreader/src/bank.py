@@ -1,16 +1,57 @@
+import operator
 import warnings
 from numbers import Number
-from typing import List, TypeVar, Union
+from typing import Any, Callable, Dict, List, Tuple, TypeVar, Union
 
 from numpy.typing import NDArray
 
 from . import dstreader_core as dstc
 from .bank_docs import generated_bank_docs
+from .units import BANK_STRUCTS_LOCK
 
 _SwigGeneratedBankObject = TypeVar("_SwigGeneratedBankObject")
 
 _SwigOpaquePointer = TypeVar("_SwigOpaquePointer")
 
+_FieldGetter = Callable[[_SwigGeneratedBankObject], Any]
+
+# field getters are resolved on first access and reused afterwards; key is (bank name, field name, views)
+_FIELD_GETTERS: Dict[Tuple[str, str, bool], _FieldGetter] = {}
+
+
+def _read_only_view(view_accessor: Callable[[], NDArray]) -> _FieldGetter:
+    def getter(_: _SwigGeneratedBankObject) -> NDArray:
+        view = view_accessor()
+        view.flags.writeable = False
+        return view
+
+    return getter
+
+
+def _resolve_field_getter(bank_name: str, bank_obj: _SwigGeneratedBankObject, key: str, views: bool) -> _FieldGetter:
+    value = getattr(bank_obj, key, None)
+    if value is None:
+        raise KeyError(f"{bank_name} bank does not containt {key} field! Use .keys() method to see available fields")
+    if type(value).__name__ != "SwigPyObject":
+        return operator.attrgetter(key)
+
+    # ooops seems like an opaque SWIG object, probably an array, maybe we have a custom accessor for it?
+    if views:
+        view_accessor = getattr(dstc, f"view_{bank_name}_{key}", None)
+        if view_accessor is not None:
+            return _read_only_view(view_accessor)
+    accessor_func = getattr(dstc, f"get_{bank_name}_{key}", None)
+    if accessor_func is not None:
+        return lambda _: accessor_func()
+
+    warnings.warn(
+        f"Can't interpret value of field {key} in a meaningful way: no default nor "
+        + "custom accessors seem to exist; returning opaque pointer, but you "
+        + "will likely not be able to use it.",
+        RuntimeWarning,
+    )
+    return operator.attrgetter(key)
+
 
 class Bank:
     """Generic wrapper for bank object, its only job is to dispatch user to custom accessors
@@ -20,12 +61,19 @@ class Bank:
     To get a field from bank, use dict-like syntax:
     >>> rusdraw = dst.get_bank("rusdraw")
     >>> fadc = rusdraw["fadc"]
+
+    With views=True array fields are returned as read-only numpy views onto the global bank struct
+    instead of fresh copies. Views are only valid until the next event is read, so copy them explicitly
+    if you need to keep the data:
+    >>> rusdraw = dst.get_bank("rusdraw", views=True)
+    >>> fadc = rusdraw["fadc"].copy()
     """
 
-    def __init__(self, name: str, bank_obj: _SwigGeneratedBankObject):
+    def __init__(self, name: str, bank_obj: _SwigGeneratedBankObject, views: bool = False):
         self.name = name  # name is stored without trailing underscore
         self.bank_obj = bank_obj
         self.bank_class = bank_obj.__class__
+        self.views = views
 
     def __str__(self) -> str:
         return f"{self.name} bank, wrapping {self.bank_obj}"
@@ -47,27 +95,10 @@ class Bank:
         ]
 
     def __getitem__(self, key: str) -> Union[Number, NDArray, _SwigOpaquePointer]:
-        value = getattr(self.bank_obj, key, None)
-        if value is None:
-            raise KeyError(
-                f"{self.name} bank does not containt {key} field! Use .keys() method to see available fields"
-            )
-        if type(value).__name__ == "SwigPyObject":
-            # ooops seems like an opaque SWIG object, probably an array, maybe we have a custom accessor for it?
-            accessor_func_name = f"get_{self.name}_{key}"
-            accessor_func = getattr(dstc, accessor_func_name, None)
-            if accessor_func is None:
-                warnings.warn(
-                    f"Can't interpret value of field {key} in a meaningful way: no default nor "
-                    + "custom accessors seem to exist; returning opaque pointer, but you "
-                    + "will likely not be able to use it.",
-                    RuntimeWarning,
-                )
-                value: _SwigOpaquePointer
-                return value
-            else:
-                value: NDArray = accessor_func()
-                return value
-        else:
-            value: Number
-            return value
+        getter_key = (self.name, key, self.views)
+        getter = _FIELD_GETTERS.get(getter_key)
+        if getter is None:
+            getter = _resolve_field_getter(self.name, self.bank_obj, key, self.views)
+            _FIELD_GETTERS[getter_key] = getter
+        with BANK_STRUCTS_LOCK:  # so that the field is not copied while another thread reads an event into it
+            return getter(self.bank_obj)
@@ -0,0 +1,112 @@
+import glob
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from functools import partial
+from pathlib import Path
+from typing import Callable, Deque, Generator, Iterable, List, Optional, Set, TypeVar, Union
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .dst_file import BanksFields, DstFile
+
+T = TypeVar("T")
+
+
+def _apply_to_file(func: Callable[[DstFile], T], filename: str) -> T:
+    # executed in worker process, which has its own copies of unit ids and global bank structs
+    with DstFile(filename) as dst:
+        return func(dst)
+
+
+def _read_all_columns(banks_fields: BanksFields, batch_size: int, dst: DstFile) -> NDArray[np.void]:
+    return dst.read_all_columns(banks_fields, batch_size=batch_size)
+
+
+class DstDataset:
+    """A collection of DST files processed in parallel by a pool of worker processes. Bank structs
+    are C globals, so files can't be read concurrently in one process, but each worker reads its own
+    file independently.
+
+    >>> dataset = DstDataset("runs/my-run/final/*.rufldf.dst.gz")
+    >>> events = dataset.read_all_columns({"rufldf": ["xcore", "ycore", "s800"]})
+
+    Results are streamed back per file, with at most max_in_flight files being processed or waiting
+    to be consumed at any given time, so memory usage is bounded regardless of dataset size.
+    """
+
+    def __init__(
+        self,
+        files: Union[str, Path, Iterable[Union[str, Path]]],
+        max_workers: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+    ):
+        if isinstance(files, (str, Path)):
+            self.files = sorted(glob.glob(str(files)))
+        else:
+            self.files = [str(Path(f).resolve()) if isinstance(f, Path) else f for f in files]
+        if not self.files:
+            raise ValueError(f"No DST files found in {files}")
+        self.max_workers = max_workers
+        self.max_in_flight = max_in_flight
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def map(self, func: Callable[[DstFile], T], ordered: bool = True) -> Generator[T, None, None]:
+        """Apply func to each opened DstFile in a worker process and yield results, either in the order of
+        files (ordered=True) or as soon as they are ready. func must be picklable, i.e. a module-level function
+        or a functools.partial of one."""
+        max_workers = self.max_workers or os.cpu_count() or 1
+        max_in_flight = self.max_in_flight or 2 * max_workers
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            files_iter = iter(self.files)
+
+            def submit_next() -> Optional[Future]:
+                filename = next(files_iter, None)
+                if filename is None:
+                    return None
+                return executor.submit(_apply_to_file, func, filename)
+
+            if ordered:
+                queue: Deque[Future] = deque()
+                for _ in range(max_in_flight):
+                    future = submit_next()
+                    if future is None:
+                        break
+                    queue.append(future)
+                while queue:
+                    result = queue.popleft().result()
+                    future = submit_next()
+                    if future is not None:
+                        queue.append(future)
+                    yield result
+            else:
+                pending: Set[Future] = set()
+                for _ in range(max_in_flight):
+                    future = submit_next()
+                    if future is None:
+                        break
+                    pending.add(future)
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        next_future = submit_next()
+                        if next_future is not None:
+                            pending.add(next_future)
+                    for future in done:
+                        yield future.result()
+
+    def read_columns(
+        self, banks_fields: BanksFields, batch_size: int = 10000, ordered: bool = True
+    ) -> Generator[NDArray[np.void], None, None]:
+        """Columnar extraction (see DstFile.read_columns) for each file, yielding one structured array per file"""
+        yield from self.map(partial(_read_all_columns, banks_fields, batch_size), ordered=ordered)
+
+    def read_all_columns(
+        self, banks_fields: BanksFields, batch_size: int = 10000, ordered: bool = True
+    ) -> NDArray[np.void]:
+        """Same as read_columns, but combines all files' arrays into one"""
+        arrays: List[NDArray[np.void]] = list(self.read_columns(banks_fields, batch_size=batch_size, ordered=ordered))
+        return np.concatenate(arrays)
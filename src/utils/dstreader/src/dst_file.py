@@ -1,27 +1,106 @@
+from functools import lru_cache
 from pathlib import Path
-from typing import Generator, List, Union
+from typing import Dict, Generator, Iterable, List, Literal, Optional, Tuple, Union
+
+import numpy as np
+from numpy.typing import NDArray
 
 from . import dstreader_core as dstc
 from .bank import Bank
 from .bank_docs import supported_banks
-from .units import free_unit_id, get_unit_id
+from .units import BANK_STRUCTS_LOCK, free_unit_id, get_unit_id
+
+BanksFields = Dict[str, List[str]]  # e.g. {"rufldf": ["xcore", "ycore", "s800"], "rusdmc": ["energy"]}
+
+EventsYield = Literal["names", "ids", None]
+
+FileMode = Literal["r", "w"]
+
+
+@lru_cache(maxsize=None)
+def bank_id(bank_name: str) -> int:
+    return dstc.bankIdFromName(bank_name)
+
+
+@lru_cache(maxsize=None)
+def bank_name_from_id(bank_id: int) -> str:
+    # 1024 is a max len of copied bank name - playing it safe
+    _, bank_name = dstc.eventNameFromId(bank_id, 1024)
+    return bank_name
+
+
+def _new_want_list(banks: Optional[Iterable[str]]) -> int:
+    """Bank list for eventRead's 'want' argument; None means reading all banks"""
+    want = dstc.newBankList(dstc.n_banks_total_())
+    if banks is not None:
+        dstc.clrBankList(want)
+        for bank_name in banks:
+            dstc.addBankList(want, bank_id(bank_name))
+    return want
+
+
+def _columns_layout(banks_fields: BanksFields) -> Tuple[np.dtype, NDArray[np.longlong], NDArray[np.longlong]]:
+    """Record dtype and addresses and sizes of fields in global bank structs, in the order of copying"""
+    dtype_spec = []
+    field_addresses = []
+    field_sizes = []
+    for bank_name, field_names in banks_fields.items():
+        if bank_name not in supported_banks:
+            raise ValueError(
+                f"Bank {bank_name!r} is not supported; currently supported banks are: " + ", ".join(supported_banks)
+            )
+        for field_name in field_names:
+            view_accessor = getattr(dstc, f"view_{bank_name}_{field_name}", None)
+            if view_accessor is None:
+                raise KeyError(f"{bank_name} bank does not containt {field_name} field or it is not fixed-size")
+            view: NDArray = view_accessor()
+            shape = () if view.shape == (1,) else view.shape  # scalar fields have 1-element views
+            dtype_spec.append((f"{bank_name}.{field_name}", view.dtype, shape))
+            field_addresses.append(view.__array_interface__['data'][0])
+            field_sizes.append(view.nbytes)
+    return (
+        np.dtype(dtype_spec),  # packed, so record layout matches consecutive memcpy's in C
+        np.array(field_addresses, dtype=np.longlong),
+        np.array(field_sizes, dtype=np.longlong),
+    )
 
 
 class DstFile:
-    def __init__(self, filename: Union[str, Path]):
+    """DST file opened for reading (mode="r", default) or writing (mode="w"). Files opened for writing
+    receive events from files being read, see write_event:
+
+    >>> with DstFile("in.dst.gz") as src, DstFile("out.dst.gz", mode="w") as dst:
+    >>>     for _ in src.events(yield_=None):
+    >>>         dst.write_event(src)
+    """
+
+    def __init__(self, filename: Union[str, Path], mode: FileMode = "r"):
         if isinstance(filename, Path):
             filename = str(filename.resolve())
         self.filename = filename
+        if mode not in {"r", "w"}:
+            raise ValueError(f"mode must be 'r' or 'w', got {mode!r}")
+        self.mode = mode
+        self.is_open = False
+        self.event_is_read = False
+        self.n_events_written = 0
+        self._current_event_banks: Optional[int] = None  # 'got' bank list of the current event
+        self._current_event_type: Optional[int] = None
+        self._banks: Dict[Tuple[str, bool], Bank] = dict()
 
     def open(self):
-        if not Path(self.filename).exists():
+        if self.mode == "r" and not Path(self.filename).exists():
             raise FileNotFoundError(f"DST file not found: {self.filename}")
         self.is_open = True
+        self.event_is_read = False
+        self.n_events_written = 0
         self.unit = get_unit_id()
-        dstc.dstOpenUnit(self.unit, self.filename, dstc.MODE_READ_DST)
+        with BANK_STRUCTS_LOCK:
+            dstc.dstOpenUnit(self.unit, self.filename, dstc.MODE_READ_DST if self.mode == "r" else dstc.MODE_WRITE_DST)
 
     def close(self):
-        dstc.dstCloseUnit(self.unit)
+        with BANK_STRUCTS_LOCK:
+            dstc.dstCloseUnit(self.unit)
         free_unit_id(self.unit)
         self.is_open = False
 
@@ -32,9 +111,14 @@ class DstFile:
     def __exit__(self, *exc_args):
         self.close()
 
-    def get_bank(self, bank_name: str) -> Bank:
+    def get_bank(self, bank_name: str, views: bool = False) -> Bank:
+        """Get bank wrapper for the current event. With views=True, array fields are returned
+        as read-only numpy views, valid only until the next event is read (see Bank)"""
         if not self.event_is_read:
             raise ValueError("Banks are only available when iterating over events")
+        cached_bank = self._banks.get((bank_name, views))
+        if cached_bank is not None:
+            return cached_bank
         if bank_name not in supported_banks:
             raise ValueError(
                 f"Bank {bank_name!r} is not supported; currently supported banks are: " + ", ".join(supported_banks)
@@ -43,37 +127,141 @@ class DstFile:
         bank_obj = getattr(dstc, bank_obj_name, None)
         if bank_obj is None:
             raise KeyError(f"No such bank: {bank_name!r}")
-        else:
-            return Bank(bank_name, bank_obj)
+        bank = Bank(bank_name, bank_obj, views=views)
+        self._banks[(bank_name, views)] = bank
+        return bank
 
-    def events(self) -> Generator[List[str], None, None]:
-        """Generator function yielding event numbers"""
+    def events(
+        self, banks: Optional[Iterable[str]] = None, yield_: EventsYield = "names"
+    ) -> Generator[Union[List[str], List[int], None], None, None]:
+        """Generator function iterating over events in the file. Yields a list of bank names present in
+        the event (yield_="names"), a list of their ids (yield_="ids") or just None (yield_=None), which is
+        the fastest option when you only need to count events or read a known set of banks.
+
+        If banks are specified, only these banks are read from the file, others are skipped by the reader.
+
+        Bank structs are process globals shared by all open files, so banks of the current event are only valid
+        until any DstFile in the process reads the next event. In multithreaded code, iterate with events() in one
+        thread at a time, or use read_columns, which copies requested fields while holding units.BANK_STRUCTS_LOCK.
+        """
         if not self.is_open:
             raise ValueError("DstFile must be open to iterate over events")
-        n_banks = dstc.n_banks_total_()
-        want = dstc.newBankList(n_banks)
-        got = dstc.newBankList(n_banks)
+        if self.mode != "r":
+            raise ValueError("DstFile must be opened for reading to iterate over events")
+        if yield_ not in {"names", "ids", None}:
+            raise ValueError(f"yield_ must be one of 'names', 'ids' or None, got {yield_!r}")
+        want = _new_want_list(banks)
+        got = dstc.newBankList(dstc.n_banks_total_())
         event_ptr = dstc.new_intp()  # int pointer
-        while True:
-            rc = dstc.eventRead(self.unit, want, got, event_ptr)
-            self.event_is_read = True
-            if rc < 0:
-                self.event_is_read = False
-                break
-
-            # same as dstlist.run - iterating over banks in the event and yielding their names
-            bank_names: List[str] = []
-            i_ptr = dstc.new_intp()
-            dstc.intp_assign(i_ptr, 0)
+        i_ptr = dstc.new_intp()  # bank list iterator position
+        try:
             while True:
-                bank_id = dstc.itrBankList(got, i_ptr)
-                if bank_id == 0:
+                with BANK_STRUCTS_LOCK:  # only for the duration of the call, never across yield
+                    rc = dstc.eventRead(self.unit, want, got, event_ptr)
+                if rc < 0:
+                    self.event_is_read = False
                     break
-                # 1024 is a max len of copied bank name - playing it safe
-                _, bank_name = dstc.eventNameFromId(bank_id, 1024)
-                bank_names.append(bank_name)
+                self.event_is_read = True
+                self._current_event_banks = got
+                self._current_event_type = dstc.intp_value(event_ptr)
+
+                if yield_ is None:
+                    yield None
+                    continue
+
+                # same as dstlist.run - iterating over banks in the event
+                bank_ids: List[int] = []
+                dstc.intp_assign(i_ptr, 0)
+                while True:
+                    bank_id_ = dstc.itrBankList(got, i_ptr)
+                    if bank_id_ == 0:
+                        break
+                    bank_ids.append(bank_id_)
+
+                if yield_ == "ids":
+                    yield bank_ids
+                else:
+                    yield [bank_name_from_id(bank_id_) for bank_id_ in bank_ids]
+        finally:
+            self.event_is_read = False
+            self._current_event_banks = None
             dstc.delete_intp(i_ptr)
+            dstc.delete_intp(event_ptr)
+            dstc.delBankList(want)
+            dstc.delBankList(got)
+
+    def write_event(self, source: "DstFile", banks: Optional[Iterable[str]] = None):
+        """Write current event of the source file (i.e. the one being processed in source.events() loop)
+        to this file. By default all banks present in the event are written; to write only some of them,
+        pass their names. Note that only the banks read by source.events() contain actual data."""
+        if not self.is_open or self.mode != "w":
+            raise ValueError("DstFile must be open for writing to write events")
+        if not source.event_is_read or source._current_event_banks is None:
+            raise ValueError("Events can only be written while iterating over source file's events")
+        with BANK_STRUCTS_LOCK:
+            if banks is None:
+                rc = dstc.eventWrite(self.unit, source._current_event_banks, source._current_event_type)
+            else:
+                banks_list = _new_want_list(banks)
+                try:
+                    rc = dstc.eventWrite(self.unit, banks_list, source._current_event_type)
+                finally:
+                    dstc.delBankList(banks_list)
+        if rc < 0:
+            raise IOError(f"Failed to write event to {self.filename} (return code {rc})")
+        self.n_events_written += 1
+
+    def read_columns(
+        self, banks_fields: BanksFields, batch_size: int = 10000
+    ) -> Generator[NDArray[np.void], None, None]:
+        """Generator function yielding structured numpy arrays of at most batch_size records, each record
+        containing requested fields named "bank.field". Events are iterated in C and fields are copied directly
+        from bank structs into the batch buffer; events missing any of requested banks are skipped.
+
+        >>> for batch in dst.read_columns({"rufldf": ["xcore", "ycore", "s800"]}):
+        >>>     s800 = batch["rufldf.s800"]
+        """
+        if not self.is_open or self.mode != "r":
+            raise ValueError("DstFile must be open for reading to read columns")
+        if batch_size <= 0:
+            raise ValueError(f"batch_size must be positive, got {batch_size}")
+        record_dtype, field_addresses, field_sizes = _columns_layout(banks_fields)
+        required_bank_ids = np.array([bank_id(bank_name) for bank_name in banks_fields.keys()], dtype=np.intc)
+
+        want = _new_want_list(banks_fields.keys())
+        got = dstc.newBankList(dstc.n_banks_total_())
+        self.event_is_read = False  # bank structs are overwritten batch-wise, there is no current event
+        try:
+            while True:
+                buffer = np.empty(batch_size * record_dtype.itemsize, dtype=np.uint8)
+                with BANK_STRUCTS_LOCK:
+                    n_records = dstc.readEventRecords(
+                        self.unit,
+                        want,
+                        got,
+                        required_bank_ids,
+                        field_addresses,
+                        field_sizes,
+                        buffer,
+                        record_dtype.itemsize,
+                    )
+                if n_records > 0:
+                    yield buffer[: n_records * record_dtype.itemsize].view(record_dtype)
+                if n_records < batch_size:
+                    break
+        finally:
+            dstc.delBankList(want)
+            dstc.delBankList(got)
 
-            yield bank_names
+    def read_all_columns(self, banks_fields: BanksFields, batch_size: int = 10000) -> NDArray[np.void]:
+        """Same as read_columns, but combines all batches into one structured array for the whole file"""
+        batches = list(self.read_columns(banks_fields, batch_size=batch_size))
+        if not batches:
+            return np.empty(0, dtype=self.columns_dtype(banks_fields))
+        return np.concatenate(batches)
 
-        dstc.delete_intp(event_ptr)
+    @staticmethod
+    def columns_dtype(banks_fields: BanksFields) -> np.dtype:
+        """Structured dtype of records yielded by read_columns"""
+        record_dtype, _, _ = _columns_layout(banks_fields)
+        return record_dtype
@@ -0,0 +1,56 @@
+"""Streaming DST file manipulations done in-process: each event is decompressed and compressed once"""
+
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Union
+
+from .dst_file import DstFile
+
+PathLike = Union[str, Path]
+
+
+def concatenate(sources: Iterable[PathLike], output: PathLike) -> int:
+    """Equivalent to dstcat.run; returns the number of events written"""
+    with DstFile(output, mode="w") as out:
+        for source in sources:
+            with DstFile(source) as src:
+                for _ in src.events(yield_=None):
+                    out.write_event(src)
+        return out.n_events_written
+
+
+def filter_events(
+    source: PathLike, output: PathLike, predicate: Callable[[DstFile], bool], banks: Optional[Iterable[str]] = None
+) -> int:
+    """Write events of source file for which predicate returns True to output file. Predicate is called on
+    the source DstFile, so it can get banks of the current event. If banks are specified, only they are written.
+    Returns the number of events written."""
+    banks = list(banks) if banks is not None else None
+    with DstFile(source) as src, DstFile(output, mode="w") as out:
+        for _ in src.events(yield_=None):
+            if predicate(src):
+                out.write_event(src, banks=banks)
+        return out.n_events_written
+
+
+def shard(source: PathLike, outputs: List[PathLike], events_per_shard: Optional[int] = None) -> List[int]:
+    """Split source file into several output files: consecutive chunks of events_per_shard events (the last file
+    receives the rest) or, if events_per_shard is not specified, round-robin. Returns events written to each file."""
+    if not outputs:
+        raise ValueError("At least one output file must be specified")
+    if events_per_shard is not None and events_per_shard <= 0:
+        raise ValueError(f"events_per_shard must be positive, got {events_per_shard}")
+    shards = [DstFile(output, mode="w") for output in outputs]
+    for shard_file in shards:
+        shard_file.open()
+    try:
+        with DstFile(source) as src:
+            for i, _ in enumerate(src.events(yield_=None)):
+                if events_per_shard is None:
+                    i_shard = i % len(shards)
+                else:
+                    i_shard = min(i // events_per_shard, len(shards) - 1)
+                shards[i_shard].write_event(src)
+    finally:
+        for shard_file in shards:
+            shard_file.close()
+    return [shard_file.n_events_written for shard_file in shards]
@@ -1,13 +1,30 @@
+"""DST file unit ids are managed by dst2k globally per process, so this pool is process-local;
+use DstDataset to read many files in parallel"""
+
+import threading
+
 from . import dstreader_core as dstc
 
 FREE_UNIT_IDS = set(range(1, dstc.MAX_DST_FILE_UNITS + 1))
+_UNIT_IDS_LOCK = threading.Lock()
+
+# Bank structs filled by eventRead and dst2k's decoding state are process globals, so every C call touching them
+# (opening and closing units, reading and writing events, copying bank fields) is made while holding this lock.
+# The GIL is only released inside the batch reading loop (readEventRecords), which also holds the lock.
+# Threads therefore never decode DST files in parallel and reading with threads does not scale with cores;
+# for parallel reading of many files use DstDataset, which runs worker processes.
+BANK_STRUCTS_LOCK = threading.Lock()
 
 
 def get_unit_id() -> int:
-    if len(FREE_UNIT_IDS) == 0:
-        raise Exception("Too many open .dst files!")
-    return FREE_UNIT_IDS.pop()
+    with _UNIT_IDS_LOCK:
+        if len(FREE_UNIT_IDS) == 0:
+            raise Exception(
+                f"Too many open .dst files! At most {dstc.MAX_DST_FILE_UNITS} may be open at once in one process"
+            )
+        return FREE_UNIT_IDS.pop()
 
 
 def free_unit_id(unit: int):
-    FREE_UNIT_IDS.add(unit)
+    with _UNIT_IDS_LOCK:
+        FREE_UNIT_IDS.add(unit)
@@ -21,6 +21,18 @@ import_array();
 %include "cpointer.i"
 %pointer_functions(int, intp);
 
+// releasing GIL for the duration of batch reading loop; bank structs and dst2k's decoding state are
+// process globals, so it is only called while holding units.BANK_STRUCTS_LOCK, and all other calls
+// touching the globals (eventRead, open/close, field accessors) hold the GIL and take the same lock
+%define %release_gil(function)
+%exception function {
+    Py_BEGIN_ALLOW_THREADS
+    $action
+    Py_END_ALLOW_THREADS
+}
+%enddef
+%release_gil(readEventRecords);
+
 // making functions return string on Python side instead of modifying char * arg inplace
 %include "cstring.i"
 // other functions with char * argument may be mapped the same way
@@ -39,6 +51,60 @@ integer4 eventNameFromId(integer4 bank, integer1 *name, integer4 len);
 // bank list manipulations
 %include "bank_list.h"
 
+// bank id lookup by name, wrapped to accept Python strings
+%inline %{
+integer4 bankIdFromName(const char *name)
+{
+    return eventIdFromName((integer1 *) name);
+}
+%}
+
+// batch reading of fixed-size fields from consecutive events into a preallocated buffer, see DstFile.read_columns;
+// field addresses point into global bank structs, events missing any of the required banks are skipped
+%apply (int* IN_ARRAY1, int DIM1) { (int* required_bank_ids, int n_required_banks) };
+%apply (long long* IN_ARRAY1, int DIM1) { (long long* field_addresses, int n_field_addresses) };
+%apply (long long* IN_ARRAY1, int DIM1) { (long long* field_sizes, int n_field_sizes) };
+%apply (unsigned char* INPLACE_ARRAY1, int DIM1) { (unsigned char* records, int records_size) };
+%inline %{
+int readEventRecords(
+    integer4 unit, integer4 want, integer4 got,
+    int* required_bank_ids, int n_required_banks,
+    long long* field_addresses, int n_field_addresses,
+    long long* field_sizes, int n_field_sizes,
+    unsigned char* records, int records_size,
+    int record_size
+)
+{
+    integer4 event;
+    int n_records = 0;
+    int max_records = records_size / record_size;
+    while (n_records < max_records)
+    {
+        if (eventRead(unit, want, got, &event) < 0)
+            break;
+        int has_required_banks = 1;
+        for (int i = 0; i < n_required_banks; i++)
+        {
+            if (!tstBankList(got, required_bank_ids[i]))
+            {
+                has_required_banks = 0;
+                break;
+            }
+        }
+        if (!has_required_banks)
+            continue;
+        unsigned char* record = records + (size_t) n_records * record_size;
+        for (int i = 0; i < n_field_addresses && i < n_field_sizes; i++)
+        {
+            memcpy(record, (void*) field_addresses[i], field_sizes[i]);
+            record += field_sizes[i];
+        }
+        n_records++;
+    }
+    return n_records;
+}
+%}
+
 
 // actual banks to be exposed to Python will be appended here automatically on installation
 // see setup.py for currently added and more or less tested banks.
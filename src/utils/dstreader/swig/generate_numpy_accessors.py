@@ -9,7 +9,7 @@ start of the array and lose all info about its size.
 >>>     fieldtype fieldname[size1][size2];
 >>>     ...
 >>> } structtype;
-... 
+...
 >>> // global struct instance
 >>> extern structtype structname;
 
@@ -29,12 +29,28 @@ a copy of the data.
 This way we can then call this function from Python like this:
 
 >>> arr = get_structname_fieldname()  # arr is 2D numpy ndarray
+
+Copying accessors allocate a new array on each call, which is a bottleneck when iterating over
+millions of events. So, for each field we also generate a view accessor, returning numpy array
+that points directly to the global struct's memory (ARGOUTVIEW typemap):
+
+>>> %apply ( fieldtype** ARGOUTVIEW_ARRAY2, int* DIM1, int* DIM2 ) { (fieldtype** view, int* dim1, int* dim2) };
+...
+>>> void view_structname_fieldname(fieldtype** view, int* dim1, int* dim2) {
+>>>     *view = (fieldtype*) structname.fieldname;
+>>>     *dim1 = size1;
+>>>     *dim2 = size2;
+>>> }
+
+Views are only valid until the next event is read, as the global struct is overwritten by reader.
+Scalar fields get 1-element view accessors too, so that Python side can learn address, size and dtype
+of any field, e.g. to set up batch copying in DstFile.read_columns.
 """
 
 import argparse
 import re
 from pathlib import Path
-from typing import Tuple
+from typing import List, Tuple
 
 
 def generate_accesor_func(
@@ -56,6 +72,32 @@ def generate_accesor_func(
     return numpy_typemap, "\n".join([line[4:] for line in accessor_func.splitlines()])
 
 
+def generate_view_func(
+    field_type: str, field_name: str, field_dims: List[str], global_struct_name: str, scalar: bool = False
+) -> Tuple[str, str]:
+    view_var = "view"
+    field_ref = "&" if scalar else ""
+    ndim = len(field_dims)
+    dim_vars = [f"dim{i}" for i in range(1, ndim + 1)]
+    typemap_dims = ", ".join(f"int* DIM{i}" for i in range(1, ndim + 1))
+    func_dims = ", ".join(f"int* {dim_var}" for dim_var in dim_vars)
+    numpy_typemap = (
+        f"%apply ( {field_type}** ARGOUTVIEW_ARRAY{ndim}, {typemap_dims} ) "
+        + f"{{ ({field_type}** {view_var}, {func_dims}) }};"
+    )
+    dims_assignments = "\n".join(
+        f"        *{dim_var} = {field_dim};" for dim_var, field_dim in zip(dim_vars, field_dims)
+    )
+    view_func = f"""
+    void view_{global_struct_name.strip("_")}_{field_name}({field_type}** {view_var}, {func_dims})
+    {{
+        *{view_var} = ({field_type}*) {field_ref}{global_struct_name}.{field_name};
+{dims_assignments}
+    }}
+    """
+    return numpy_typemap, "\n".join([line[4:] for line in view_func.splitlines()])
+
+
 def generate_accessors(dst_bank_header: Path, interface_file: Path, doc_file: Path):
     source_code = dst_bank_header.read_text()
     space = r'\s*'
@@ -86,6 +128,7 @@ def generate_accessors(dst_bank_header: Path, interface_file: Path, doc_file: Pa
 
     field_patt_words = [r"(?P<type>\w+)", r"(?P<name>\w+)", r"(?P<sizes>\[.+\])", r"$"]
     field_patt = space.join(field_patt_words)
+    scalar_field_patt = space.join([r"(?P<type>\w+)", r"(?P<name>\w+)", r"$"])
 
     typemaps = set()
     funcs = []
@@ -93,16 +136,31 @@ def generate_accessors(dst_bank_header: Path, interface_file: Path, doc_file: Pa
     for statement in statements:
         field_match = re.match(field_patt, statement)
         if field_match is None:
-            # non-array param
+            scalar_field_match = re.match(scalar_field_patt, statement)
+            if scalar_field_match is not None:
+                view_typemap, view_func = generate_view_func(
+                    scalar_field_match.group('type'),
+                    scalar_field_match.group('name'),
+                    ["1"],
+                    global_struct_name,
+                    scalar=True,
+                )
+                typemaps.add(view_typemap)
+                funcs.append(view_func)
             continue
         field_type = field_match.group('type')
         field_name = field_match.group('name')
         field_sizes = field_match.group('sizes')
-        ndim = len(re.findall(r"\[", field_sizes))
+        field_dims = re.findall(r"\[(.+?)\]", field_sizes)
+        ndim = len(field_dims)
         print(f"{field_type} {field_name}{field_sizes};")
         typemap, acc_func = generate_accesor_func(field_type, field_name, field_sizes, ndim, global_struct_name)
         typemaps.add(typemap)
         funcs.append(acc_func)
+        if ndim <= 4:  # numpy.i provides ARGOUTVIEW typemaps for up to 4D arrays
+            view_typemap, view_func = generate_view_func(field_type, field_name, field_dims, global_struct_name)
+            typemaps.add(view_typemap)
+            funcs.append(view_func)
 
     with open(interface_file, "w") as interface, open(doc_file, "a") as doc:
         interface.write(
@@ -7,6 +7,7 @@ from random import random
 from typing import List
 
 from tasdmc.steps.base.files import Files
+from tasdmc.steps.exceptions import FilesCheckFailed
 from tasdmc.steps.processing.corsika import CorsikaCard, CorsikaOutputFiles
 from tasdmc.steps.processing.particle_file_splitting import SplitParticleFiles
 from tasdmc.steps.processing.dethinning import SplitParticleFile, DethinningOutputFiles
@@ -87,3 +88,16 @@ def test_file_checks_threadsafe(example_files: List[Files]):
                 futures = [executor.submit(_check_files, f=files) for _ in range(n_workers)]
                 [f.result() for f in futures]
     
+
+
+@pytest.mark.parametrize("streamed_parts, ok", [(2, True), (3, True), (0, False)])
+def test_streamed_split_parts_check(streamed_parts: int, ok: bool, tmp_path: Path):
+    files = [tmp_path / f"DAT000001.p{i + 1:02d}" for i in range(3)]
+    for f in files[:streamed_parts]:
+        Path(str(f) + '.deleted').touch()
+    split_files = SplitParticleFiles(files=files, stderr=EMPTY, stdout=ENDING_WITH_OK, streamed=True)
+    if ok:
+        split_files.assert_files_are_ready()
+    else:
+        with pytest.raises(FilesCheckFailed):
+            split_files.assert_files_are_ready()
@@ -0,0 +1,97 @@
+"""CLI startup time budget; commands like 'tasdmc progress --dump-json' are invoked on every node over SSH
+in distributed runs, so their import overhead must stay small"""
+
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from typing import Dict, List
+
+SRC_DIR = Path(__file__).parents[2] / "src"
+
+HEAVY_MODULES = ["fabric", "invoke", "paramiko", "plotext", "gdown", "tqdm", "setproctitle"]
+
+VERSION_IMPORT_BUDGET_SEC = 0.3
+PROGRESS_IMPORT_BUDGET_SEC = 0.6
+
+
+IMPORTTIME_LINE_RE = re.compile(r"^import time:\s+(?P<self>\d+) \|\s+(?P<cumulative>\d+) \|(?P<indent>\s+)(?P<name>\S+)$")
+
+
+def run_cli_with_importtime(cli_args: List[str], env: Dict[str, str]) -> Dict[str, float]:
+    """Run tasdmc CLI with -X importtime and return cumulative import times in seconds of top-level imports"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import sys; from tasdmc.cli import cli; cli(sys.argv[1:])", *cli_args],
+        env={**os.environ, **env, "PYTHONPATH": str(SRC_DIR)},
+        capture_output=True,
+        encoding="utf-8",
+    )
+    assert result.returncode == 0, result.stderr
+    top_level_imports: Dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE_RE.match(line)
+        if match is None or len(match.group("indent")) != 1:
+            continue
+        top_level_imports[match.group("name")] = int(match.group("cumulative")) / 1e6
+    return top_level_imports
+
+
+def total_import_time(top_level_imports: Dict[str, float]) -> float:
+    # site and encodings are imported by the interpreter regardless of the command
+    return sum(t for name, t in top_level_imports.items() if name != "site" and not name.startswith("encodings"))
+
+
+def assert_heavy_modules_not_imported(top_level_imports: Dict[str, float]):
+    for module in HEAVY_MODULES:
+        assert module not in top_level_imports, f"{module} imported on CLI startup"
+
+
+@pytest.fixture
+def local_run(tmp_path: Path) -> Dict[str, str]:
+    runs_dir = tmp_path / "runs"
+    data_dir = tmp_path / "data"
+    calibration_dir = data_dir / "sdcalib"
+    calibration_dir.mkdir(parents=True)
+    (calibration_dir / "sdcalib_0.bin").touch()
+    run_dir = runs_dir / "test-run"
+    (run_dir / "_logs").mkdir(parents=True)
+    (run_dir / "_logs" / "pipelines.log").touch()
+    (run_dir / "run.yaml").write_text(
+        """
+name: test-run
+input_files:
+  particle: proton
+  log10E_min: 17.5
+  log10E_max: 17.6
+  event_number_multiplier: 0.01
+corsika:
+  path: /nonexistent/corsika
+  low_E_hadronic_interactions_model: GHEISHA
+  high_E_hadronic_interactions_model: QGSJETII
+throwing:
+  n_events_at_min_energy: 1e6
+  dnde_exponent: 2
+  calibration_dir: sdcalib
+spectral_sampling:
+  target: HiRes
+"""
+    )
+    return {"TASDMC_RUNS_DIR": str(runs_dir), "TASDMC_DATA_DIR": str(data_dir)}
+
+
+def test_version_startup(tmp_path: Path):
+    top_level_imports = run_cli_with_importtime(["--version"], {"TASDMC_RUNS_DIR": str(tmp_path / "runs")})
+    assert_heavy_modules_not_imported(top_level_imports)
+    assert "psutil" not in top_level_imports
+    assert total_import_time(top_level_imports) < VERSION_IMPORT_BUDGET_SEC
+    assert not (tmp_path / "runs").exists(), "runs dir must not be created on startup"
+
+
+def test_progress_startup(local_run: Dict[str, str]):
+    top_level_imports = run_cli_with_importtime(["progress", "test-run", "--dump-json"], local_run)
+    assert_heavy_modules_not_imported(top_level_imports)
+    assert total_import_time(top_level_imports) < PROGRESS_IMPORT_BUDGET_SEC
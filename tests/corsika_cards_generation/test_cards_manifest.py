@@ -0,0 +1,116 @@
+from pathlib import Path
+import pytest
+from pytest_mock import MockerFixture
+
+from tasdmc.steps.corsika_cards_generation import generate_corsika_cards
+from tasdmc.steps.corsika_cards_generation.corsika_card import CorsikaCardData, fill_card_template
+from tasdmc.steps.corsika_cards_generation.cards_manifest import (
+    CardManifestEntry,
+    read_cards_manifest,
+    existing_card_runnrs,
+)
+
+
+def test_card_template_equivalent_to_card_editing():
+    cd = CorsikaCardData()
+    cd.set_fixed_log10en(18.5)
+    seeds = (1, 22, 333, 4444, 900000000)
+    card_from_template = fill_card_template(cd.as_template(), '004205', seeds)
+    cd.set_RUNNR('004205')
+    cd.set_SEED(*seeds)
+    assert card_from_template == cd.buf
+
+
+def test_manifest_entry_dump_parse():
+    entry = CardManifestEntry(card_index=42, log10E=18.5, runnr='004205', seeds=(1, 2, 3, 4, 5))
+    assert CardManifestEntry.parse(entry.dump()) == entry
+
+
+def test_manifest_entry_from_card_file(tmp_path: Path):
+    cd = CorsikaCardData()
+    seeds = (10, 20, 30, 40, 50)
+    card_file = tmp_path / 'DAT004205.in'
+    card_file.write_text(fill_card_template(cd.as_template(), '004205', seeds) + "\n")
+    assert CardManifestEntry.from_card_file(card_file) == CardManifestEntry(
+        card_index=42, log10E=18.5, runnr='004205', seeds=seeds
+    )
+
+
+def test_manifest_built_from_card_files_is_saved_only_if_requested(tmp_path: Path, mocker: MockerFixture):
+    mocker.patch("tasdmc.fileio.corsika_input_files_dir", return_value=tmp_path)
+    seeds = (10, 20, 30, 40, 50)
+    (tmp_path / 'DAT004205.in').write_text(fill_card_template(CorsikaCardData().as_template(), '004205', seeds) + "\n")
+    manifest_file = tmp_path / 'cards_manifest.tsv'
+
+    assert set(read_cards_manifest(save_built=False)) == {'004205'}
+    assert not manifest_file.exists()
+    assert set(read_cards_manifest()) == {'004205'}
+    assert manifest_file.exists()
+
+    (tmp_path / 'DAT004205.in').unlink()
+    assert set(read_cards_manifest()) == {'004205'}
+    assert existing_card_runnrs() == set()
+
+
+@pytest.fixture
+def corsika_input_dir(tmp_path: Path, mocker: MockerFixture) -> Path:
+    mocker.patch("tasdmc.fileio.corsika_input_files_dir", return_value=tmp_path)
+    mocker.patch("tasdmc.fileio.corsika_output_files_dir", return_value=tmp_path / 'corsika_output')
+    run_config = {
+        'input_files.particle': 'proton',
+        'input_files.log10E_min': 18.5,
+        'input_files.log10E_max': 18.5,
+        'input_files.event_number_multiplier': 0.01,
+        'corsika.high_E_hadronic_interactions_model': 'QGSJETII',
+        'corsika.low_E_hadronic_interactions_model': 'FLUKA',
+    }
+    mocker.patch("tasdmc.config.get_key", side_effect=lambda key, default=None: run_config.get(key, default))
+    return tmp_path
+
+
+def test_dry_enumeration_writes_no_files(corsika_input_dir: Path):
+    generated = generate_corsika_cards(logging=False)
+    manifest_file = corsika_input_dir / 'cards_manifest.tsv'
+    manifest_file.unlink()
+    files_before = sorted((corsika_input_dir).iterdir())
+    assert generate_corsika_cards(logging=False, dry=True) == generated
+    assert sorted((corsika_input_dir).iterdir()) == files_before
+
+
+def test_deleted_cards_are_regenerated(corsika_input_dir: Path):
+    generated = generate_corsika_cards(logging=False)
+    deleted_card = generated[0]
+    deleted_card_contents = deleted_card.read_text()
+    deleted_card.unlink()
+    assert generate_corsika_cards(logging=False) == generated
+    assert deleted_card.read_text() == deleted_card_contents
+    assert len(read_cards_manifest()) == len(generated)
+    manifest_lines = (corsika_input_dir / 'cards_manifest.tsv').read_text().splitlines()
+    assert len(manifest_lines) == len(generated)
+
+
+@pytest.mark.parametrize("truncated_at", [None, "after_seeds", "mid_seed"])
+def test_cards_missing_from_manifest_keep_seeds(truncated_at, corsika_input_dir: Path):
+    generated = generate_corsika_cards(logging=False)
+    manifest_file = corsika_input_dir / 'cards_manifest.tsv'
+    manifest_lines = manifest_file.read_text().splitlines()
+    # generation interrupted after writing the last card, but before adding it to the manifest
+    manifest_file.write_text("\n".join(manifest_lines[:-1]) + "\n")
+    unlisted_card = generated[-1]
+    unlisted_card_contents = unlisted_card.read_text()
+    last_seed_line_end = unlisted_card_contents.index("\n", unlisted_card_contents.rindex("SEED"))
+    if truncated_at == "after_seeds":
+        unlisted_card.write_text(unlisted_card_contents[: last_seed_line_end + 1])
+    elif truncated_at == "mid_seed":
+        unlisted_card.write_text(unlisted_card_contents[: last_seed_line_end - 6])
+
+    assert generate_corsika_cards(logging=False) == generated
+    new_manifest_lines = manifest_file.read_text().splitlines()
+    assert new_manifest_lines[:-1] == manifest_lines[:-1]
+    if truncated_at == "mid_seed":  # seeds can't be read back, card is generated anew
+        assert new_manifest_lines[-1] != manifest_lines[-1]
+        assert unlisted_card.read_text() != unlisted_card_contents
+        assert CardManifestEntry.from_card_file(unlisted_card) == CardManifestEntry.parse(new_manifest_lines[-1])
+    else:
+        assert new_manifest_lines == manifest_lines
+        assert unlisted_card.read_text() == unlisted_card_contents
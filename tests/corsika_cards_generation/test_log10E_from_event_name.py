@@ -0,0 +1,42 @@
+import pytest
+from pytest import param
+
+from tasdmc.steps.corsika_cards_generation import log10E_from_corsika_event_name
+from tasdmc.steps.processing.particle_file_splitting import n_split_for_log10E
+
+
+@pytest.mark.parametrize(
+    "corsika_event_name, expected_log10E",
+    [
+        param("DAT000000", 18.0),
+        param("DAT123415", 19.5),
+        param("DAT000025", 20.5),
+        param("DAT000026", 16.6),
+        param("DAT000039", 17.9),
+        param("DAT000080", 16.0),
+        param("DAT000075.p01", 15.5),
+    ],
+)
+def test_log10E_from_corsika_event_name(corsika_event_name, expected_log10E):
+    assert log10E_from_corsika_event_name(corsika_event_name) == expected_log10E
+
+
+@pytest.mark.parametrize("corsika_event_name", ["DAT000050", "DAT12", "something"])
+def test_log10E_from_invalid_corsika_event_name(corsika_event_name):
+    with pytest.raises(ValueError):
+        log10E_from_corsika_event_name(corsika_event_name)
+
+
+@pytest.mark.parametrize(
+    "log10E, n_split_max, log10E_per_part, expected_n_split",
+    [
+        param(16.0, 16, 18.0, 1),
+        param(18.0, 16, 18.0, 1),
+        param(18.3, 16, 17.3, 10),
+        param(18.35, 16, 17.3, 12),
+        param(19.5, 16, 18.0, 16),
+        param(19.5, 64, 18.0, 32),
+    ],
+)
+def test_n_split_for_log10E(log10E, n_split_max, log10E_per_part, expected_n_split):
+    assert n_split_for_log10E(log10E, n_split_max, log10E_per_part) == expected_n_split
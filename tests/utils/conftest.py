@@ -1,7 +1,7 @@
 import pytest
 from pathlib import Path
 from random import randint
-
+import numpy as np
 
 CUR_DIR = Path(__file__).parent
 
@@ -12,3 +12,41 @@ def temp_file() -> Path:
     fname.touch()
     yield fname
     fname.unlink()
+
+
+@pytest.fixture
+def make_particle_file():
+    """Factory writing synthetic CORSIKA particle file with RUNH, EVTH, particles, LONG, EVTE, RUNE and padding"""
+    from tasdmc.steps.particle_file import NSUBBLOCK, NSENTENCE, block_length
+
+    def make(
+        path: Path, n_particle_subblocks: int, n_long_subblocks: int = 0, particle_words: int = 8, seed: int = 0
+    ) -> Path:
+        rng = np.random.default_rng(seed)
+        subblock_words = NSENTENCE * particle_words
+
+        def header(name: str) -> np.ndarray:
+            subblock = rng.random(subblock_words, dtype=np.float32)
+            subblock[0] = np.frombuffer(name.encode(), dtype='<f4')[0]
+            return subblock
+
+        subblocks = [header('RUNH'), header('EVTH')]
+        for _ in range(n_particle_subblocks):
+            particles = rng.random((NSENTENCE, particle_words), dtype=np.float32) + 0.5
+            particles[:, 0] = rng.choice([1, 2, 3, 5, 6], size=NSENTENCE) * 1000 + 1
+            subblocks.append(particles.ravel())
+        if n_particle_subblocks:
+            subblocks[-1][-3 * particle_words :] = 0  # last particle subblock is not full
+        subblocks.extend(header('LONG') for _ in range(n_long_subblocks))
+        subblocks.extend([header('EVTE'), header('RUNE')])
+        while len(subblocks) % NSUBBLOCK:
+            subblocks.append(np.zeros(subblock_words, dtype=np.float32))
+
+        marker = np.array([block_length(particle_words)], dtype='<i4').tobytes()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'wb') as f:
+            for i in range(0, len(subblocks), NSUBBLOCK):
+                f.write(marker + np.concatenate(subblocks[i : i + NSUBBLOCK]).astype('<f4').tobytes() + marker)
+        return path
+
+    return make
@@ -0,0 +1,71 @@
+import os
+import shutil
+import subprocess
+import tarfile
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from pytest_mock import MockerFixture
+
+from tasdmc.steps.aggregation.reconstructed_events import (
+    ReconstructedEventFilesArchiveChunk,
+    ReconstructedEventFilesSet,
+    ReconstructedEventsArchivingStep,
+    ReconstructedEventsChunkArchivingStep,
+)
+
+
+def make_reconstructed_events(tmp_path: Path, name: str, size: int):
+    rufldf_dst = tmp_path / f"{name}.rufldf.dst.gz"
+    if size:
+        rufldf_dst.write_bytes(os.urandom(size))
+    return SimpleNamespace(rufldf_dst=rufldf_dst, is_realized=size > 0)
+
+
+@pytest.fixture
+def batches(tmp_path: Path, mocker: MockerFixture):
+    mocker.patch("tasdmc.fileio.final_dir", return_value=tmp_path)
+    compresslevels = iter([0, 6])
+    mocker.patch("tasdmc.config.get_key", side_effect=lambda key, default=None: next(compresslevels, default))
+    return [
+        [make_reconstructed_events(tmp_path, "DAT000001", 1000), make_reconstructed_events(tmp_path, "DAT000101", 0)],
+        [make_reconstructed_events(tmp_path, "DAT000201", 512), make_reconstructed_events(tmp_path, "DAT000301", 7)],
+    ]
+
+
+def assert_valid_archive(archive: Path, batches):
+    realized = [re.rufldf_dst for batch in batches for re in batch if re.is_realized]
+    with tarfile.open(archive, "r:gz") as tar:
+        assert tar.getnames() == [p.name for p in realized]
+        for p in realized:
+            assert tar.extractfile(p.name).read() == p.read_bytes()
+    if shutil.which("tar") is not None:
+        listing = subprocess.run(["tar", "tzf", archive], check=True, capture_output=True, text=True).stdout
+        assert listing.split() == [p.name for p in realized]
+
+
+def test_concatenated_chunks_make_valid_archive(tmp_path: Path, batches):
+    chunk_steps = []
+    for i, batch in enumerate(batches):
+        chunk = tmp_path / f"chunk{i}.tar.gz.part"
+        chunk_steps.append(
+            ReconstructedEventsChunkArchivingStep(
+                input_=ReconstructedEventFilesSet(batch),
+                output=ReconstructedEventFilesArchiveChunk(chunk=chunk, log=Path(str(chunk) + ".log")),
+            )
+        )
+        chunk_steps[-1]._run()
+    archiving_step = ReconstructedEventsArchivingStep.from_chunk_archiving_steps(chunk_steps, 18.5)
+    archiving_step._run()
+    archiving_step._post_run()
+
+    assert_valid_archive(archiving_step.output.tar, batches)
+    assert archiving_step.output.log.read_text().startswith("Added recontructed events files in the archive: 3\n")
+    assert not any(step.output.chunk.exists() for step in chunk_steps)
+
+    # rerun after chunks were deleted, e.g. on input hash mismatch
+    archiving_step.output.tar.unlink()
+    archiving_step._run()
+    assert_valid_archive(archiving_step.output.tar, batches)
+    assert archiving_step.output.log.read_text().startswith("Added recontructed events files in the archive: 3\n")
@@ -0,0 +1,31 @@
+import pytest
+from pytest import param
+from pathlib import Path
+import numpy as np
+
+from tasdmc.steps.utils import file_contents_hash, StreamingContentsHasher
+
+
+@pytest.mark.parametrize(
+    "file_size",
+    [
+        param(0, id="empty"),
+        param(1000, id="small"),
+        param(1024 * 1024 - 1, id="largest fully hashed"),
+        param(1024 * 1024, id="smallest partially hashed"),
+        param(1024 * 1024 + 12345, id="partially hashed"),
+        param(7 * 1024 * 1024 + 1, id="large"),
+    ],
+)
+def test_streaming_hash_matches_file_hash(file_size: int, temp_file: Path):
+    rng = np.random.default_rng(file_size)
+    contents = rng.bytes(file_size)
+    temp_file.write_bytes(contents)
+
+    hasher = StreamingContentsHasher(file_size)
+    offset = 0
+    while offset < file_size:
+        chunk_size = int(rng.integers(1, 100_000))
+        hasher.update(contents[offset : offset + chunk_size])
+        offset += chunk_size
+    assert hasher.hexdigest() == file_contents_hash(temp_file)
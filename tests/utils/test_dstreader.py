@@ -0,0 +1,80 @@
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+DSTREADER_SRC = Path(__file__).parents[2] / 'src/utils/dstreader'
+EXAMPLE_DST = DSTREADER_SRC / 'examples/example.dst.gz'
+
+MC_FIELDS = {"rusdmc": ["energy", "theta", "phi", "corexyz"], "rusdraw": ["nofwf"]}
+
+
+@pytest.fixture(scope='module')
+def dstreader(tmp_path_factory):
+    """dstreader package built from the source tree and installed into a temporary directory; the build needs
+    dst2k-ta library from sdanalysis (SDANALYSIS_DIR) and swig, the test is skipped without them"""
+    sdanalysis_dir = os.environ.get("SDANALYSIS_DIR")
+    if not sdanalysis_dir or not list((Path(sdanalysis_dir) / 'dst2k-ta/lib').glob('libdst2k.*')):
+        pytest.skip("dst2k-ta library is not built, set SDANALYSIS_DIR to sdanalysis directory")
+    if shutil.which('swig') is None:
+        pytest.skip("swig is not available")
+    build_dir = tmp_path_factory.mktemp('dstreader_build')
+    source_copy = build_dir / 'dstreader'  # installation generates interface files in the source tree
+    shutil.copytree(DSTREADER_SRC, source_copy, ignore=shutil.ignore_patterns('__pycache__', 'examples'))
+    install_root = build_dir / 'root'
+    subprocess.run(
+        [sys.executable, 'setup.py', 'install', '--single-version-externally-managed', f'--root={install_root}'],
+        cwd=source_copy,
+        check=True,
+        capture_output=True,
+    )
+    (package_init,) = install_root.glob('**/site-packages/dstreader/__init__.py')
+    sys.path.insert(0, str(package_init.parents[1]))
+    try:
+        import dstreader
+
+        yield dstreader
+    finally:
+        sys.path.remove(str(package_init.parents[1]))
+
+
+def read_events_bank_names(dstreader, dst_file: Path):
+    with dstreader.DstFile(dst_file) as dst:
+        return list(dst.events())
+
+
+def test_columns_equal_to_bank_values(dstreader):
+    columns = []
+    with dstreader.DstFile(EXAMPLE_DST) as dst:
+        for bank_names in dst.events(banks=MC_FIELDS.keys()):
+            if all(bank_name in bank_names for bank_name in MC_FIELDS):
+                rusdmc = dst.get_bank("rusdmc")
+                columns.append((rusdmc["energy"], rusdmc["corexyz"][0], dst.get_bank("rusdraw")["nofwf"]))
+    assert columns, "example file is expected to contain events with rusdmc and rusdraw banks"
+
+    with dstreader.DstFile(EXAMPLE_DST) as dst:
+        records = dst.read_all_columns(MC_FIELDS, batch_size=3)  # several batches, the last one incomplete
+    assert records.size == len(columns)
+    assert np.array_equal(records["rusdmc.energy"], [c[0] for c in columns])
+    assert np.array_equal(records["rusdmc.corexyz"][:, 0], [c[1] for c in columns])
+    assert np.array_equal(records["rusdraw.nofwf"], [c[2] for c in columns])
+
+
+def test_write_read_round_trip(dstreader, tmp_path: Path):
+    from dstreader import ops
+
+    copy = tmp_path / 'copy.dst.gz'
+    n_events = ops.concatenate([EXAMPLE_DST], copy)
+    source_events = read_events_bank_names(dstreader, EXAMPLE_DST)
+    assert n_events == len(source_events) > 0
+    assert read_events_bank_names(dstreader, copy) == source_events
+    with dstreader.DstFile(EXAMPLE_DST) as src, dstreader.DstFile(copy) as dst:
+        assert np.array_equal(src.read_all_columns(MC_FIELDS), dst.read_all_columns(MC_FIELDS))
+
+    doubled = tmp_path / 'doubled.dst.gz'
+    assert ops.concatenate([EXAMPLE_DST, copy], doubled) == 2 * n_events
+    assert read_events_bank_names(dstreader, doubled) == 2 * source_events
@@ -0,0 +1,75 @@
+import tarfile
+import pytest
+from pathlib import Path
+from types import SimpleNamespace
+from pytest_mock import MockerFixture
+
+from tasdmc.steps.processing.event_generation import EventsGenerationMergeStep
+
+
+@pytest.fixture
+def merge_step(tmp_path: Path, mocker: MockerFixture):
+    calibration_by_epoch = {epoch: tmp_path / f"sdcalib_{epoch}.bin" for epoch in range(1, 12)}
+    mocker.patch(
+        "tasdmc.steps.processing.event_generation._get_calibration_files_by_epoch", return_value=calibration_by_epoch
+    )
+    mocker.patch("tasdmc.fileio.events_dir", return_value=tmp_path)
+    mocker.patch("tasdmc.config.get_key", side_effect=lambda key, default=None: 4)  # epochs per step
+    c2g_step = SimpleNamespace(output=SimpleNamespace(corsika_event_name="DAT000001"))
+    tothrow_step = SimpleNamespace(output=SimpleNamespace())
+    return EventsGenerationMergeStep.with_epoch_group_steps(c2g_step, tothrow_step)
+
+
+def test_epoch_groups(merge_step):
+    epoch_group_steps, merge = merge_step
+    assert [sorted(step.output.events_file_by_epoch) for step in epoch_group_steps] == [
+        [1, 2, 3, 4],
+        [5, 6, 7, 8],
+        [9, 10, 11],
+    ]
+    assert [step.output.log.name for step in epoch_group_steps] == [
+        "DAT000001.evgen.epochs01-04.stdout",
+        "DAT000001.evgen.epochs05-08.stdout",
+        "DAT000001.evgen.epochs09-11.stdout",
+    ]
+    assert merge.previous_steps == epoch_group_steps
+    assert merge.input_.all_files == [step.output.log for step in epoch_group_steps]
+    assert merge.output.merged_events_file.name == "DAT000001.dst.gz"
+
+
+def test_merge(merge_step, mocker: MockerFixture):
+    _, merge = merge_step
+    for epoch, events_file, log_file, _ in merge.output.per_epoch_files():
+        events_file.touch()
+        log_file.write_text(f"Number of Events Thrown: {epoch % 3}\nDone\n")
+    concatenate = mocker.patch("tasdmc.steps.processing.event_generation.concatenate_dst_files")
+
+    merge._run()
+
+    merged_files = concatenate.call_args.args[0]
+    assert merged_files == [merge.output.events_file_by_epoch[epoch] for epoch in range(1, 12) if epoch % 3]
+    assert merge.output.log.read_text().endswith("OK\n")
+    assert merge.output.errorlog.read_text() == ""
+    with tarfile.open(merge.output.logs_archive) as tar:
+        assert len(tar.getnames()) == 11
+    assert not any(f.exists() for _, f, *_ in merge.output.per_epoch_files())
+
+
+def test_groups_are_rerun_if_not_merged(merge_step, mocker: MockerFixture):
+    epoch_group_steps, merge = merge_step
+    for step in epoch_group_steps:
+        step.output.log.write_text("OK\n")
+        step.output.errorlog.touch()
+    for epoch, events_file, log_file, _ in merge.output.per_epoch_files():
+        events_file.touch()
+        log_file.write_text(f"Number of Events Thrown: {epoch}\nDone\n")
+    assert all(step.output.files_were_produced() for step in epoch_group_steps)
+
+    mocker.patch("tasdmc.steps.processing.event_generation.concatenate_dst_files")
+    merge._run()
+    merge.output.merged_events_file.touch()
+    assert all(step.output.files_were_produced() for step in epoch_group_steps)
+
+    # e.g. merged file is removed, so merge step must be rerun, but epoch files are already deleted
+    merge.output.merged_events_file.unlink()
+    assert not any(step.output.files_were_produced() for step in epoch_group_steps)
@@ -0,0 +1,37 @@
+import os
+import subprocess
+from pathlib import Path
+
+from tasdmc.subprocess_utils import open_fifo_for_reading, open_fifo_for_writing
+
+
+def test_fifo_relay(tmp_path: Path):
+    source_fifo = tmp_path / "source.fifo"
+    sink_fifo = tmp_path / "sink.fifo"
+    os.mkfifo(source_fifo)
+    os.mkfifo(sink_fifo)
+    data = os.urandom(3 * 2**20 + 17)
+    source_file = tmp_path / "source"
+    source_file.write_bytes(data)
+    received_file = tmp_path / "received"
+
+    with open(received_file, 'wb') as received:
+        writer = subprocess.Popen(["cp", source_file, source_fifo])
+        reader = subprocess.Popen(["cat", sink_fifo], stdout=received)
+        with open_fifo_for_reading(source_fifo, writer) as source, open_fifo_for_writing(sink_fifo, reader) as sink:
+            while True:
+                chunk = source.read(2**16)
+                if not chunk:
+                    break
+                sink.write(chunk)
+        assert writer.wait() == 0
+        assert reader.wait() == 0
+    assert received_file.read_bytes() == data
+
+
+def test_fifo_writer_exited_before_opening(tmp_path: Path):
+    fifo = tmp_path / "source.fifo"
+    os.mkfifo(fifo)
+    writer = subprocess.Popen(["true"])
+    with open_fifo_for_reading(fifo, writer) as source:
+        assert source.read() == b''
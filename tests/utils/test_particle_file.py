@@ -0,0 +1,168 @@
+import pytest
+from pytest import param
+import os
+import numpy as np
+import shutil
+import subprocess
+from pathlib import Path
+
+from tasdmc.steps.particle_file import (
+    ParticleFile,
+    NSUBBLOCK,
+    NSENTENCE,
+    check_particle_file_integrity,
+    split_particle_file,
+    plan_split,
+    write_split_part,
+)
+from tasdmc.steps.utils import file_contents_hash
+from tasdmc.subprocess_utils import open_fifo_for_writing
+from tasdmc.steps.exceptions import FilesCheckFailed
+
+
+@pytest.mark.parametrize(
+    "n_particle_subblocks, n_long_subblocks, particle_words",
+    [
+        param(1, 0, 8, id="single block"),
+        param(100, 0, 8, id="thinned"),
+        param(100, 5, 8, id="thinned with LONG"),
+        param(57, 0, 7, id="dethinned"),
+    ],
+)
+def test_particle_file_view(
+    n_particle_subblocks, n_long_subblocks, particle_words, temp_file: Path, make_particle_file
+):
+    make_particle_file(temp_file, n_particle_subblocks, n_long_subblocks, particle_words)
+    pf = ParticleFile(temp_file)
+    assert pf.particle_words == particle_words
+    assert pf.n_blocks * NSUBBLOCK >= n_particle_subblocks + n_long_subblocks + 4
+    pf.check_integrity()
+
+    counts = pf.subblock_counts()
+    assert counts['RUNH'] == counts['EVTH'] == counts['EVTE'] == counts['RUNE'] == 1
+    assert counts['LONG'] == n_long_subblocks
+    assert counts['PART'] == n_particle_subblocks
+    assert pf.header('RUNH')[0].tobytes() == b'RUNH'
+    assert (pf.header('LONG') is None) == (n_long_subblocks == 0)
+
+    stats = pf.stats()
+    assert stats.n_particles == n_particle_subblocks * NSENTENCE - 3
+    assert sum(stats.n_particles_by_id.values()) == stats.n_particles
+    assert set(stats.n_particles_by_id).issubset({1, 2, 3, 5, 6})
+    assert (stats.total_weight is not None) == (particle_words == 8)
+
+    assert not pf.particles.flags.owndata
+    assert pf.particles['px'][0, 2, 0] == pf.subblocks[0, 2, 1]
+
+
+def test_particle_file_integrity_truncated(temp_file: Path, make_particle_file):
+    make_particle_file(temp_file, 30)
+    with open(temp_file, 'r+b') as f:
+        f.truncate(temp_file.stat().st_size - 100)
+    with pytest.raises(FilesCheckFailed, match="truncated"):
+        check_particle_file_integrity(temp_file)
+
+
+def test_particle_file_integrity_bad_marker(temp_file: Path, make_particle_file):
+    make_particle_file(temp_file, 30)
+    pf = ParticleFile(temp_file)
+    with open(temp_file, 'r+b') as f:
+        f.seek(pf.record_bytes - 4)
+        f.write(np.array([0], dtype='<i4').tobytes())
+    with pytest.raises(FilesCheckFailed, match="trailing length marker"):
+        check_particle_file_integrity(temp_file)
+
+
+def test_particle_file_integrity_no_rune(temp_file: Path, make_particle_file):
+    make_particle_file(temp_file, 30)
+    data = bytearray(temp_file.read_bytes())
+    data = data.replace(b'RUNE', b'\0\0\0\0')
+    temp_file.write_bytes(bytes(data))
+    with pytest.raises(FilesCheckFailed, match="RUNE"):
+        check_particle_file_integrity(temp_file)
+
+
+def test_particle_file_integrity_bad_weight(temp_file: Path, make_particle_file):
+    make_particle_file(temp_file, 30)
+    pf = ParticleFile(temp_file)
+    offset = 4 + 5 * pf.subblock_bytes + 7 * 4  # weight of the first particle in the 6th subblock
+    with open(temp_file, 'r+b') as f:
+        f.seek(offset)
+        f.write(np.array([np.nan], dtype='<f4').tobytes())
+    with pytest.raises(FilesCheckFailed, match="weight"):
+        check_particle_file_integrity(temp_file)
+    check_particle_file_integrity(temp_file, check_weights=False)
+
+
+@pytest.fixture(scope="module")
+def corsika_split_th(tmp_path_factory) -> Path:
+    if shutil.which("gcc") is None:
+        pytest.skip("gcc is required to build reference corsika_split_th routine")
+    source = Path(__file__).parent.parent.parent / "src/c_routines/corsika_split_th.c"
+    executable = tmp_path_factory.mktemp("bin") / "corsika_split_th.run"
+    subprocess.run(["gcc", "-O2", source, "-o", executable], check=True, capture_output=True)
+    return executable
+
+
+@pytest.mark.parametrize(
+    "n_particle_subblocks, n_long_subblocks, n_parts, chunk_blocks",
+    [
+        param(0, 0, 1, 10, id="no particles"),
+        param(1, 0, 4, 10, id="less particle subblocks than parts"),
+        param(100, 0, 1, 10, id="single part"),
+        param(100, 0, 4, 3, id="small chunks"),
+        param(100, 3, 6, 1, id="with LONG"),
+        param(40, 0, 40, 2, id="parts equal to particle subblocks"),
+        param(1000, 0, 7, 100, id="many subblocks"),
+        param(18, 0, 3, 10, id="boundaries at record ends"),
+    ],
+)
+def test_single_pass_splitting_matches_c_routine(
+    n_particle_subblocks, n_long_subblocks, n_parts, chunk_blocks, tmp_path: Path, make_particle_file, corsika_split_th
+):
+    reference_particle_file = make_particle_file(
+        tmp_path / "reference/DAT000001", n_particle_subblocks, n_long_subblocks
+    )
+    particle_file = tmp_path / "DAT000001"
+    shutil.copy(reference_particle_file, particle_file)
+
+    subprocess.run([corsika_split_th, reference_particle_file, str(n_parts)], check=True, capture_output=True)
+    reference_parts = sorted(reference_particle_file.parent.glob("*.p*"))
+
+    outputs = [particle_file.with_suffix(f".p{i + 1:02d}") for i in range(n_parts)]
+    parts = split_particle_file(particle_file, outputs, chunk_blocks=chunk_blocks)
+
+    assert [p.name for p in parts] == [p.name for p in reference_parts]
+    for part, reference_part in zip(parts, reference_parts):
+        assert part.read_bytes() == reference_part.read_bytes()
+        ParticleFile(part).check_integrity()
+
+
+@pytest.mark.parametrize("n_particle_subblocks, n_parts", [param(10, 2), param(1000, 3), param(17, 1)])
+def test_streamed_split_parts(n_particle_subblocks, n_parts, tmp_path: Path, make_particle_file):
+    from tasdmc.steps.processing.dethinning import _StreamedPartWriter
+
+    particle_file = make_particle_file(tmp_path / "DAT000001", n_particle_subblocks)
+    outputs = [particle_file.with_suffix(f".p{i + 1:02d}") for i in range(n_parts)]
+    split_particle_file(particle_file, outputs)
+
+    plan = plan_split(particle_file, outputs)
+    for part in plan.parts:
+        reference = part.path.read_bytes()
+        assert part.size == len(reference)
+        assert reference[part.size_up_to_rune - part.record_bytes // NSUBBLOCK : part.size_up_to_rune].startswith(
+            b'RUNE'
+        )
+        part.path.unlink()
+        os.mkfifo(part.path)
+        received = tmp_path / "received"
+        with open(received, 'wb') as out:  # reader that stops right after RUNE, like dethinning routine
+            reader = subprocess.Popen(["head", "-c", str(part.size_up_to_rune), part.path], stdout=out)
+            writer = _StreamedPartWriter(open_fifo_for_writing(part.path, reader), part.size, part.size_up_to_rune)
+            write_split_part(plan, part, writer)
+            writer.close()
+            assert reader.wait() == 0
+        part.path.unlink()
+        assert received.read_bytes() == reference[: part.size_up_to_rune]
+        part.path.write_bytes(reference)
+        assert writer.hasher.hexdigest() == file_contents_hash(part.path)
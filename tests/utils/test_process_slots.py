@@ -0,0 +1,32 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import sleep
+
+import pytest
+
+from tasdmc.steps.base.process_slots_shared import ProcessSlots
+
+
+@pytest.mark.parametrize("total", [1, 4])
+def test_process_slots_are_not_oversubscribed(total: int):
+    slots = ProcessSlots(total)
+    busy = 0
+    max_busy = 0
+    lock = threading.Lock()
+
+    def run_step(n: int):
+        nonlocal busy, max_busy
+        n_reserved = min(n, total)
+        with slots.reserved(n):
+            with lock:
+                busy += n_reserved
+                max_busy = max(max_busy, busy)
+            sleep(0.01)
+            with lock:
+                busy -= n_reserved
+
+    n_processes = [1, 3, 1, 1, 6, 2, 1, 4, 1, 1] * 3
+    with ThreadPoolExecutor(max_workers=total + 2) as executor:
+        list(executor.map(run_step, n_processes))
+    assert max_busy <= total
+    assert busy == 0
@@ -0,0 +1,70 @@
+import numpy as np
+from pathlib import Path
+
+from tasdmc.steps.aggregation.reconstructed_events_columns import (
+    ALL_COLUMNS,
+    FILE_ID_COLUMN,
+    concatenate_columns,
+    load_columns,
+    records_to_columns,
+    save_columns,
+)
+
+
+def make_records(n: int) -> np.ndarray:
+    # same layout as records read by dstreader
+    records = np.zeros(
+        n,
+        dtype=[
+            ("rufldf.energy", "f8", (2,)),
+            ("rufldf.theta", "f8"),
+            ("rufldf.phi", "f8"),
+            ("rufldf.xcore", "f8", (2,)),
+            ("rufldf.ycore", "f8", (2,)),
+            ("rufldf.s800", "f8", (2,)),
+            ("rufldf.chi2", "f8", (2,)),
+            ("rufldf.ndof", "i4", (2,)),
+            ("rusdmc.energy", "f4"),
+            ("rusdmc.theta", "f4"),
+            ("rusdmc.phi", "f4"),
+            ("rusdmc.corexyz", "f4", (3,)),
+            ("rusdmc.parttype", "i4"),
+        ],
+    )
+    records["rufldf.energy"] = np.arange(2 * n).reshape(n, 2)
+    records["rufldf.theta"] = np.linspace(0, 60, n)
+    records["rusdmc.theta"] = np.linspace(0, np.pi / 3, n)
+    records["rusdmc.corexyz"] = np.arange(3 * n).reshape(n, 3)
+    records["rufldf.ndof"] = 5
+    return records
+
+
+def test_columns_roundtrip(tmp_path: Path):
+    records = make_records(5)
+    columns_with_truth = records_to_columns(records)
+    assert np.array_equal(columns_with_truth["energy"], [0, 2, 4, 6, 8])
+    assert np.array_equal(columns_with_truth["mc_ycore"], [1, 4, 7, 10, 13])
+    assert np.allclose(columns_with_truth["mc_theta"], columns_with_truth["theta"])  # both in degrees
+    columns_without_truth = records_to_columns(make_records(2), with_mc_truth=False)
+    assert np.isnan(columns_without_truth["mc_energy"]).all()
+    assert (columns_without_truth["mc_parttype"] == -1).all()
+
+    columns = concatenate_columns([columns_with_truth, columns_without_truth])
+    npz = tmp_path / "reconstructed_events.18.5.npz"
+    save_columns(npz, columns, ["DAT000001.rufldf.dst.gz", "DAT000101.rufldf.dst.gz"])
+
+    loaded, files = load_columns(npz)
+    assert set(loaded) == set(ALL_COLUMNS) | {FILE_ID_COLUMN}
+    assert np.array_equal(loaded[FILE_ID_COLUMN], [0, 0, 0, 0, 0, 1, 1])
+    assert files[loaded[FILE_ID_COLUMN][-1]] == "DAT000101.rufldf.dst.gz"
+    for column, (_, _, dtype) in ALL_COLUMNS.items():
+        assert loaded[column].dtype == np.dtype(dtype)
+    assert (loaded["ndof"] == 5).all()
+
+
+def test_empty_columns(tmp_path: Path):
+    npz = tmp_path / "empty.npz"
+    save_columns(npz, concatenate_columns([]), [])
+    loaded, files = load_columns(npz)
+    assert files.size == 0
+    assert all(values.size == 0 for values in loaded.values())
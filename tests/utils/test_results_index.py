@@ -0,0 +1,74 @@
+import os
+import numpy as np
+import pytest
+from pathlib import Path
+
+from tasdmc import results_index
+from tasdmc.results_index import Condition, QueryResult, ResultsIndex, parse_conditions
+from tasdmc.steps.aggregation.reconstructed_events_columns import ALL_COLUMNS, concatenate_columns, save_columns
+
+
+def save_results(npz: Path, energies: np.ndarray):
+    rng = np.random.default_rng(0)
+    columns = {column: rng.random(energies.size).astype(dtype) for column, (_, _, dtype) in ALL_COLUMNS.items()}
+    columns["energy"] = energies.astype("f4")
+    columns["theta"] = np.linspace(0, 1, energies.size, dtype="f4")
+    n_files = 4
+    columns_by_file = [{column: values[i::n_files] for column, values in columns.items()} for i in range(n_files)]
+    save_columns(npz, concatenate_columns(columns_by_file), [f"DAT00000{i}.rufldf.dst.gz" for i in range(n_files)])
+
+
+@pytest.fixture
+def index(tmp_path: Path, monkeypatch) -> ResultsIndex:
+    monkeypatch.setattr(results_index, "CHUNK_SIZE", 10)
+    final_dir = tmp_path / "final"
+    final_dir.mkdir()
+    save_results(final_dir / "reconstructed_events.1850.npz", np.arange(100))  # energies sorted by file
+    save_results(final_dir / "reconstructed_events.1900.npz", np.arange(100, 125))
+    return ResultsIndex(results_dir=final_dir, index_dir=tmp_path / "index").update()
+
+
+def test_parse_conditions():
+    assert parse_conditions(["energy > 10 and theta<=0.78", "mc_parttype == 14"]) == [
+        Condition("energy", ">", 10),
+        Condition("theta", "<=", 0.78),
+        Condition("mc_parttype", "==", 14),
+    ]
+    with pytest.raises(ValueError):
+        parse_conditions(["energy ~ 10"])
+
+
+def test_query_prunes_chunks(index: ResultsIndex):
+    result = index.query(parse_conditions(["energy >= 95"]), ["energy", "file", "set"], set_names=["1850"])
+    assert result.chunks_total == 10
+    assert result.chunks_read < result.chunks_total
+    assert sorted(result.columns["energy"]) == [95, 96, 97, 98, 99]
+    assert set(result.columns["set"]) == {"1850"}
+    assert set(result.columns["file"]) <= {f"DAT00000{i}.rufldf.dst.gz" for i in range(4)}
+
+    all_sets = index.query(parse_conditions(["energy > 97", "theta < 0.5"]), ["energy"])
+    energies_1850 = np.arange(100)[(np.arange(100) > 97) & (np.linspace(0, 1, 100, dtype="f4") < 0.5)]
+    energies_1900 = np.arange(100, 125)[np.linspace(0, 1, 25, dtype="f4") < 0.5]
+    assert sorted(all_sets.columns["energy"]) == sorted([*energies_1850, *energies_1900])
+
+    with pytest.raises(ValueError):
+        index.query([], ["no_such_column"])
+
+
+def test_index_is_updated(tmp_path: Path, index: ResultsIndex):
+    npz = index.results_dir / "reconstructed_events.1900.npz"
+    save_results(npz, np.arange(5))
+    os.utime(npz, ns=(0, 1))
+    (index.results_dir / "reconstructed_events.1850.npz").unlink()
+    updated = ResultsIndex(results_dir=index.results_dir, index_dir=index.index_dir).update()
+    assert list(updated.sets) == ["1900"]
+    assert updated.query([], ["energy"]).n_events == 5
+    assert not list(index.index_dir.glob("1850.*"))
+
+
+def test_query_result_dump_load(index: ResultsIndex):
+    result = index.query(parse_conditions(["energy < 3"]), ["set", "energy"])
+    loaded = QueryResult.load(result.dump())
+    combined = QueryResult(columns={"set": np.empty(0), "energy": np.empty(0)}) + loaded + result
+    assert combined.n_events == 6
+    assert list(combined.columns["set"]) == ["1850"] * 6
@@ -0,0 +1,62 @@
+import gzip
+import os
+import pytest
+from pathlib import Path
+from pytest_mock import MockerFixture
+
+from tasdmc.steps.processing.spectral_sampling import SpectralSampledEvents, run_single_pass_spectral_sampling
+
+# fake routines: "sampling" copies decompressed input to gzipped output and writes log10(E_min) to stdout
+FAKE_ROUTINES = {
+    'sdmc_conv_e2_to_spctr.run': '''#!/bin/sh
+while [ $# -gt 1 ]; do
+    case "$1" in
+        -o) out="$2"; shift 2;;
+        -e) emin="$2"; shift 2;;
+        *) shift 2;;
+    esac
+done
+cat "$1" | gzip -c > "$out"
+echo "E_min $emin"
+echo "OK"
+''',
+    'dstlist.run': '''#!/bin/sh
+echo "event"
+''',
+}
+
+
+@pytest.fixture
+def fake_routines(tmp_path: Path, monkeypatch, mocker: MockerFixture):
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    for name, script in FAKE_ROUTINES.items():
+        (bin_dir / name).write_text(script)
+        (bin_dir / name).chmod(0o755)
+    monkeypatch.setenv('PATH', f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    config_values = {'spectral_sampling.target': 'HiRes', 'throwing.dnde_exponent': 2}
+    mocker.patch("tasdmc.config.get_key", side_effect=lambda key, default=None: config_values.get(key, default))
+
+
+def test_single_pass_spectral_sampling(tmp_path: Path, fake_routines):
+    events_file = tmp_path / 'DAT000001.dst.gz'
+    events = os.urandom(3 * 2**20 + 17)
+    with gzip.open(events_file, 'wb') as f:
+        f.write(events)
+    outputs = [
+        SpectralSampledEvents(
+            events=tmp_path / f'DAT000001.spctr.{log10E_min}.dst.gz',
+            stdout=tmp_path / f'DAT000001.spctr.{log10E_min}.stdout',
+            stderr=tmp_path / f'DAT000001.spctr.{log10E_min}.stderr',
+            log10E_min=log10E_min,
+        )
+        for log10E_min in (18.0, 19.0, 19.5)
+    ]
+
+    run_single_pass_spectral_sampling(events_file, outputs)
+
+    for output in outputs:
+        with gzip.open(output.events, 'rb') as f:
+            assert f.read() == events
+        assert f"E_min {10 ** (output.log10E_min - 18)}" in output.stdout.read_text()
+    assert not list(tmp_path.glob('*.input.dst'))
@@ -0,0 +1,92 @@
+import pytest
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from tasdmc.logs.step_progress import EventType, PipelineStepProgress
+from tasdmc.logs.step_durations import StepDurationModel
+from tasdmc.logs.utils import datetime2str
+
+T0 = datetime(2022, 1, 1)
+
+
+def step_event(event_type: EventType, pipeline_id: str, step_name: str, seconds: int) -> PipelineStepProgress:
+    return PipelineStepProgress(
+        event_type=event_type,
+        step_name=step_name,
+        step_id=f"{step_name}-{pipeline_id}",
+        timestamp=T0 + timedelta(seconds=seconds),
+        pipeline_id=pipeline_id,
+    )
+
+
+def write_log(log: Path, events):
+    with open(log, 'a') as f:
+        for e in events:
+            f.write(f"{datetime2str(e.timestamp)} {e.pipeline_id} {e.step_name} {e.step_id} {e.event_type}\n")
+
+
+@pytest.fixture
+def model() -> StepDurationModel:
+    m = StepDurationModel()
+    # DAT000000 is 10^18 eV, DAT000005 is 10^18.5 eV
+    for pipeline_id, start, end in [("DAT000000", 0, 100), ("DAT100000", 0, 200), ("DAT000005", 50, 1050)]:
+        m.update(step_event(EventType.STARTED, pipeline_id, "CorsikaStep", start))
+        m.update(step_event(EventType.COMPLETED, pipeline_id, "CorsikaStep", end))
+    return m
+
+
+def test_expected_duration(model: StepDurationModel):
+    assert model.expected_duration("CorsikaStep", "DAT200000") == pytest.approx(150)
+    assert model.expected_duration("CorsikaStep", "DAT000005") == pytest.approx(1000)
+    assert model.expected_duration("CorsikaStep", "DAT000006") == pytest.approx(1000)  # nearest energy
+    assert model.expected_duration("CorsikaStep", "not-a-corsika-event") == pytest.approx(1300 / 3)
+    assert model.expected_duration("DethinningStep", "DAT000000") is None
+
+
+def test_failed_steps_are_not_counted(model: StepDurationModel):
+    model.update(step_event(EventType.STARTED, "DAT300000", "CorsikaStep", 0))
+    model.update(step_event(EventType.FAILED, "DAT300000", "CorsikaStep", 10))
+    assert model.expected_duration("CorsikaStep", "DAT000000") == pytest.approx(150)
+    assert not model.started_at
+
+
+def test_estimate_remaining_seconds(model: StepDurationModel):
+    for pipeline_id, start, end in [("DAT000000", 100, 110), ("DAT100000", 110, 130)]:
+        model.update(step_event(EventType.STARTED, pipeline_id, "DethinningStep", start))
+        model.update(step_event(EventType.COMPLETED, pipeline_id, "DethinningStep", end))
+    model.update(step_event(EventType.STARTED, "DAT200000", "CorsikaStep", 1000))
+
+    finished_steps_count = {"DAT000000": {"CorsikaStep": 1, "DethinningStep": 2}}
+    remaining = model.estimate_remaining_seconds(
+        step_names=["CorsikaStep", "DethinningStep"],
+        unfinished_pipeline_ids=["DAT200000", "DAT300000"],
+        finished_steps_count=finished_steps_count,
+        now=T0 + timedelta(seconds=1050),
+    )
+    # two pipelines with one CorsikaStep (150 s) and two DethinningSteps (15 s) each, one running for 50 s
+    assert remaining == pytest.approx(2 * (150 + 2 * 15) - 50)
+
+    assert (
+        model.estimate_remaining_seconds(
+            step_names=["CorsikaStep", "TothrowGenerationStep"],
+            unfinished_pipeline_ids=["DAT200000"],
+            finished_steps_count=finished_steps_count,
+            now=T0,
+        )
+        is None
+    )
+
+
+def test_incremental_update_from_log(tmp_path: Path):
+    log = tmp_path / 'pipelines.log'
+    write_log(log, [step_event(EventType.STARTED, "DAT000000", "CorsikaStep", 0)])
+    m = StepDurationModel()
+    position = m.update_from_log(log)
+    assert m.expected_duration("CorsikaStep", "DAT000000") is None
+
+    write_log(log, [step_event(EventType.COMPLETED, "DAT000000", "CorsikaStep", 60)])
+    with open(log, 'a') as f:
+        f.write("01/01/22T00:00:00 DAT000001 Cor")  # line being written right now
+    position = m.update_from_log(log, position)
+    assert m.expected_duration("CorsikaStep", "DAT000000") == pytest.approx(60)
+    assert position < log.stat().st_size
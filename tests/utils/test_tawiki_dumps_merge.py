@@ -0,0 +1,67 @@
+import os
+import pytest
+from pathlib import Path
+from pytest_mock import MockerFixture
+
+from tasdmc.steps.processing.tawiki_dump import TawikiDumpFiles
+from tasdmc.steps.aggregation.tawiki_dumps import MergedTawikiDump, IncrementalTawikiDumpMerger
+
+
+@pytest.fixture
+def merged(tmp_path: Path, mocker: MockerFixture) -> MergedTawikiDump:
+    mocker.patch("tasdmc.fileio.reconstruction_dir", return_value=tmp_path)
+    return MergedTawikiDump(merged_dump=tmp_path / "merged.sdascii", log=tmp_path / "merged.sdascii.log")
+
+
+def make_dump(tmp_path: Path, name: str, contents: str) -> TawikiDumpFiles:
+    tdf = TawikiDumpFiles(dump=tmp_path / f"{name}.sdascii", log=tmp_path / f"{name}.sdascii.log", log10E_min=18.0)
+    tdf.dump.write_text(contents)
+    return tdf
+
+
+def test_incremental_merge(tmp_path: Path, merged: MergedTawikiDump):
+    tdf1 = make_dump(tmp_path, "DAT000001", "a 1\n\n  b 2  \n")
+    tdf2 = make_dump(tmp_path, "DAT000101", "c 3\n")
+    for tdf in (tdf1, tdf2, tdf1):  # repeated append of unchanged dump is no-op
+        with IncrementalTawikiDumpMerger(merged).locked() as merger:
+            merger.append(tdf.dump)
+    assert merged.merged_dump.read_text() == "a 1\nb 2\nc 3\n"
+
+    tdf1.dump.write_text("a 10\n")
+    os.utime(tdf1.dump, ns=(0, 1))  # ensuring mtime is changed
+    with IncrementalTawikiDumpMerger(merged).locked() as merger:
+        merger.append(tdf1.dump)
+        assert merger.entries[tdf1.dump.name].lines == 1
+    assert merged.merged_dump.read_text() == "c 3\na 10\n"
+
+    with IncrementalTawikiDumpMerger(merged).locked() as merger:
+        merger.sync([tdf2])
+    assert merged.merged_dump.read_text() == "c 3\n"
+
+
+def test_interrupted_append_is_dropped(tmp_path: Path, merged: MergedTawikiDump):
+    tdf = make_dump(tmp_path, "DAT000001", "a 1\n")
+    with IncrementalTawikiDumpMerger(merged).locked() as merger:
+        merger.append(tdf.dump)
+    with open(merged.merged_dump, "a") as f:
+        f.write("partially appended")
+    with IncrementalTawikiDumpMerger(merged).locked() as merger:
+        merger.sync([tdf])
+    assert merged.merged_dump.read_text() == "a 1\n"
+
+
+def test_sync_restores_steps_order(tmp_path: Path, merged: MergedTawikiDump):
+    tdfs = [make_dump(tmp_path, f"DAT00000{i}", f"line {i}\n") for i in range(3)]
+    for tdf in reversed(tdfs):  # steps finished in reverse order
+        with IncrementalTawikiDumpMerger(merged).locked() as merger:
+            merger.append(tdf.dump)
+    assert merged.merged_dump.read_text() == "line 2\nline 1\nline 0\n"
+    with IncrementalTawikiDumpMerger(merged).locked() as merger:
+        merger.sync(tdfs)
+    assert merged.merged_dump.read_text() == "line 0\nline 1\nline 2\n"
+
+    with IncrementalTawikiDumpMerger(merged).locked() as merger:
+        assert [e.offset for e in merger.entries.values()] == [0, 7, 14]
+        merged_mtime_ns = merged.merged_dump.stat().st_mtime_ns
+        merger.sync(tdfs)  # already in order, not rewritten
+    assert merged.merged_dump.stat().st_mtime_ns == merged_mtime_ns
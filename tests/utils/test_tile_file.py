@@ -0,0 +1,249 @@
+import pytest
+import shutil
+import subprocess
+import numpy as np
+from pathlib import Path
+
+from typing import Optional
+
+from tasdmc.steps.tile_file import (
+    NX,
+    NY,
+    DT,
+    NWORD,
+    MIN_ARRIVAL_TIME_DTYPE,
+    SENTINEL_TIME,
+    TILE_BLOCK_DTYPE,
+    merge_partial_tile_files,
+    read_partial_tile_file,
+    _core_impact_time,
+)
+
+C2G_PARALLEL_SRC = Path(__file__).parents[2] / 'src/c_routines/corsika2geant_parallel'
+
+
+@pytest.fixture(scope='module')
+def cpp_merge_routine(tmp_path_factory) -> Path:
+    if shutil.which('g++') is None:
+        pytest.skip("g++ is not available")
+    build_dir = tmp_path_factory.mktemp('c2g_parallel_merge')
+    executable = build_dir / 'corsika2geant_parallel_merge.run'
+    objects = []
+    for name in ('utils', 'structs'):
+        obj = build_dir / f'{name}.o'
+        subprocess.run(['gcc', '-O3', '-DNT=16', '-c', C2G_PARALLEL_SRC / f'{name}.c', '-o', obj], check=True)
+        objects.append(obj)
+    subprocess.run(
+        ['g++', '-O3', '-DNT=16', C2G_PARALLEL_SRC / 'main_merge.cpp', *objects, '-o', executable, '-lm'], check=True
+    )
+    return executable
+
+
+# sets given min arrival times on an otherwise empty tile grid, quantizes them as main_partial.c does
+# and dumps them in partial tile file format (m, n, time triplets for tiles with particles)
+QUANTIZATION_HARNESS = r"""
+#include <stdio.h>
+#include <stdlib.h>
+#include "arrival_times.h"
+#include "globals.h"
+
+float emin = 0.0;
+int particle_count;
+int outlier_particle_count;
+float min_arrival_times[NX][NY];
+FILE *temp_later = NULL;
+
+int main(int argc, char *argv[])
+{
+    initArrivalTimes();
+    for (int i = 2; i + 2 < argc; i += 3)
+        min_arrival_times[atoi(argv[i])][atoi(argv[i + 1])] = strtof(argv[i + 2], NULL);
+    quantizeArrivalTimes(strtof(argv[1], NULL));
+    for (short m = 0; m < NX; m++)
+        for (short n = 0; n < NY; n++)
+            if (min_arrival_times[m][n] != SENTINEL_TIME)
+            {
+                fwrite(&m, sizeof(short), 1, stdout);
+                fwrite(&n, sizeof(short), 1, stdout);
+                fwrite(&min_arrival_times[m][n], sizeof(float), 1, stdout);
+            }
+    return 0;
+}
+"""
+
+
+@pytest.fixture(scope='module')
+def quantization_routine(tmp_path_factory) -> Path:
+    if shutil.which('gcc') is None:
+        pytest.skip("gcc is not available")
+    build_dir = tmp_path_factory.mktemp('c2g_parallel_quantization')
+    harness = build_dir / 'harness.c'
+    harness.write_text(QUANTIZATION_HARNESS)
+    executable = build_dir / 'quantization.run'
+    subprocess.run(
+        [
+            'gcc',
+            '-O3',
+            '-DNT=16',
+            f'-I{C2G_PARALLEL_SRC}',
+            harness,
+            *(C2G_PARALLEL_SRC / f'{name}.c' for name in ('arrival_times', 'structs', 'utils')),
+            '-o',
+            executable,
+            '-lm',
+        ],
+        check=True,
+    )
+    return executable
+
+
+@pytest.mark.parametrize('tmin', [12345.678, 40123.5, 10000.0])
+def test_quantization_keeps_empty_tiles_empty(tmin, quantization_routine: Path):
+    # for these tmin values quantized SENTINEL_TIME is 1000000064 or 999999936 in float32
+    tiles = [(NX // 2, NY // 2, tmin + 1.5), (NX // 2 + 1, NY // 2, tmin + 47.25), (0, NY - 1, tmin + 1000.0)]
+    result = subprocess.run(
+        [quantization_routine, str(tmin), *(str(value) for tile in tiles for value in tile)],
+        check=True,
+        capture_output=True,
+    )
+    triplets = np.frombuffer(result.stdout, dtype=MIN_ARRIVAL_TIME_DTYPE)
+    assert sorted(zip(triplets['m'], triplets['n'])) == sorted((m, n) for m, n, _ in tiles)
+    tmin_f32 = np.float32(tmin)
+    for m, n, time in triplets:
+        (t,) = [np.float32(t) for tm, tn, t in tiles if (tm, tn) == (m, n)]
+        assert time == tmin_f32 + np.float32(DT) * np.floor((t - tmin_f32) / np.float32(DT))
+
+
+# writes records into the "later" temp file during the first VEM batch as main_partial.c does, and counts records
+# read back from it in the second batch
+TEMP_FILES_HARNESS = r"""
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include "globals.h"
+#include "temp_files.h"
+
+int main(int argc, char *argv[])
+{
+    strcpy(temp_filename_1, argv[1]);
+    strcat(temp_filename_1, ".1.tmp");
+    strcpy(temp_filename_2, argv[1]);
+    strcat(temp_filename_2, ".2.tmp");
+    int n_records = atoi(argv[2]);
+
+    prepareTempFilePointers();
+    for (int i = 0; i < n_records; i++)
+        fwrite(&i, sizeof(int), 1, temp_later);
+
+    prepareTempFilePointers();
+    int record;
+    int n_read = 0;
+    while (temp_now != NULL && fread(&record, sizeof(int), 1, temp_now) == 1)
+        n_read++;
+    printf("%d\n", n_read);
+    return 0;
+}
+"""
+
+
+@pytest.mark.parametrize('n_records', [10, 1000, 100003])
+def test_temp_file_is_flushed_before_second_batch(n_records, tmp_path: Path):
+    # before the fix the second batch read the temp file without its buffered tail, so that with fewer records
+    # than the stdio buffer holds it read nothing at all
+    if shutil.which('gcc') is None:
+        pytest.skip("gcc is not available")
+    harness = tmp_path / 'harness.c'
+    harness.write_text(TEMP_FILES_HARNESS)
+    executable = tmp_path / 'temp_files.run'
+    subprocess.run(
+        ['gcc', '-DNT=16', f'-I{C2G_PARALLEL_SRC}', harness, C2G_PARALLEL_SRC / 'temp_files.c', '-o', executable],
+        check=True,
+    )
+    result = subprocess.run([executable, str(tmp_path / 'tile'), str(n_records)], check=True, capture_output=True)
+    assert int(result.stdout) == n_records
+
+
+def make_partial_tile_files(directory: Path, n_files: int, seed: int = 0):
+    """Partial tile files for a shower with near-axis region < 40 m masked, as after dethinning"""
+    rng = np.random.default_rng(seed)
+    header = rng.random(NWORD, dtype=np.float32)
+    header[6:11] = [25e5, 0.3, 0.2, 0.9, 0.5]  # first interaction height, momentum, zenith
+    tmin = _core_impact_time(header)
+
+    m, n = np.meshgrid(np.arange(NX // 2 - 20, NX // 2 + 20), np.arange(NY // 2 - 20, NY // 2 + 20), indexing='ij')
+    r = np.hypot((m + 0.5) * 6 - 8400, (n + 0.5) * 6 - 8400)
+    ring = (r > 40) & (r < 110)
+    m, n, r = m[ring], n[ring], r[ring]
+
+    paths = []
+    for i in range(n_files):
+        in_file = np.ones(m.size, dtype=bool) if i == 0 else rng.random(m.size) < 0.7
+        # min arrival times are quantized in DT units relative to tmin
+        time_bins = (r[in_file] / 10).astype(int) + rng.integers(0, 4, size=in_file.sum())
+        triplets = np.empty(in_file.sum() + 1, dtype=MIN_ARRIVAL_TIME_DTYPE)
+        triplets['m'][:-1] = m[in_file]
+        triplets['n'][:-1] = n[in_file]
+        triplets['time'][:-1] = tmin + np.float32(DT) * time_bins.astype(np.float32)
+        triplets[-1] = (-1, -1, SENTINEL_TIME)
+
+        blocks_per_tile = 5
+        blocks = np.empty(in_file.sum() * blocks_per_tile, dtype=TILE_BLOCK_DTYPE)
+        blocks['m'] = np.repeat(m[in_file], blocks_per_tile)
+        blocks['n'] = np.repeat(n[in_file], blocks_per_tile)
+        blocks['k'] = np.tile(np.arange(blocks_per_tile) * 3, in_file.sum())
+        blocks['vem_top'] = rng.integers(0, 2000, size=blocks.size)
+        blocks['vem_bot'] = rng.integers(1, 2000, size=blocks.size)
+        blocks['pz'] = rng.integers(0, 1000, size=blocks.size)
+
+        path = directory / f'DAT000001.p{i:02d}.dethinned.partial_tile'
+        with open(path, 'wb') as f:
+            f.write(header.tobytes())
+            f.write(triplets.tobytes())
+            f.write(blocks.tobytes())
+        paths.append(path)
+    return paths
+
+
+def run_cpp_merge(cpp_merge_routine: Path, partial_tile_files, output: Path, flag: Optional[str] = None):
+    listing = output.with_suffix('.list')
+    listing.write_text(''.join(f'{ptf}\n' for ptf in partial_tile_files))
+    subprocess.run(
+        [cpp_merge_routine, listing, output] + ([flag] if flag else []),
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+@pytest.mark.parametrize('n_files', [1, 3, 8])
+@pytest.mark.parametrize('merge_tree', [False, True], ids=['flat', 'merge_tree'])
+def test_merge_equivalent_to_cpp(n_files, merge_tree, tmp_path: Path, cpp_merge_routine: Path):
+    partial_tile_files = make_partial_tile_files(tmp_path, n_files, seed=n_files)
+    run_cpp_merge(cpp_merge_routine, partial_tile_files, tmp_path / 'cpp.tile', '--merge-tree' if merge_tree else None)
+    merge_partial_tile_files(partial_tile_files, tmp_path / 'numpy.tile', merge_tree=merge_tree)
+    assert (tmp_path / 'numpy.tile').read_bytes() == (tmp_path / 'cpp.tile').read_bytes()
+
+
+def test_partial_merge_equivalent_to_cpp(tmp_path: Path, cpp_merge_routine: Path):
+    partial_tile_files = make_partial_tile_files(tmp_path, 4)
+    run_cpp_merge(cpp_merge_routine, partial_tile_files, tmp_path / 'cpp.partial_tile', '--partial')
+    merge_partial_tile_files(partial_tile_files, tmp_path / 'numpy.partial_tile', partial_output=True)
+    assert (tmp_path / 'numpy.partial_tile').read_bytes() == (tmp_path / 'cpp.partial_tile').read_bytes()
+
+
+def test_tree_merge_equals_flat_merge(tmp_path: Path):
+    partial_tile_files = make_partial_tile_files(tmp_path, 7)
+    merge_partial_tile_files(partial_tile_files, tmp_path / 'flat.tile', merge_tree=True)
+    intermediate = []
+    for i, group in enumerate([partial_tile_files[:3], partial_tile_files[3:6]]):
+        intermediate.append(tmp_path / f'merged_{i}.partial_tile')
+        merge_partial_tile_files(group, intermediate[-1], partial_output=True)
+    merge_partial_tile_files(intermediate + partial_tile_files[6:], tmp_path / 'tree.tile', merge_tree=True)
+    assert (tmp_path / 'tree.tile').read_bytes() == (tmp_path / 'flat.tile').read_bytes()
+
+
+def test_read_partial_tile_file(tmp_path: Path):
+    (partial_tile_file,) = make_partial_tile_files(tmp_path, 1)
+    pt = read_partial_tile_file(partial_tile_file)
+    assert pt.header.size == NWORD
+    assert pt.tiles.size * 5 == pt.blocks.size
+    assert np.all(np.diff(pt.tiles) > 0)